@@ -1,10 +1,34 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from src.eda import TimeSeriesEDA
-from src.file_ops import save_dataset, increment_filename, DATA_DIR, delete_dataset, rename_dataset, file_size_limit
+from src.eda import (TimeSeriesEDA, parse_content, load_saved, export_resampled_csv, export_slice, dataset_summary, run_eda_method,
+                     render_components, downsample_components, split_groups, group_seasonal_components, long_format)
+from src.columnar import columnar_metadata, read_columnar, to_arrow_ipc
+from src.forecasting import recursive_forecast, last_windows, forecast_metrics
+from src.resample import to_datetime
+from src.model_registry import model_registry, predict_batcher, model_input_shape
+from src.jobs import job_scheduler
+from src.statistical import forecast_groups, shutdown_pool, STAT_MODELS
+from src.training import parse_strategy, ARCHITECTURES
+from src.executor import eda_pool, PoolSaturatedError, ClientDisconnectedError, timed_call
+from src.dataset_cache import dataset_cache, decomposition_cache, dataset_id_for
+from src.transform_plan import (plan_store, describe_plan, prepare_step, preview_plan, sample_file, sample_rows, split_dataset_id,
+                                cache_path, materialize, materialized, plan_stats)
+from src.export import export_stream, export_media, frame_chunks, frame_schema, arrow_file_batches
+from src.file_ops import (save_dataset, increment_filename, dataset_store, dataset_path, delete_dataset, rename_dataset,
+                          file_size_limit, FileTooLargeError)
+import asyncio
+import hashlib
 import io
-from monitoring.metrics import start_metrics_collection
+import re
+import time
+from typing import Any, List, Optional
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+from monitoring.metrics import (start_metrics_collection, register_runtime_stats, observe_stage, stage_timer, observe_payload,
+                                mark_active, REQUEST_COUNT, REQUEST_ERRORS, REQUEST_LATENCY, POOL_WAIT_SECONDS, INFERENCE_TIME_HISTOGRAM)
 import logging
 from prometheus_fastapi_instrumentator import Instrumentator
 
@@ -23,9 +47,58 @@ app.add_middleware(
 
 Instrumentator().instrument(app).expose(app)
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    REQUEST_COUNT.inc()
+    mark_active()
+    try:
+        response = await call_next(request)
+    except Exception:
+        REQUEST_ERRORS.inc()
+        raise
+    REQUEST_LATENCY.observe(time.perf_counter() - started)
+    if response.status_code >= 500:
+        REQUEST_ERRORS.inc()
+    endpoint = _endpoint(request)
+    observe_payload(endpoint, "request", request.headers.get("content-length"))
+    observe_payload(endpoint, "response", response.headers.get("content-length"))
+    return response
+
+def _endpoint(request: Request) -> str:
+    # Route templates keep label cardinality bounded (/dataset/{filename}, not one series per file).
+    route = request.scope.get("route")
+    return route.path if route is not None else "unmatched"
+
 @app.on_event("startup")
 def startup_event():
     start_metrics_collection()
+    imported = dataset_store.import_legacy()
+    removed = dataset_store.collect_garbage()
+    profiled = dataset_store.backfill_catalog()
+    if imported or removed or profiled:
+        logger.info(f"Dataset store: imported {imported} legacy files, removed {removed} unreferenced blobs, "
+                    f"cataloged {profiled} blobs")
+    register_runtime_stats(
+        caches={"datasets": dataset_cache.stats, "decompositions": decomposition_cache.stats, "models": model_registry.stats},
+        pools={"eda": eda_pool.stats, "train": _train_pool_stats},
+    )
+    job_scheduler.on_complete = _on_job_complete
+    job_scheduler.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    eda_pool.shutdown()
+    job_scheduler.shutdown()
+    shutdown_pool()
+
+def _train_pool_stats() -> dict:
+    stats = job_scheduler.stats()
+    return {"queued": stats["queued"], "in_flight": len(stats["running"])}
+
+def _on_job_complete(job: dict):
+    if job and job["kind"] == "train" and job["status"] == "completed":
+        model_registry.invalidate(job["result"]["model_name"])
 
 @app.get("/health")
 def health_check():
@@ -33,112 +106,803 @@ def health_check():
 
 
 
+async def _offload(request: Request, fn, *args, stage: str = "compute", dataset_rows: Optional[int] = None, **kwargs):
+    started = time.perf_counter()
+    try:
+        result, seconds = await eda_pool.run(timed_call, fn, *args, is_disconnected=request.is_disconnected, **kwargs)
+    except PoolSaturatedError as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except ClientDisconnectedError as e:
+        logger.info(str(e))
+        raise HTTPException(status_code=499, detail=str(e))
+    endpoint = _endpoint(request)
+    # Worker-side time is the stage; the rest of the wall time was queueing and pickling.
+    observe_stage(endpoint, stage, seconds, dataset_rows)
+    POOL_WAIT_SECONDS.labels(endpoint).observe(max(0.0, time.perf_counter() - started - seconds))
+    return result
+
+async def _read_upload(request: Request, file: UploadFile) -> bytes:
+    with stage_timer(_endpoint(request), "decode"):
+        return await file.read()
+
+async def _load_entry(request: Request, file: Optional[UploadFile], dataset_id: Optional[str]) -> dict:
+    if dataset_id:
+        entry = dataset_cache.get(dataset_id)
+        if entry is None:
+            raise HTTPException(status_code=404, detail=f"Dataset '{dataset_id}' is not loaded. Upload it again via /eda/upload.")
+        return dict(entry, dataset_id=dataset_id)
+    if file is None:
+        raise HTTPException(status_code=400, detail="Either 'file' or 'dataset_id' is required.")
+    return await _parse_and_cache(request, await _read_upload(request, file), file.filename)
+
+async def _load_eda(request: Request, file: Optional[UploadFile], dataset_id: Optional[str]) -> TimeSeriesEDA:
+    # Only read-only summaries run on this object, so it shares the cached frame instead of copying it.
+    entry = await _load_entry(request, file, dataset_id)
+    return TimeSeriesEDA.from_dataframe(entry["df"], entry["filename"], entry["sep"], copy=False)
+
+def _dataset_file(filename: str):
+    try:
+        return dataset_path(filename)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+def _column_list(value: Optional[str]) -> Optional[list]:
+    return ([c.strip() for c in value.split(",") if c.strip()] or None) if value else None
+
+def _check_columns(df: pd.DataFrame, *columns):
+    missing = [c for c in columns if c is not None and c not in df.columns]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Columns not found: {', '.join(missing)}")
+
+async def _run_eda(request: Request, entry: dict, method: str, *args, stage: str = "compute", **kwargs):
+    return await _offload(request, run_eda_method, entry["df"], entry["filename"], entry["sep"], method, *args,
+                          stage=stage, dataset_rows=len(entry["df"]), **kwargs)
+
+async def _parse_and_cache(request: Request, content: bytes, filename: str) -> dict:
+    dataset_id = dataset_id_for(content)
+    entry = dataset_cache.get(dataset_id)
+    if entry is not None:
+        return dict(entry, dataset_id=dataset_id)
+    try:
+        df, sep = await _offload(request, parse_content, content, filename, stage="parse")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    entry = dataset_cache.put(dataset_id, df, filename, sep)
+    return dict(entry, dataset_id=dataset_id)
+
+
+def _plan_source(dataset_id: str) -> dict:
+    """Input of a dataset's transform plan: its stored blob when the content was saved, else the parsed upload."""
+    content_hash, columns = split_dataset_id(dataset_id)
+    entry = dataset_cache.get(dataset_id)
+    if re.fullmatch(r"[0-9a-f]{64}", content_hash) and dataset_store.blob_path(content_hash).exists():
+        path = dataset_store.blob_path(content_hash)
+        sep = entry["sep"] if entry else columnar_metadata(path)["sep"]
+        return {"path": path, "columns": columns, "df": None, "filename": entry["filename"] if entry else f"{content_hash[:12]}.csv", "sep": sep}
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Dataset '{dataset_id}' is not loaded. Upload it again via /eda/upload.")
+    return {"path": None, "columns": None, "df": entry["df"], "filename": entry["filename"], "sep": entry["sep"]}
+
+async def _plan_dataset_id(request: Request, file: Optional[UploadFile], dataset_id: Optional[str]) -> str:
+    if dataset_id:
+        return dataset_id
+    return (await _load_entry(request, file, None))["dataset_id"]
+
+async def _plan_sample(source: dict) -> pd.DataFrame:
+    if source["path"] is not None:
+        return await asyncio.to_thread(sample_file, source["path"], source["columns"])
+    return sample_rows(source["df"])
+
+async def _prepare_step(request: Request, dataset_id: str, step: dict) -> tuple:
+    """``(sample, steps, prepared step)``: the step normalized and validated on the plan's sample."""
+    sample = await _plan_sample(_plan_source(dataset_id))
+    steps = plan_store.get(dataset_id)
+    try:
+        step = await _offload(request, prepare_step, sample, steps, step, stage="infer")
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return sample, steps, step
+
+async def _preview(request: Request, sample: pd.DataFrame, steps: list) -> dict:
+    try:
+        return await _offload(request, preview_plan, sample, steps, dataset_rows=len(sample))
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def _record_step(request: Request, dataset_id: str, step: dict) -> dict:
+    """Validate a step on the plan's sample, append it, and preview the resulting plan on the sample."""
+    sample, steps, step = await _prepare_step(request, dataset_id, step)
+    preview = await _preview(request, sample, steps + [step])
+    steps = plan_store.append(dataset_id, step)
+    return {"plan": describe_plan(dataset_id, steps), "step": preview["steps"][-1], "preview": preview}
+
+async def _full_stats(request: Request, dataset_id: str, steps: list) -> dict:
+    # Exact counts need every row; the stored blob is streamed, an upload-only frame is scanned in one go.
+    source = _plan_source(dataset_id)
+    try:
+        return await _offload(request, plan_stats, steps, source["path"], source["df"], source["columns"],
+                              dataset_rows=None if source["df"] is None else len(source["df"]))
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def _materialize_plan(request: Request, dataset_id: str, steps: list) -> tuple:
+    """Cached output of the plan, executing it first if this (dataset hash, plan hash) has not been run."""
+    output = cache_path(dataset_id, steps)
+    result = materialized(output)
+    if result is not None:
+        return output, result, True
+    source = _plan_source(dataset_id)
+    try:
+        result = await _offload(request, materialize, steps, output, source["path"], source["df"], source["columns"],
+                                dataset_rows=None if source["df"] is None else len(source["df"]))
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return output, result, False
+
+
+
+@app.post("/eda/upload")
+async def eda_upload(request: Request, file: UploadFile = File(...)):
+    entry = await _parse_and_cache(request, await _read_upload(request, file), file.filename)
+    if not entry["cached"]:
+        # The ID would point at nothing: every follow-up request with it would 404.
+        raise HTTPException(status_code=413, detail=f"Parsed dataset ({entry['nbytes'] / 2**20:.0f} MB) exceeds the EDA cache "
+                                                    f"({dataset_cache.max_bytes / 2**20:.0f} MB). Save it with /upload/save_file "
+                                                    "and open it with /eda/open instead.")
+    return {"dataset_id": entry["dataset_id"], "filename": entry["filename"], "shape": entry["df"].shape}
+
+@app.post("/eda/open")
+async def eda_open(request: Request, filename: str = Form(...), columns: Optional[str] = Form(None)):
+    file_path = _dataset_file(filename)
+    selected = [c.strip() for c in columns.split(",")] if columns else None
+    meta = columnar_metadata(file_path)
+    dataset_id = meta["content_hash"] if selected is None else f"{meta['content_hash']}:{','.join(selected)}"
+    entry = dataset_cache.get(dataset_id)
+    if entry is None:
+        df, sep = await _offload(request, load_saved, file_path, selected, stage="parse")
+        entry = dataset_cache.put(dataset_id, df, filename, sep)
+    # Uncached, the ID still serves the plan endpoints (they read the stored file) but not the cached-frame ones.
+    return {"dataset_id": dataset_id, "filename": filename, "shape": entry["df"].shape, "cached": entry["cached"]}
+
+@app.get("/eda/cache-stats")
+def eda_cache_stats():
+    return {"datasets": dataset_cache.stats(), "decompositions": decomposition_cache.stats()}
+
+@app.get("/eda/pool-stats")
+def eda_pool_stats():
+    return eda_pool.stats()
+
 @app.post("/eda/basic")
-async def eda_basic(file: UploadFile = File(...)):
-    content = await file.read()
-    eda = TimeSeriesEDA(content, file.filename)
+async def eda_basic(request: Request, file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = Form(None)):
+    eda = await _load_eda(request, file, dataset_id)
     return eda.basic_info()
 
 @app.post("/eda/suggest-cast")
-async def suggest_cast(file: UploadFile = File(...), column: str = Form(...)):
-    content = await file.read()
-    eda = TimeSeriesEDA(content, file.filename)
-    return {"suggested_type": eda.suggest_cast_type(column)}
+async def suggest_cast(request: Request, column: str = Form(...), file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = Form(None)):
+    entry = await _load_entry(request, file, dataset_id)
+    return {"suggested_type": await _run_eda(request, entry, "suggest_cast_type", column, stage="infer")}
 
 @app.post("/eda/try-cast")
-async def try_cast(file: UploadFile = File(...), column: str = Form(...), dtype: str = Form(...)):
-    content = await file.read()
-    eda = TimeSeriesEDA(content, file.filename)
-    return eda.try_cast_column(column, dtype)
+async def try_cast(request: Request, column: str = Form(...), dtype: str = Form(...), file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = Form(None)):
+    dataset_id = await _plan_dataset_id(request, file, dataset_id)
+    try:
+        sample, steps, step = await _prepare_step(request, dataset_id, {"op": "cast", "column": column, "dtype": dtype})
+        # The sample only shapes the step; whether any value would be nulled out is decided on the full column.
+        stats = (await _full_stats(request, dataset_id, steps + [step]))["steps"][-1]
+    except HTTPException as e:
+        if e.status_code != 400:
+            raise
+        return {"success": False, "error": e.detail}
+    if stats["invalid"]:
+        # Like before, a cast that would null out values is not applied; drop-non-convertible records it with the drop.
+        return {
+            "success": False,
+            "message": f"{stats['invalid']} / {stats['rows_in']} rows cannot be converted to {dtype}.",
+            "convertible_rows": stats["rows_in"] - stats["invalid"],
+            "non_convertible_rows": stats["invalid"],
+            "plan": describe_plan(dataset_id, steps),
+        }
+    preview = await _preview(request, sample, steps + [step])
+    steps = plan_store.append(dataset_id, step)
+    return {"success": True, "message": f"Column {column} will be cast to {dtype}.", "plan": describe_plan(dataset_id, steps),
+            "step": stats, "preview": preview}
+
+async def _record_dropping_step(request: Request, dataset_id: str, step: dict) -> dict:
+    # Row counts come from executing the plan (cached, so a later download reuses it), not from the sample.
+    recorded = await _record_step(request, dataset_id, step)
+    _, result, _ = await _materialize_plan(request, dataset_id, recorded["plan"]["steps"])
+    stats = result["steps"][-1]
+    return {"dropped_rows": stats["rows_in"] - stats["rows_out"], "remaining_rows": result["rows"], **recorded, "step": stats}
 
 @app.post("/eda/drop-non-convertible")
-async def drop_non_convertible(file: UploadFile = File(...), column: str = Form(...), dtype: str = Form(...)):
-    content = await file.read()
-    eda = TimeSeriesEDA(content, file.filename)
-    return eda.drop_non_convertible_rows(column, dtype)
+async def drop_non_convertible(request: Request, column: str = Form(...), dtype: str = Form(...), file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = Form(None)):
+    dataset_id = await _plan_dataset_id(request, file, dataset_id)
+    return await _record_dropping_step(request, dataset_id, {"op": "cast", "column": column, "dtype": dtype, "drop_invalid": True})
 
 @app.post("/eda/preview-resample")
-async def preview_resample(file: UploadFile = File(...), datetime_col: str = Form(...), freq: str = Form(...)):
-    content = await file.read()
-    eda = TimeSeriesEDA(content, file.filename)
-    return eda.preview_resample(datetime_col, freq)
+async def preview_resample(request: Request, datetime_col: str = Form(...), freq: str = Form(...), agg: str = Form("mean"), rows: int = Form(5),
+                           group_cols: Optional[str] = Form(None), file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = Form(None)):
+    entry = await _load_entry(request, file, dataset_id)
+    groups = _column_list(group_cols)
+    _check_columns(entry["df"], datetime_col, *(groups or []))
+    return await _run_eda(request, entry, "preview_resample", datetime_col, freq, agg=agg, rows=rows, group_cols=groups)
+
+@app.post("/eda/regularity")
+async def regularity(request: Request, datetime_col: str = Form(...), group_cols: Optional[str] = Form(None), freq: Optional[str] = Form(None),
+                     file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = Form(None)):
+    entry = await _load_entry(request, file, dataset_id)
+    groups = _column_list(group_cols)
+    _check_columns(entry["df"], datetime_col, *(groups or []))
+    try:
+        return await _run_eda(request, entry, "regularity", datetime_col, groups, freq)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/eda/resample")
+async def resample_saved(request: Request, filename: str = Form(...), datetime_col: str = Form(...), freq: str = Form(...),
+                         agg: str = Form("mean"), columns: Optional[str] = Form(None), chunksize: int = Form(100000),
+                         group_cols: Optional[str] = Form(None)):
+    file_path = _dataset_file(filename)
+    selected = [c.strip() for c in columns.split(",")] if columns else None
+    try:
+        csv_bytes = await _offload(request, export_resampled_csv, file_path, datetime_col, freq, agg, selected, chunksize, _column_list(group_cols))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(io.BytesIO(csv_bytes), media_type="text/csv", headers={"Content-Disposition": f"attachment; filename=resampled_{filename}"})
 
 @app.post("/eda/seasonal-decompose")
-async def seasonal_decompose(file: UploadFile = File(...), datetime_col: str = Form(...), target_col: str = Form(...), freq: int = Form(...)):
-    content = await file.read()
-    eda = TimeSeriesEDA(content, file.filename)
-    img_base64 = eda.seasonal_decomposition(datetime_col, target_col, freq)
-    return {"image_base64": img_base64}
+async def seasonal_decompose(request: Request, datetime_col: str = Form(...), target_col: str = Form(...), freq: int = Form(...),
+                             mode: str = Form("image"), robust: bool = Form(True), max_points: int = Form(2000),
+                             group_cols: Optional[str] = Form(None), file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = Form(None)):
+    if mode not in ("image", "data", "arrow"):
+        raise HTTPException(status_code=400, detail=f"Unknown mode '{mode}'. Use 'image', 'data' or 'arrow'.")
+    entry = await _load_entry(request, file, dataset_id)
+    groups = _column_list(group_cols)
+    if groups:
+        return await _seasonal_decompose_groups(request, entry, datetime_col, target_col, freq, robust, groups, mode)
+    cache_key = f"{entry['dataset_id']}|{datetime_col}|{target_col}|{freq}|{robust}"
+    cached = decomposition_cache.get(cache_key)
+    if cached is None:
+        components = await _run_eda(request, entry, "seasonal_components", datetime_col, target_col, freq, robust=robust)
+        cached = decomposition_cache.put(cache_key, components)
+    components = cached["df"]
+
+    if mode == "image":
+        img_base64 = await _offload(request, render_components, components, stage="render")
+        return {"image_base64": img_base64}
+
+    with stage_timer(_endpoint(request), "serialize", rows=len(components)):
+        sampled = downsample_components(components, max_points)
+        if mode == "arrow":
+            return Response(content=to_arrow_ipc(sampled), media_type="application/vnd.apache.arrow.stream")
+        return {
+            "index": sampled.index.astype(str).tolist(),
+            "observed": sampled["observed"].tolist(),
+            "trend": sampled["trend"].tolist(),
+            "seasonal": sampled["seasonal"].tolist(),
+            "resid": sampled["resid"].tolist(),
+            "points": len(sampled),
+            "total_points": len(components),
+        }
+
+async def _seasonal_decompose_groups(request: Request, entry: dict, datetime_col: str, target_col: str, period: int,
+                                     robust: bool, groups: list, mode: str):
+    if mode == "image":
+        raise HTTPException(status_code=400, detail="Per-group decomposition returns 'data' or 'arrow', not an image.")
+    _check_columns(entry["df"], datetime_col, target_col, *groups)
+    cache_key = f"{entry['dataset_id']}|{datetime_col}|{target_col}|{period}|{robust}|{','.join(groups)}"
+    cached = decomposition_cache.get(cache_key)
+    if cached is None:
+        # Whole groups are spread over the pool so their STL fits run in parallel.
+        frame = entry["df"][groups + [datetime_col, target_col]]
+        parts = await asyncio.to_thread(split_groups, frame, groups, eda_pool.max_workers)
+        try:
+            results = await asyncio.gather(*(_offload(request, group_seasonal_components, part, datetime_col, target_col,
+                                                      groups, period, robust, dataset_rows=len(part)) for part in parts))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        components = pd.concat(results, ignore_index=True)
+        components.attrs["skipped"] = [key for part in results for key in part.attrs.get("skipped", [])]
+        cached = decomposition_cache.put(cache_key, components)
+    components = cached["df"]
+
+    with stage_timer(_endpoint(request), "serialize", rows=len(components)):
+        if mode == "arrow":
+            return Response(content=to_arrow_ipc(components.reset_index(drop=True)), media_type="application/vnd.apache.arrow.stream")
+        return {"skipped_groups": components.attrs.get("skipped", []), **long_format(components)}
+
+@app.post("/eda/group-stats")
+async def group_stats(request: Request, group_cols: str = Form(...), columns: Optional[str] = Form(None), datetime_col: Optional[str] = Form(None),
+                      file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = Form(None)):
+    entry = await _load_entry(request, file, dataset_id)
+    groups, selected = _column_list(group_cols), _column_list(columns)
+    if not groups:
+        raise HTTPException(status_code=400, detail="At least one group column is required.")
+    _check_columns(entry["df"], datetime_col, *groups, *(selected or []))
+    return await _run_eda(request, entry, "group_stats", groups, selected, datetime_col)
+
+def _metered(request: Request, chunks):
+    # Streamed bodies have no Content-Length for the middleware to record, so count them here.
+    endpoint, size = _endpoint(request), 0
+    try:
+        for chunk in chunks:
+            size += len(chunk)
+            yield chunk
+    finally:
+        observe_payload(endpoint, "response", size)
 
 @app.post("/eda/download-cleaned")
-async def download_cleaned(file: UploadFile = File(...)):
-    content = await file.read()
-    eda = TimeSeriesEDA(content, file.filename)
-    csv_bytes = eda.save_cleaned_csv()
-    return StreamingResponse(io.BytesIO(csv_bytes), media_type="text/csv", headers={"Content-Disposition": f"attachment; filename={file.filename}"})
+async def download_cleaned(request: Request, format: str = Form("csv"), compression: Optional[str] = Form(None),
+                           file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = Form(None)):
+    dataset_id = await _plan_dataset_id(request, file, dataset_id)
+    steps = plan_store.get(dataset_id)
+    source = _plan_source(dataset_id)
+    schema = None
+    if not steps and source["df"] is not None:
+        chunks = frame_chunks(source["df"])
+    else:
+        output, _, _ = await _materialize_plan(request, dataset_id, steps)
+        chunks = arrow_file_batches(output)
+    # Chunks are serialized and compressed as the client reads them; only one is held at a time.
+    try:
+        if format == "parquet" and source["df"] is not None and not steps:
+            # Fixed up front, so a chunk that would infer differently cannot fail the stream halfway.
+            schema = frame_schema(source["df"])
+        body = export_stream(chunks, format, compression or None, source["sep"], schema)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    media_type, name = export_media(source["filename"], format, compression or None)
+    return StreamingResponse(_metered(request, body), media_type=media_type, headers={"Content-Disposition": f"attachment; filename={name}"})
+
+class PlanStepRequest(BaseModel):
+    dataset_id: str
+    op: str
+    column: Optional[str] = None
+    dtype: Optional[str] = None
+    drop_invalid: bool = False
+    operator: Optional[str] = None
+    value: Optional[Any] = None
+
+@app.post("/eda/plan/steps")
+async def add_plan_step(request: Request, body: PlanStepRequest):
+    step = body.model_dump(exclude={"dataset_id"})
+    return await _record_step(request, body.dataset_id, step)
+
+@app.get("/eda/plan/{dataset_id}")
+def get_plan(dataset_id: str):
+    steps = plan_store.get(dataset_id)
+    return {**describe_plan(dataset_id, steps), "materialized": materialized(cache_path(dataset_id, steps))}
+
+@app.get("/eda/plan/{dataset_id}/preview")
+async def preview_plan_sample(request: Request, dataset_id: str, rows: int = 10):
+    sample = await _plan_sample(_plan_source(dataset_id))
+    steps = plan_store.get(dataset_id)
+    try:
+        preview = await _offload(request, preview_plan, sample, steps, rows, dataset_rows=len(sample))
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"plan": describe_plan(dataset_id, steps), "preview": preview}
+
+@app.post("/eda/plan/{dataset_id}/undo")
+def undo_plan_step(dataset_id: str):
+    return describe_plan(dataset_id, plan_store.undo(dataset_id))
+
+@app.delete("/eda/plan/{dataset_id}")
+def clear_plan(dataset_id: str):
+    plan_store.clear(dataset_id)
+    return describe_plan(dataset_id, [])
+
+@app.post("/eda/plan/{dataset_id}/materialize")
+async def materialize_plan(request: Request, dataset_id: str):
+    steps = plan_store.get(dataset_id)
+    _, result, cached = await _materialize_plan(request, dataset_id, steps)
+    return {"plan": describe_plan(dataset_id, steps), "cached": cached, **result}
 
 @app.post("/eda/schema")
-async def schema_overview(file: UploadFile = File(...)):
-    content = await file.read()
-    eda = TimeSeriesEDA(content, file.filename)
+async def schema_overview(request: Request, file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = Form(None)):
+    eda = await _load_eda(request, file, dataset_id)
     return eda.schema_overview()
 
+@app.post("/eda/profile")
+async def profile(request: Request, top_n: int = Form(5), sample_size: int = Form(10000), file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = Form(None)):
+    entry = await _load_entry(request, file, dataset_id)
+    return await _run_eda(request, entry, "profile", top_n=top_n, sample_size=sample_size, stage="infer")
+
 @app.post("/eda/suggest-types")
-async def suggest_types(file: UploadFile = File(...)):
-    content = await file.read()
-    eda = TimeSeriesEDA(content, file.filename)
-    return eda.suggest_types_for_all()
+async def suggest_types(request: Request, sample_size: int = Form(10000), full_scan: bool = Form(False), file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = Form(None)):
+    entry = await _load_entry(request, file, dataset_id)
+    return await _run_eda(request, entry, "suggest_types_for_all", sample_size=sample_size, full_scan=full_scan, stage="infer")
 
 @app.post("/eda/column-nulls")
-async def column_nulls(file: UploadFile = File(...), column: str = Form(...)):
-    content = await file.read()
-    eda = TimeSeriesEDA(content, file.filename)
-    return eda.column_nulls(column)
+async def column_nulls(request: Request, column: str = Form(...), group_cols: Optional[str] = Form(None), file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = Form(None)):
+    eda = await _load_eda(request, file, dataset_id)
+    groups = _column_list(group_cols)
+    _check_columns(eda.df, column, *(groups or []))
+    return eda.column_nulls(column, group_cols=groups)
 
 @app.post("/eda/drop-column")
-async def drop_column(file: UploadFile = File(...), column: str = Form(...)):
-    content = await file.read()
-    eda = TimeSeriesEDA(content, file.filename)
-    return eda.drop_column(column)
+async def drop_column(request: Request, column: str = Form(...), file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = Form(None)):
+    dataset_id = await _plan_dataset_id(request, file, dataset_id)
+    recorded = await _record_step(request, dataset_id, {"op": "drop_column", "column": column})
+    return {"dropped_column": column, **recorded}
 
 @app.post("/eda/drop-rows-with-null")
-async def drop_rows_with_null(file: UploadFile = File(...), column: str = Form(...)):
-    content = await file.read()
-    eda = TimeSeriesEDA(content, file.filename)
-    return eda.drop_rows_with_null(column)
+async def drop_rows_with_null(request: Request, column: str = Form(...), file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = Form(None)):
+    dataset_id = await _plan_dataset_id(request, file, dataset_id)
+    return await _record_dropping_step(request, dataset_id, {"op": "drop_nulls", "column": column})
 
 @app.post("/upload/check_file")
 async def check_file(filename: str = Form(...)):
-    file_path = DATA_DIR / filename
     return {
-        "exists": file_path.exists(),
-        "suggested_increment": str(increment_filename(file_path).name) if file_path.exists() else filename
+        "exists": dataset_store.exists(filename),
+        "suggested_increment": increment_filename(filename)
     }
 
 
 @app.post("/upload/save_file")
-async def upload_file(file: UploadFile = File(...), filename: str = Form(...), mode: str = Form("error")):
+async def upload_file(file: UploadFile = File(...), filename: str = Form(...), mode: str = Form("error"), max_mb: Optional[int] = Form(None)):
     try:
-        save_dataset(file.file, filename, mode=mode)
-        return {"status": "success", "filename": filename}
+        # Hashing, decoding, the columnar copy and cataloging all touch the whole file; keep them off the event loop.
+        saved_as = await asyncio.to_thread(save_dataset, file.file, filename, mode=mode, max_mb=max_mb)
+        return {"status": "success", "filename": saved_as}
     except FileExistsError as e:
         raise HTTPException(status_code=409, detail=str(e))
+    except FileTooLargeError as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/upload/increment_name")
 async def get_incremented_filename(filename: str = Form(...)):
-    file_path = DATA_DIR / filename
-    if file_path.exists():
-        return {"new_name": str(increment_filename(file_path).name)}
-    else:
-        return {"new_name": filename}
-    
+    return {"new_name": increment_filename(filename)}
+
 @app.get("/datasets/list")
-async def list_datasets():
-    files = [f.name for f in DATA_DIR.glob("*.csv")]
-    return JSONResponse(content={"datasets": files})
+def list_datasets(search: Optional[str] = None, column: Optional[str] = None, min_rows: Optional[int] = None,
+                  max_rows: Optional[int] = None, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                  grouped: Optional[bool] = None, sort: str = "name", order: str = "asc", limit: int = 100, offset: int = 0):
+    if not 1 <= limit <= 1000 or offset < 0:
+        raise HTTPException(status_code=400, detail="'limit' must be between 1 and 1000 and 'offset' non-negative.")
+    try:
+        page = dataset_store.catalog(search=search, column=column, min_rows=min_rows, max_rows=max_rows, date_from=date_from,
+                                     date_to=date_to, grouped=grouped, sort=sort, order=order, limit=limit, offset=offset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"datasets": [item["name"] for item in page["items"]], **page}
+
+@app.get("/datasets/info/{filename}")
+def dataset_info(filename: str):
+    page = dataset_store.catalog(name=filename, limit=1)
+    if not page["items"]:
+        raise HTTPException(status_code=404, detail=f"File '{filename}' not found.")
+    return page["items"][0]
+
+@app.get("/datasets/store-stats")
+def dataset_store_stats():
+    return dataset_store.stats()
+
+class PredictRequest(BaseModel):
+    model_name: str
+    inputs: Optional[List] = None
+    dataset_name: Optional[str] = None
+    columns: Optional[List[str]] = None
+
+
+@app.get("/models")
+def list_models():
+    models = model_registry.discover()
+    return {"models": list(models), "details": models}
+
+@app.get("/models/stats")
+def model_stats():
+    return {"registry": model_registry.stats(), "batcher": predict_batcher.stats()}
+
+@app.post("/predict")
+async def predict(body: PredictRequest):
+    try:
+        model = await predict_batcher.load(body.model_name)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    sample_shape = model_input_shape(model)
+    # Models trained here expect min-max scaled inputs; inputs and predictions stay in the data's units.
+    scaler = model_registry.scaler(body.model_name)
+    columns = body.columns or (scaler.columns if scaler is not None else None)
+
+    if body.inputs is not None:
+        inputs = np.asarray(body.inputs, dtype="float32")
+    elif body.dataset_name is not None:
+        file_path = _dataset_file(body.dataset_name)
+        df = read_columnar(file_path, columns=columns).select_dtypes("number")
+        columns = list(df.columns)
+        values = df.to_numpy(dtype="float32")
+        # Forecast from the most recent window (or row, for models without one).
+        inputs = values[-sample_shape[0]:] if len(sample_shape) > 1 else values[-1]
+    else:
+        raise HTTPException(status_code=400, detail="Either 'inputs' or 'dataset_name' is required.")
+
+    sample_size = int(np.prod([d for d in sample_shape if d is not None]))
+    if None in sample_shape or inputs.size % sample_size != 0:
+        raise HTTPException(status_code=400, detail=f"Inputs of size {inputs.size} do not fit model input shape {sample_shape}.")
+    inputs = inputs.reshape((-1,) + sample_shape)
+    if scaler is not None:
+        if len(columns) != inputs.shape[-1]:
+            raise HTTPException(status_code=400, detail=f"{len(columns)} columns do not fit model input shape {sample_shape}.")
+        try:
+            inputs = scaler.transform(inputs, columns)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    with INFERENCE_TIME_HISTOGRAM.time():
+        outputs = await predict_batcher.predict(body.model_name, inputs)
+    predictions = outputs.reshape(len(outputs), -1)
+    if scaler is not None:
+        shape = (len(predictions), -1, len(scaler.targets))
+        predictions = scaler.inverse_transform(predictions.reshape(shape), scaler.targets).reshape(len(predictions), -1)
+    return {
+        "model_name": body.model_name,
+        "predictions": predictions[0].tolist() if len(predictions) == 1 else predictions.tolist(),
+    }
+
+class ForecastRequest(BaseModel):
+    model_name: str
+    dataset_name: str
+    horizon: int = 12
+    columns: Optional[List[str]] = None
+    target_columns: Optional[List[str]] = None
+    group_col: Optional[str] = None
+    datetime_col: Optional[str] = None
+    evaluate: bool = False
+
+
+@app.post("/forecast")
+async def forecast(body: ForecastRequest):
+    try:
+        model = await predict_batcher.load(body.model_name)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    file_path = _dataset_file(body.dataset_name)
+    if body.horizon < 1:
+        raise HTTPException(status_code=400, detail="'horizon' must be at least 1.")
+
+    df = read_columnar(file_path)
+    # Models trained here default to the columns they were trained on and are fed scaled windows.
+    scaler = model_registry.scaler(body.model_name)
+    if body.columns is None and scaler is not None:
+        features, targets = scaler.columns, body.target_columns or scaler.targets
+    else:
+        features = body.columns or [c for c in df.select_dtypes("number").columns if c != body.group_col]
+        targets = body.target_columns or features
+    missing = [c for c in set(features) | set(targets) if c not in df.columns]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Columns not found: {', '.join(missing)}")
+    if not set(targets) <= set(features):
+        raise HTTPException(status_code=400, detail="'target_columns' must be a subset of 'columns'.")
+    if scaler is not None:
+        try:
+            scaler.index(features)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if body.datetime_col is not None:
+        df[body.datetime_col] = to_datetime(df[body.datetime_col])
+
+    sample_shape = model_input_shape(model)
+    # Windowed models take (window, features); no_window models take a single feature row.
+    window, flatten = (sample_shape[0], False) if len(sample_shape) > 1 else (1, True)
+    if None in sample_shape or int(np.prod(sample_shape)) != window * len(features):
+        raise HTTPException(status_code=400, detail=f"{len(features)} feature columns do not fit model input shape {sample_shape}.")
+
+    if body.evaluate:
+        # Hold out the last `horizon` rows of each series and forecast them from what precedes.
+        keys = [c for c in (body.group_col, body.datetime_col) if c is not None]
+        df = df.sort_values(keys, kind="stable") if keys else df
+        from_end = df.groupby(body.group_col).cumcount(ascending=False) if body.group_col else pd.Series(np.arange(len(df))[::-1], index=df.index)
+        held_out, df = df[from_end < body.horizon], df[from_end >= body.horizon]
+
+    history, groups, skipped = last_windows(df, body.group_col, body.datetime_col, features, window)
+    if not len(groups):
+        raise HTTPException(status_code=400, detail=f"No series has the {window} rows the model needs.")
+    target_idx = [features.index(c) for c in targets]
+    predict_fn = lambda x: model.predict(x, verbose=0)
+    if scaler is not None:
+        history = scaler.transform(history, features)
+    predictions = await predict_batcher.call(recursive_forecast, predict_fn, history, body.horizon, target_idx, None, flatten)
+    if scaler is not None:
+        predictions = scaler.inverse_transform(predictions, targets)
+
+    result = {
+        "model_name": body.model_name,
+        "horizon": body.horizon,
+        "targets": targets,
+        "groups": groups,
+        "skipped_groups": skipped,
+        "predictions": predictions.tolist(),
+    }
+    if body.evaluate:
+        if body.group_col:
+            held_out = held_out[held_out[body.group_col].isin(groups)]
+        actual = held_out[targets].to_numpy(dtype="float32").reshape(len(groups), -1, len(targets))
+        steps = actual.shape[1]
+        result["metrics"] = {"recursive": forecast_metrics(actual, predictions[:, :steps])}
+    return result
+
+class StatisticalForecastRequest(BaseModel):
+    dataset_name: str
+    target_col: str
+    model: str = "holt_winters"
+    group_col: Optional[str] = None
+    datetime_col: Optional[str] = None
+    exog_cols: Optional[List[str]] = None
+    horizon: int = 12
+    evaluate: bool = True
+    timeout: Optional[float] = 60
+    order: Optional[List[int]] = None
+    seasonal_order: Optional[List[int]] = None
+    trend: Optional[str] = "add"
+    seasonal: Optional[str] = "mul"
+    seasonal_periods: int = 52
+
+
+@app.post("/forecast/statistical")
+async def forecast_statistical(body: StatisticalForecastRequest):
+    file_path = _dataset_file(body.dataset_name)
+    if body.model not in STAT_MODELS:
+        raise HTTPException(status_code=400, detail=f"Unknown model '{body.model}'. Choose from {', '.join(STAT_MODELS)}.")
+    if body.horizon < 1:
+        raise HTTPException(status_code=400, detail="'horizon' must be at least 1.")
+    columns = [c for c in [body.target_col, body.group_col, body.datetime_col, *(body.exog_cols or [])] if c]
+    options = body.model_dump(include={"trend", "seasonal", "seasonal_periods"})
+    options.update({k: v for k, v in body.model_dump(include={"order", "seasonal_order"}).items() if v is not None})
+    try:
+        df = read_columnar(file_path, columns=list(dict.fromkeys(columns)))
+        # Fits run in their own process pool; this thread only packs the panel and gathers results.
+        return await asyncio.to_thread(forecast_groups, df, body.target_col, body.model, body.group_col, body.datetime_col,
+                                       body.exog_cols, body.horizon, body.evaluate, body.timeout, options)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+class TrainRequest(BaseModel):
+    model_name: str
+    dataset_name: str
+    strategy: Optional[str] = None
+    horizon: Optional[int] = None
+    epochs: int = 20
+    batch_size: int = 32
+    test_size: float = 0.2
+    mmap: bool = False
+    columns: Optional[List[str]] = None
+    target_columns: Optional[List[str]] = None
+    group_col: Optional[str] = None
+    datetime_col: Optional[str] = None
+
+
+@app.post("/train", status_code=202)
+def train(body: TrainRequest):
+    # model_name is either an architecture ("CNN") or a registry name ("CNN/window_12/recursive/data").
+    architecture, _, strategy = body.model_name.partition("/")
+    strategy = body.strategy or strategy or "direct_12"
+    if architecture not in ARCHITECTURES:
+        raise HTTPException(status_code=400, detail=f"Unknown architecture '{architecture}'. Choose from {', '.join(ARCHITECTURES)}.")
+    try:
+        parse_strategy(strategy)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    _dataset_file(body.dataset_name)
+    params = body.model_dump(exclude={"model_name", "strategy"})
+    job = job_scheduler.submit("train", dict(params, architecture=architecture, strategy=strategy))
+    return {"job_id": job["id"], "status": job["status"], "message": f"Training job queued for {architecture}/{strategy}."}
+
+class BacktestRequest(BaseModel):
+    dataset_name: str
+    models: Optional[List[str]] = None
+    horizon: int = 12
+    window: int = 12
+    n_origins: int = 10
+    step: Optional[int] = None
+    columns: Optional[List[str]] = None
+    target_columns: Optional[List[str]] = None
+    group_col: Optional[str] = None
+    datetime_col: Optional[str] = None
+    dtw_window: Optional[int] = None
+    workers: Optional[int] = None
+
+
+@app.post("/backtest", status_code=202)
+def backtest(body: BacktestRequest):
+    _dataset_file(body.dataset_name)
+    known = model_registry.discover()
+    unknown = [m for m in body.models or [] if m not in known]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Models not found: {', '.join(unknown)}")
+    if min(body.horizon, body.window, body.n_origins) < 1:
+        raise HTTPException(status_code=400, detail="'horizon', 'window' and 'n_origins' must be at least 1.")
+    params = body.model_dump()
+    params["step"] = body.step or body.horizon
+    job = job_scheduler.submit("backtest", params)
+    return {"job_id": job["id"], "status": job["status"], "message": f"Backtest queued for {len(body.models or known)} models."}
+
+@app.get("/train/jobs")
+def list_jobs(status: Optional[str] = None, limit: int = 100):
+    return {"jobs": job_scheduler.store.list(status=status, limit=limit), "scheduler": job_scheduler.stats()}
+
+@app.get("/train/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_scheduler.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    return job
+
+@app.post("/train/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    job = job_scheduler.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    return job
+
+DATASET_FORMATS = {"csv": "text/csv", "json": "application/json", "arrow": "application/vnd.apache.arrow.stream"}
+
+def _etag(content_hash: str, *params) -> str:
+    # Stored content never changes under a hash, so the hash plus the request shape is a strong validator.
+    if not params:
+        return f'"{content_hash}"'
+    return f'"{content_hash[:32]}-{hashlib.sha256(repr(params).encode()).hexdigest()[:16]}"'
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+@app.get("/dataset/{filename}")
+async def download_dataset(request: Request, filename: str, columns: Optional[str] = None, offset: int = 0,
+                           limit: Optional[int] = None, format: str = "csv"):
+    file_path = _dataset_file(filename)
+    if format not in DATASET_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{format}'. Use {', '.join(DATASET_FORMATS)}.")
+    if offset < 0 or (limit is not None and limit < 0):
+        raise HTTPException(status_code=400, detail="'offset' and 'limit' must be non-negative.")
+    selected = _column_list(columns)
+    content_hash = dataset_store.resolve(filename)
+    whole_file = selected is None and offset == 0 and limit is None and format == "csv"
+    etag = _etag(content_hash) if whole_file else _etag(content_hash, selected, offset, limit, format)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    if whole_file:
+        # FileResponse answers Range / If-Range against this ETag, so interrupted downloads resume.
+        return FileResponse(file_path, media_type="text/csv", filename=filename, headers=headers)
+
+    try:
+        body, rows, total = await _offload(request, export_slice, file_path, selected, offset, limit, format, stage="serialize")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers["X-Row-Range"] = f"{offset}-{offset + rows}"
+    if total is not None:
+        headers["X-Total-Rows"] = str(total)
+    if format == "json":
+        return JSONResponse(content={"offset": offset, "rows": rows, "total_rows": total, **jsonable_encoder(body)}, headers=headers)
+    if format == "csv":
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return Response(content=body, media_type=DATASET_FORMATS[format], headers=headers)
+
+@app.get("/dataset/{filename}/summary")
+async def dataset_summary_stats(request: Request, filename: str, columns: Optional[str] = None):
+    file_path = _dataset_file(filename)
+    selected = _column_list(columns)
+    etag = _etag(dataset_store.resolve(filename), "summary", selected)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    try:
+        summary = await _offload(request, dataset_summary, file_path, selected)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONResponse(content=summary, headers=headers)
 
 @app.delete("/datasets/delete")
 async def delete_file(filename: str = Form(...)):
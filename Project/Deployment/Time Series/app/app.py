@@ -36,11 +36,19 @@ modal_component = components.declare_component("modal_component", url="http://lo
 
 @st.cache_data(show_spinner=False)
 def fetch_models():
-    return ["Model_A.pkl", "Model_B.pkl", "Mock_Model_C.pkl"]
+    try:
+        resp = requests.get(f"{FASTAPI_URL}/models")
+        return resp.json().get("models", [])
+    except:
+        return []
 
 @st.cache_data(show_spinner=False)
 def fetch_datasets():
-    return ["dataset1.csv", "dataset2.csv", "dummy_dataset.csv"]
+    try:
+        resp = requests.get(f"{FASTAPI_URL}/datasets/list", params={"limit": 1000, "sort": "created_at", "order": "desc"})
+        return resp.json().get("datasets", [])
+    except:
+        return []
 
 
 
@@ -109,7 +117,7 @@ def upload_file_to_server(upload_file, filename, mode="error"):
             data={"filename": filename, "mode": mode}
         )
         if save_resp.ok:
-            st.success(f"✅ File uploaded as `{filename}`")
+            st.success(f"✅ File uploaded as `{save_resp.json()['filename']}`")
         else:
             st.error(f"❌ Upload failed: {save_resp.text}")
 
@@ -135,6 +143,13 @@ with st.sidebar:
     st.header("⚙️ Configuration")
     selected_model = st.selectbox("Select Model", models or ["No models found"])
     selected_dataset = st.selectbox("Select Dataset", datasets or ["No datasets found"])
+    if datasets:
+        try:
+            info = requests.get(f"{FASTAPI_URL}/datasets/info/{selected_dataset}", timeout=10).json()
+            groups = f" · {info['group_count']} {info['group_col']} series" if info.get("group_col") else ""
+            st.caption(f"{info['rows']:,} rows · {info['n_columns']} columns · {info['date_min']} → {info['date_max']}{groups}")
+        except Exception:
+            pass
 
 # ----- TABS -----
 tab0, tab1, tab2, tab3 = st.tabs(["📈 EDA", "🛠 Train Model", "🔮 Predict & Visualize", "📊 Metrics"])
@@ -150,29 +165,36 @@ with tab0:
             if st.button(f"📂 Load Dataset `{selected_dataset}`"):
                 with st.spinner(f"Loading dataset `{selected_dataset}`..."):
                     try:
-                        response = requests.get(f"{FASTAPI_URL}/dataset/{selected_dataset}", timeout=30)
+                        # Only a preview slice and server-side statistics cross the wire, not the whole file.
+                        response = requests.get(f"{FASTAPI_URL}/dataset/{selected_dataset}",
+                                                params={"limit": 5, "format": "json"}, timeout=30)
                         if response.ok:
-                            csv_data = response.text
-                            df = pd.read_csv(StringIO(csv_data))
+                            preview = response.json()
+                            df = pd.DataFrame(preview["data"], columns=preview["columns"])
                             st.success(f"Dataset `{selected_dataset}` loaded successfully.")
-                            st.write("### Preview of Dataset")
-                            st.dataframe(df.head())
+                            st.write(f"### Preview of Dataset ({preview['total_rows']:,} rows)" if preview["total_rows"] else "### Preview of Dataset")
+                            st.dataframe(df)
 
+                            summary = requests.get(f"{FASTAPI_URL}/dataset/{selected_dataset}/summary", timeout=60).json()
                             st.write("### Summary Statistics")
-                            st.dataframe(df.describe())
-
-                            if "date" in df.columns:
-                                df['date'] = pd.to_datetime(df['date'])
-                                df = df.sort_values("date")
+                            st.dataframe(pd.DataFrame(summary["columns"]))
 
-                                numeric_cols = df.select_dtypes(include=['int', 'float']).columns.tolist()
+                            info = requests.get(f"{FASTAPI_URL}/datasets/info/{selected_dataset}", timeout=10).json()
+                            date_col = info.get("datetime_col")
+                            if date_col:
+                                numeric_cols = [c["name"] for c in info["columns"]
+                                                if c["type"] in ("numeric", "integer") and c["name"] not in (date_col, info.get("group_col"))]
                                 if numeric_cols:
                                     value_col = st.selectbox("Select numeric column to plot:", numeric_cols)
-                                    st.line_chart(df.set_index("date")[value_col])
+                                    series = requests.get(f"{FASTAPI_URL}/dataset/{selected_dataset}",
+                                                          params={"columns": f"{date_col},{value_col}", "format": "csv"}, timeout=60)
+                                    plot_df = pd.read_csv(StringIO(series.text))
+                                    plot_df[date_col] = pd.to_datetime(plot_df[date_col])
+                                    st.line_chart(plot_df.groupby(date_col)[value_col].mean())
                                 else:
-                                    st.warning("No numeric columns found to plot against 'date'.")
+                                    st.warning(f"No numeric columns found to plot against '{date_col}'.")
                             else:
-                                st.warning("Expected column 'date' not found in dataset.")
+                                st.warning("No datetime column found in dataset.")
 
                             # if "date" in df.columns and "value" in df.columns:
                             #     df['date'] = pd.to_datetime(df['date'])
@@ -281,10 +303,20 @@ with tab0:
         
         
         with subcol2:
-            uploaded_file = st.file_uploader("Choose a CSV or TSV file", type=["csv", "tsv"],label_visibility="collapsed")
+            uploaded_file = st.file_uploader("Choose a CSV/TSV (optionally .gz or .zst), Parquet or Arrow file", type=["csv", "tsv", "txt", "gz", "zst", "parquet", "arrow", "feather", "ipc"], label_visibility="collapsed")
         if uploaded_file:
             file_bytes = uploaded_file.getvalue()
             file_name = uploaded_file.name
+
+            # Upload once; EDA calls below reuse the server-side parsed copy by ID.
+            if st.session_state.get("eda_upload_key") != (file_name, len(file_bytes)):
+                upload_resp = requests.post(f"{FASTAPI_URL}/eda/upload", files={"file": (file_name, file_bytes)})
+                if upload_resp.ok:
+                    st.session_state.eda_dataset_id = upload_resp.json()["dataset_id"]
+                    st.session_state.eda_upload_key = (file_name, len(file_bytes))
+                else:
+                    st.error(f"Error uploading file for analysis: {upload_resp.text}")
+            dataset_id = st.session_state.get("eda_dataset_id")
             # ----- Dataset Save Controls -----
             st.markdown("#### 💾 Save Dataset")
             save_name = st.text_input("File Name to Save", file_name)
@@ -305,24 +337,28 @@ with tab0:
 
             if st.button("🔎 Inspect Uploaded Dataset"):
                 with st.spinner("Analyzing uploaded dataset..."):
-                    resp = requests.post(f"{FASTAPI_URL}/eda/schema", files={"file": file_bytes})
+                    resp = requests.post(f"{FASTAPI_URL}/eda/profile", data={"dataset_id": dataset_id})
                     if resp.ok:
-                        schema = resp.json()
+                        profile = resp.json()
+                        columns = profile["columns"]
 
                         st.write("### Schema Overview")
-                        st.json(schema)
+                        st.json({
+                            "shape": profile["shape"],
+                            "memory_bytes": profile["memory_bytes"],
+                            "dtypes": {name: info["dtype"] for name, info in columns.items()},
+                            "datetime": profile["datetime"],
+                        })
 
                         if st.checkbox("Show Null Values Table"):
-                            null_table = pd.DataFrame.from_dict(schema['nulls'], orient='index', columns=['Null Count'])
+                            null_table = pd.DataFrame.from_dict({name: info["nulls"] for name, info in columns.items()}, orient='index', columns=['Null Count'])
                             st.dataframe(null_table)
 
-                        st.write("### Column Type Suggestions (Optional)")
-                        if st.button("Suggest Types for Columns"):
-                            suggest_resp = requests.post(f"{FASTAPI_URL}/eda/suggest-types", files={"file": file_bytes})
-                            if suggest_resp.ok:
-                                st.json(suggest_resp.json())
-                            else:
-                                st.error("Failed to fetch type suggestions.")
+                        st.write("### Column Type Suggestions")
+                        st.dataframe(pd.DataFrame.from_dict({name: info["inferred"] for name, info in columns.items()}, orient='index'))
+
+                        with st.expander("Top Values"):
+                            st.json({name: info["top"] for name, info in columns.items()})
                     else:
                         st.error(f"Error analyzing file: {resp.text}")
 
@@ -334,12 +370,11 @@ with tab0:
             col1, col2 = st.columns(2)
 
             with col1:
-                new_dtype = st.selectbox("Type to Cast", ["int64", "float64", "datetime64[ns]", "object", "category"])
+                new_dtype = st.selectbox("Type to Cast", ["numeric", "datetime", "int64", "float64", "string", "category"])
                 if st.button("Attempt Type Cast"):
                     resp = requests.post(
-                        f"{FASTAPI_URL}/eda/try-cast-column",
-                        files={"file": file_bytes},
-                        data={"column": selected_column, "dtype": new_dtype}
+                        f"{FASTAPI_URL}/eda/try-cast",
+                        data={"dataset_id": dataset_id, "column": selected_column, "dtype": new_dtype}
                     )
                     if resp.ok:
                         result = resp.json()
@@ -347,9 +382,8 @@ with tab0:
                         if not result.get("success") and result.get("non_convertible_rows", 0) > 0:
                             if st.button("Drop Non-Convertible Rows"):
                                 drop_resp = requests.post(
-                                    f"{FASTAPI_URL}/eda/drop-non-convertible-rows",
-                                    files={"file": file_bytes},
-                                    data={"column": selected_column, "dtype": new_dtype}
+                                    f"{FASTAPI_URL}/eda/drop-non-convertible",
+                                    data={"dataset_id": dataset_id, "column": selected_column, "dtype": new_dtype}
                                 )
                                 st.json(drop_resp.json())
                     else:
@@ -359,8 +393,7 @@ with tab0:
                 if st.button("Drop Column"):
                     resp = requests.post(
                         f"{FASTAPI_URL}/eda/drop-column",
-                        files={"file": file_bytes},
-                        data={"column": selected_column}
+                        data={"dataset_id": dataset_id, "column": selected_column}
                     )
                     if resp.ok:
                         st.json(resp.json())
@@ -370,8 +403,7 @@ with tab0:
                 if st.button("Drop Rows with Null in Column"):
                     resp = requests.post(
                         f"{FASTAPI_URL}/eda/drop-rows-with-null",
-                        files={"file": file_bytes},
-                        data={"column": selected_column}
+                        data={"dataset_id": dataset_id, "column": selected_column}
                     )
                     if resp.ok:
                         st.json(resp.json())
@@ -380,11 +412,17 @@ with tab0:
 
             st.markdown("---")
             st.write("### 📥 Download Cleaned Dataset")
+            export_format = st.selectbox("Export Format", ["csv", "parquet"])
+            export_compression = st.selectbox("Compression", ["none", "gzip", "zstd"])
             if st.button("Download Cleaned File"):
-                resp = requests.post(f"{FASTAPI_URL}/eda/save-cleaned", files={"file": file_bytes})
+                export_data = {"dataset_id": dataset_id, "format": export_format}
+                if export_compression != "none":
+                    export_data["compression"] = export_compression
+                resp = requests.post(f"{FASTAPI_URL}/eda/download-cleaned", data=export_data)
                 if resp.ok:
+                    export_name = resp.headers.get("content-disposition", "").partition("filename=")[2] or uploaded_file.name
                     b64 = base64.b64encode(resp.content).decode()
-                    href = f'<a href="data:file/csv;base64,{b64}" download="cleaned_{uploaded_file.name}">Download CSV</a>'
+                    href = f'<a href="data:{resp.headers["content-type"]};base64,{b64}" download="cleaned_{export_name}">Download {export_name}</a>'
                     st.markdown(href, unsafe_allow_html=True)
                 else:
                     st.error("Could not generate download file.")
@@ -395,19 +433,36 @@ with tab1:
     st.subheader("Train a New Model on Selected Dataset")
 
     if st.button("Start Training"):
-        with st.spinner("Training in progress..."):
-            try:
-                response = requests.post(
-                    f"{FASTAPI_URL}/train",
-                    json={"model_name": selected_model, "dataset_name": selected_dataset},
-                    timeout=300  # You can adjust depending on training time
-                )
-                if response.ok:
-                    st.success(response.json().get("message", "Training completed successfully."))
-                else:
-                    st.error(f"Training failed: {response.text}")
-            except Exception as e:
-                st.error(f"Error: {e}")
+        try:
+            response = requests.post(
+                f"{FASTAPI_URL}/train",
+                json={"model_name": selected_model, "dataset_name": selected_dataset},
+                timeout=10
+            )
+            if response.ok:
+                st.session_state.train_job_id = response.json()["job_id"]
+                st.success(response.json().get("message", "Training job queued."))
+            else:
+                st.error(f"Training failed: {response.text}")
+        except Exception as e:
+            st.error(f"Error: {e}")
+
+    job_id = st.session_state.get("train_job_id")
+    if job_id:
+        job = requests.get(f"{FASTAPI_URL}/train/jobs/{job_id}", timeout=10).json()
+        st.write(f"Job `{job_id}`: **{job.get('status')}** {job.get('message') or ''}")
+        st.progress(float(job.get("progress") or 0.0))
+        if job.get("status") == "completed":
+            st.json(job.get("result", {}).get("metrics", {}))
+        elif job.get("status") == "failed":
+            st.error(job.get("error"))
+        col_refresh, col_cancel = st.columns(2)
+        with col_refresh:
+            st.button("Refresh Status")
+        with col_cancel:
+            if job.get("status") in ("queued", "running") and st.button("Cancel Training"):
+                requests.post(f"{FASTAPI_URL}/train/jobs/{job_id}/cancel", timeout=10)
+                st.rerun()
 
 # ----- TAB 2: Predict & Visualize -----
 with tab2:
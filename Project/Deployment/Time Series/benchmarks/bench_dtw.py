@@ -0,0 +1,56 @@
+"""Timing for src/dtw.py at 1k/10k/100k points.
+
+Run from the "Time Series" directory:  python -m benchmarks.bench_dtw [--output results.json]
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from src.dtw import dtw_batch, dtw_distance, dtw_nearest, dtw_reference
+
+SIZES = (1_000, 10_000, 100_000)
+
+
+def _timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def run(sizes=SIZES, window_fraction=0.01, batch=32, seed=0) -> list:
+    rng = np.random.default_rng(seed)
+    rows = []
+    for n in sizes:
+        x, y = rng.normal(size=n).cumsum(), rng.normal(size=n).cumsum()
+        window = max(1, int(n * window_fraction))
+        row = {"n": n, "window": window}
+        row["banded"], row["banded_s"] = _timed(dtw_distance, x, y, window)
+        # Unconstrained is quadratic in time; only run it where it finishes in seconds.
+        if n <= 10_000:
+            row["unconstrained"], row["unconstrained_s"] = _timed(dtw_distance, x, y, None)
+        if n <= 1_000:
+            row["reference"], row["reference_s"] = _timed(dtw_reference, x, y)
+            row["agrees"] = bool(np.isclose(row["reference"], row["unconstrained"], rtol=1e-9))
+        xs, ys = rng.normal(size=(batch, n)).cumsum(axis=1), rng.normal(size=(batch, n)).cumsum(axis=1)
+        _, row[f"batch{batch}_banded_s"] = _timed(dtw_batch, xs, ys, window)
+        if n <= 10_000:
+            candidates = rng.normal(size=(256, n)).cumsum(axis=1)
+            nearest, row["nearest256_s"] = _timed(dtw_nearest, x, candidates, window)
+            row["nearest256_pruned"] = nearest["pruned"]
+        rows.append(row)
+        print(json.dumps(row))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--window-fraction", type=float, default=0.01)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    results = run(args.sizes, args.window_fraction)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,189 @@
+"""Wall time and peak memory of every TimeSeriesEDA step on synthetic panels.
+
+Run from the "Time Series" directory:
+
+    python -m benchmarks.bench_eda --sizes 10k 1M --output benchmarks/results/eda.json
+    python -m benchmarks.bench_eda --sizes 10k --baseline benchmarks/results/eda.json
+
+Panels follow the project_dataset.csv schema (143 weekly dates per Dept) and
+are generated from a fixed seed, so runs on the same machine are comparable.
+With --baseline, steps slower than the baseline by more than --threshold are
+reported and the exit code is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.eda import TimeSeriesEDA
+
+DATA_DIR = Path(__file__).resolve().parent / ".data"
+WEEKS = 143
+SIZES = {"10k": 10_000, "1M": 1_000_000, "10M": 10_000_000}
+DEFAULT_SIZES = ["10k", "1M"]
+
+
+def first_dept(df: pd.DataFrame) -> pd.DataFrame:
+    return df[df["Dept"] == df["Dept"].iloc[0]].reset_index(drop=True)
+
+
+# (name, method, args, frame); each step runs on a fresh copy since several methods mutate the frame.
+# STL needs one series, so decomposition runs on a single Dept rather than the mixed panel.
+STEPS = [
+    ("basic_info", "basic_info", (), None),
+    ("suggest_cast_type", "suggest_cast_type", ("Date",), None),
+    ("try_cast_column", "try_cast_column", ("Date", "datetime"), None),
+    ("preview_resample", "preview_resample", ("Date", "W"), None),
+    ("seasonal_decomposition", "seasonal_decomposition", ("Date", "Weekly_Sales", 52), first_dept),
+    ("save_cleaned_csv", "save_cleaned_csv", (), None),
+]
+
+
+def parse_size(label: str) -> int:
+    if label in SIZES:
+        return SIZES[label]
+    scale = {"k": 1_000, "M": 1_000_000}.get(label[-1], 1)
+    return int(float(label.rstrip("kM")) * scale)
+
+
+def synthetic_panel(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    depts = -(-rows // WEEKS)
+    week = np.tile(np.arange(WEEKS), depts)[:rows]
+    dept = np.repeat(np.arange(1, depts + 1), WEEKS)[:rows]
+    dates = pd.date_range("2010-02-05", periods=WEEKS, freq="W-FRI")
+    level = rng.lognormal(9.5, 1.0, size=depts)[dept - 1]
+    season = 1 + 0.25 * np.sin(2 * np.pi * week / 52)
+    # Calendar-level regressors are shared by every Dept in a week, as in the real data.
+    temperature = 68 + 14 * np.sin(2 * np.pi * (np.arange(WEEKS) - 10) / 52) + rng.normal(0, 2, WEEKS)
+    fuel = 2.5 + np.cumsum(rng.normal(0.01, 0.03, WEEKS))
+    cpi = 210 + np.cumsum(rng.normal(0.09, 0.05, WEEKS))
+    unemployment = 8.1 - np.cumsum(np.abs(rng.normal(0.01, 0.01, WEEKS)))
+    return pd.DataFrame({
+        "Date": dates.strftime("%Y-%m-%d")[week],
+        "IsHoliday": (rng.random(WEEKS) < 0.07).astype(int)[week],
+        "Dept": dept.astype(float),
+        "Weekly_Sales": np.round(level * season * rng.normal(1, 0.1, rows), 2),
+        "Temperature": np.round(temperature[week], 2),
+        "Fuel_Price": np.round(fuel[week], 3),
+        "CPI": cpi[week],
+        "Unemployment": np.round(unemployment[week], 3),
+    })
+
+
+def dataset_bytes(rows: int, seed: int = 0) -> bytes:
+    path = DATA_DIR / f"panel_{rows}_{seed}.csv"
+    if not path.exists():
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".part")
+        synthetic_panel(rows, seed).to_csv(tmp, index=False)
+        os.replace(tmp, path)
+    return path.read_bytes()
+
+
+def _measure(fn, repeat: int) -> dict:
+    # Timing runs without tracemalloc (it slows allocation-heavy code); one extra run records the peak.
+    walls = []
+    for _ in range(repeat):
+        run = fn()
+        started = time.perf_counter()
+        run()
+        walls.append(time.perf_counter() - started)
+    run = fn()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"wall_s": statistics.median(walls), "runs_s": walls, "peak_mb": peak / 1e6}
+
+
+def bench_size(rows: int, repeat: int, steps: list, seed: int = 0) -> dict:
+    content = dataset_bytes(rows, seed)
+    results = {"read": _measure(lambda: lambda: TimeSeriesEDA(content, "bench.csv"), repeat)}
+    base = TimeSeriesEDA(content, "bench.csv")
+    for name, method, args, frame in STEPS:
+        if name not in steps:
+            continue
+
+        def prepare(method=method, args=args, frame=frame):
+            # Copying (and subsetting) the frame is setup, not part of the measured step.
+            df = frame(base.df) if frame else base.df
+            eda = TimeSeriesEDA.from_dataframe(df, base.filename, base.sep)
+            return lambda: getattr(eda, method)(*args)
+
+        results[name] = _measure(prepare, repeat)
+    return results
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_delta: float = 0.005) -> list:
+    regressions = []
+    for size, steps in current["results"].items():
+        for step, result in steps.items():
+            before = baseline.get("results", {}).get(size, {}).get(step)
+            if before is None:
+                continue
+            ratio = result["wall_s"] / before["wall_s"] if before["wall_s"] else float("inf")
+            result["baseline_wall_s"] = before["wall_s"]
+            result["ratio"] = ratio
+            if ratio > 1 + threshold and result["wall_s"] - before["wall_s"] > min_delta:
+                regressions.append({"size": size, "step": step, "baseline_s": before["wall_s"],
+                                    "current_s": result["wall_s"], "ratio": ratio})
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--steps", nargs="+", default=[name for name, *_ in STEPS])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+    for label in args.sizes:
+        rows = parse_size(label)
+        report["results"][label] = bench_size(rows, args.repeat, args.steps, args.seed)
+        for step, result in report["results"][label].items():
+            print(f"{label:>5} {step:<24} {result['wall_s'] * 1000:10.1f} ms {result['peak_mb']:10.1f} MB")
+
+    status = 0
+    if args.baseline:
+        regressions = compare(report, json.loads(Path(args.baseline).read_text()), args.threshold)
+        report["regressions"] = regressions
+        for r in regressions:
+            print(f"REGRESSION {r['size']} {r['step']}: {r['baseline_s'] * 1000:.1f} ms -> {r['current_s'] * 1000:.1f} ms "
+                  f"({r['ratio']:.2f}x)")
+        status = 1 if regressions else 0
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
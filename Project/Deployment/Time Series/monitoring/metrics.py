@@ -1,36 +1,53 @@
-from prometheus_client import Histogram, Counter, Gauge, Summary
+from contextlib import contextmanager
+from prometheus_client import Histogram, Counter, Gauge, Summary, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+import logging
 import psutil
 import time
 import threading
 
+logger = logging.getLogger(__name__)
+
+STAGES = ("decode", "parse", "infer", "compute", "render", "serialize")
+BYTE_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9)
+
 INFERENCE_TIME_HISTOGRAM = Histogram(
     "inference_latency_seconds",
     "Time spent processing prediction requests"
 )
-MODEL_PREDICTION_TYPES = Counter(
-    "model_prediction_counts", 
-    "Count of predictions by gesture type", 
-    ["gesture"]
-)   
-
-
-
-INVALID_LANDMARK_ERRORS = Counter(
-    "invalid_landmark_errors",                               
-    "Count of invalid landmark submissions", 
-    ["error_type"]
-)
-
-
-
 
 REQUEST_COUNT = Counter("api_request_count", "Total number of API requests")
-REQUEST_ERRORS = Counter("api_request_errors", "Number of failed API predictions")
+REQUEST_ERRORS = Counter("api_request_errors", "Number of API requests answered with a 5xx status")
 REQUEST_LATENCY = Summary(
     "api_request_latency_seconds",
     "End-to-end API request processing time"
 )
 
+STAGE_SECONDS = Histogram(
+    "eda_stage_seconds",
+    "Time spent in each stage of a request",
+    ["endpoint", "stage"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+POOL_WAIT_SECONDS = Histogram(
+    "executor_wait_seconds",
+    "Time a pooled task spent queued or in transfer, outside its function",
+    ["endpoint"],
+)
+PAYLOAD_BYTES = Histogram(
+    "payload_bytes",
+    "Request and response body sizes",
+    ["endpoint", "direction"],
+    buckets=BYTE_BUCKETS,
+)
+ROWS_PROCESSED = Counter("rows_processed_total", "Dataset rows processed", ["endpoint"])
+ROWS_PER_SECOND = Histogram(
+    "rows_per_second",
+    "Rows processed per second of compute",
+    ["endpoint"],
+    buckets=(1e3, 1e4, 1e5, 1e6, 1e7, 1e8),
+)
+
 CPU_USAGE = Gauge("cpu_usage_percent", "CPU usage percentage")
 RAM_USAGE = Gauge("ram_usage_percent", "RAM usage percentage")
 
@@ -39,25 +56,115 @@ APP_UPTIME = Gauge("app_uptime_seconds", "Application uptime in seconds", ["stat
 
 START_TIME = time.time()
 LAST_ACTIVE_TIME = time.time()
+COLLECT_INTERVAL = 5
+
+_collector_started = False
+_runtime_collector = None
+
+
+def mark_active():
+    global LAST_ACTIVE_TIME
+    LAST_ACTIVE_TIME = time.time()
+
+
+def observe_stage(endpoint: str, stage: str, seconds: float, rows: int = None):
+    STAGE_SECONDS.labels(endpoint, stage).observe(seconds)
+    if rows:
+        ROWS_PROCESSED.labels(endpoint).inc(rows)
+        if seconds > 0:
+            ROWS_PER_SECOND.labels(endpoint).observe(rows / seconds)
+
+
+@contextmanager
+def stage_timer(endpoint: str, stage: str, rows: int = None):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(endpoint, stage, time.perf_counter() - started, rows)
+
+
+def observe_payload(endpoint: str, direction: str, size):
+    if size is not None:
+        PAYLOAD_BYTES.labels(endpoint, direction).observe(int(size))
+
+
+class RuntimeStatsCollector:
+    """Reads cache and executor stats at scrape time, so the hot path pays nothing for them.
+
+    ``caches`` and ``pools`` map a label to a zero-argument callable returning
+    the component's ``stats()`` dict.
+    """
+
+    def __init__(self, caches: dict, pools: dict):
+        self.caches = caches
+        self.pools = pools
+
+    def collect(self):
+        counters = {key: CounterMetricFamily(f"cache_{key}", f"Cache {key}", labels=["cache"])
+                    for key in ("hits", "misses", "evictions")}
+        gauges = {key: GaugeMetricFamily(f"cache_{key}", f"Cache {key}", labels=["cache"])
+                  for key in ("bytes", "entries")}
+        for name, stats in self._read(self.caches):
+            for key, family in counters.items():
+                if key in stats:
+                    family.add_metric([name], stats[key])
+            for key, family in gauges.items():
+                if key in stats:
+                    family.add_metric([name], stats[key])
+            if "entries" not in stats and "loaded" in stats:
+                gauges["entries"].add_metric([name], len(stats["loaded"]))
+
+        queue_depth = GaugeMetricFamily("executor_queue_depth", "Tasks waiting for a worker", labels=["pool"])
+        in_flight = GaugeMetricFamily("executor_in_flight", "Tasks queued or running", labels=["pool"])
+        rejected = CounterMetricFamily("executor_rejected", "Tasks refused because the pool was full", labels=["pool"])
+        for name, stats in self._read(self.pools):
+            queue_depth.add_metric([name], stats.get("queued", 0))
+            in_flight.add_metric([name], stats.get("in_flight", 0))
+            if "rejected" in stats:
+                rejected.add_metric([name], stats["rejected"])
+        yield from counters.values()
+        yield from gauges.values()
+        yield from (queue_depth, in_flight, rejected)
+
+    @staticmethod
+    def _read(sources: dict):
+        for name, stats_fn in sources.items():
+            try:
+                yield name, stats_fn()
+            except Exception:
+                logger.exception("Could not read stats for %s", name)
+
+
+def register_runtime_stats(caches: dict, pools: dict):
+    global _runtime_collector
+    if _runtime_collector is not None:
+        REGISTRY.unregister(_runtime_collector)
+    _runtime_collector = RuntimeStatsCollector(caches, pools)
+    REGISTRY.register(_runtime_collector)
+
 
 def update_system_metrics():
+    # interval=None compares against the previous call instead of sleeping inside psutil.
+    psutil.cpu_percent(interval=None)
     while True:
         try:
-            CPU_USAGE.set(psutil.cpu_percent(interval=1))
+            CPU_USAGE.set(psutil.cpu_percent(interval=None))
             RAM_USAGE.set(psutil.virtual_memory().percent)
-            
-            
-            total_uptime = time.time() - START_TIME
-            active_uptime = time.time() - LAST_ACTIVE_TIME
-
-            UPTIME.set(total_uptime)
-            APP_UPTIME.labels("total").set(total_uptime)
-            APP_UPTIME.labels("active").set(active_uptime)
-       
-            time.sleep(5)
+
+            now = time.time()
+            UPTIME.set(now - START_TIME)
+            APP_UPTIME.labels("total").set(now - START_TIME)
+            APP_UPTIME.labels("active").set(now - LAST_ACTIVE_TIME)
         except Exception:
-            continue
+            logger.exception("System metrics collection failed")
+        time.sleep(COLLECT_INTERVAL)
+
 
 def start_metrics_collection():
-    thread = threading.Thread(target=update_system_metrics, daemon=True)
+    global _collector_started
+    if _collector_started:
+        return
+    _collector_started = True
+    thread = threading.Thread(target=update_system_metrics, daemon=True, name="system-metrics")
     thread.start()
@@ -0,0 +1,162 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import json
+import multiprocessing
+import os
+import tempfile
+from typing import Callable, Optional
+
+import numpy as np
+
+from src.columnar import read_columnar
+from src.forecasting import recursive_forecast, MetricAccumulator, MinMaxScaling
+from src.resample import to_datetime
+from src.model_registry import ModelRegistry, load_keras_model, model_input_shape, MODEL_FILENAME
+from src.training import sorted_panel, TrainingCancelled
+
+BACKTEST_FILENAME = "backtest.json"
+
+
+def build_origin_windows(series: list, window: int, horizon: int, n_origins: int, step: int) -> tuple:
+    """Inputs and targets for every origin at once: ``(origins, series, window, F)`` and ``(origins, series, horizon, F)``.
+
+    Origins are counted back from the end, ``step`` rows apart, at the same
+    offset in every series; series too short for the earliest origin are left out.
+    """
+    needed = window + horizon + (n_origins - 1) * step
+    kept = [i for i, s in enumerate(series) if len(s) >= needed]
+    if not kept:
+        raise ValueError(f"No series has the {needed} rows needed for {n_origins} origins.")
+    xs, ys = [], []
+    for i in kept:
+        values = series[i]
+        views = np.lib.stride_tricks.sliding_window_view(values, window + horizon, axis=0).transpose(0, 2, 1)
+        # Window k starts at row k; the latest origin uses the last full window.
+        last = len(values) - window - horizon
+        picked = views[[last - (n_origins - 1 - o) * step for o in range(n_origins)]]
+        xs.append(picked[:, :window])
+        ys.append(picked[:, window:])
+    return np.stack(xs, axis=1), np.stack(ys, axis=1), kept
+
+
+def backtest_model(model_path: str, x_path: str, y_path: str, features: list, targets: list, scaler: dict, horizon: int,
+                   recursive: bool, dtw_window: Optional[int] = None, loader: Callable = load_keras_model) -> dict:
+    """Worker entry point: score one model on every origin of the shared window arrays.
+
+    The windows are in the data's units; they are scaled with ``scaler`` for
+    the model and its predictions inverted, so the metrics are in data units.
+    """
+    x_all = np.load(x_path, mmap_mode="r")
+    y_all = np.load(y_path, mmap_mode="r")
+    scaling = MinMaxScaling.from_dict(scaler)
+    target_idx = [features.index(c) for c in targets]
+    model = loader(Path(model_path))
+    shape = model_input_shape(model)
+    window, flatten = (shape[0], False) if len(shape) > 1 else (1, True)
+    if window > x_all.shape[2]:
+        raise ValueError(f"Model needs a window of {window}, backtest was built with {x_all.shape[2]}.")
+    n_targets = len(target_idx)
+    predict_fn = lambda batch: model.predict(batch, verbose=0)
+
+    overall = MetricAccumulator(dtw_window)
+    origins = []
+    for o in range(len(x_all)):
+        inputs = scaling.transform(x_all[o, :, -window:], features)
+        actual = y_all[o][:, :, target_idx]
+        if recursive:
+            # Known future regressors are fed in, as in the recursive evaluation at training time.
+            predicted = recursive_forecast(predict_fn, inputs, horizon, target_idx, scaling.transform(y_all[o], features), flatten)
+        else:
+            batch = inputs.reshape(len(inputs), -1) if flatten else inputs
+            predicted = predict_fn(batch).reshape(len(inputs), -1, n_targets)
+            steps = min(horizon, predicted.shape[1])
+            predicted, actual = predicted[:, :steps], actual[:, :steps]
+        predicted = scaling.inverse_transform(predicted, targets)
+        per_origin = MetricAccumulator(dtw_window)
+        per_origin.update(actual, predicted)
+        overall.update(actual, predicted)
+        origins.append(per_origin.result())
+    return {"summary": overall.result(), "origins": origins}
+
+
+def run_backtest(params: dict, models_dir: Path, csv_path: Path,
+                 progress: Callable[[float, str], None] = lambda fraction, message: None,
+                 should_stop: Callable[[], bool] = lambda: False, loader: Callable = load_keras_model) -> dict:
+    """Walk-forward evaluation of trained models over ``n_origins`` forecast origins.
+
+    The dataset is windowed once; the window arrays are saved as .npy files
+    that every model worker memory-maps and scales with the model's own
+    ``scaler.json``. Notebook artifacts saved without one are scaled with a
+    min-max fitted on this dataset. Models run in parallel processes and each
+    writes ``backtest.json`` next to its ``model.keras``, in the same units as
+    its ``metrics.json``.
+    """
+    models = params.get("models") or sorted(p.parent.relative_to(models_dir).as_posix()
+                                            for p in models_dir.glob(f"**/{MODEL_FILENAME}"))
+    horizon, n_origins = int(params.get("horizon", 12)), int(params.get("n_origins", 10))
+    step, window = int(params.get("step", horizon)), int(params.get("window", 12))
+    group_col, datetime_col = params.get("group_col"), params.get("datetime_col")
+
+    df = read_columnar(csv_path)
+    features = params.get("columns") or [c for c in df.select_dtypes("number").columns if c != group_col]
+    targets = params.get("target_columns") or features
+    missing = [c for c in set(features) | set(targets) if c not in df.columns]
+    if missing:
+        raise ValueError(f"Columns not found: {', '.join(missing)}")
+
+    progress(0.0, "Building origin windows")
+    values, bounds = sorted_panel(df.copy(), features, group_col, datetime_col)
+    fitted = MinMaxScaling.fit(values, features, targets)
+    series = np.split(values, bounds[1:-1])
+    registry = ModelRegistry(models_dir)
+    scalers = {}
+    for name in models:
+        try:
+            scalers[name] = registry.scaler(name)
+        except KeyError:
+            scalers[name] = None  # reported by the worker, which fails to load it
+    x_all, y_all, kept = build_origin_windows(series, window, horizon, n_origins, step)
+    origin_dates = None
+    if datetime_col is not None:
+        # Panel series share a calendar, so origin o is the same date in every group.
+        dates = np.sort(to_datetime(df[datetime_col]).unique())
+        ends = [len(dates) - horizon - (n_origins - 1 - o) * step for o in range(n_origins)]
+        origin_dates = [str(dates[end - 1].astype("datetime64[s]")) if end >= 1 else None for end in ends]
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="backtest-") as tmp:
+        x_path, y_path = os.path.join(tmp, "x.npy"), os.path.join(tmp, "y.npy")
+        np.save(x_path, x_all)
+        np.save(y_path, y_all)
+        workers = int(params.get("workers") or os.getenv("BACKTEST_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+        with ProcessPoolExecutor(max_workers=min(workers, max(1, len(models))),
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {
+                pool.submit(backtest_model, str(models_dir / name / MODEL_FILENAME), x_path, y_path, features, targets,
+                            (scalers[name] or fitted).to_dict(), horizon, "recursive" in name.split("/"), params.get("dtw_window"), loader): name
+                for name in models
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                name = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    results[name] = {"error": f"{type(e).__name__}: {e}"}
+                else:
+                    for detail, date in zip(result["origins"], origin_dates or [None] * n_origins):
+                        detail["origin"] = date
+                    report = {
+                        "dataset": params.get("dataset_name"),
+                        "horizon": horizon, "window": window, "n_origins": n_origins, "step": step,
+                        "series": len(kept), "targets": targets,
+                        "scaling": "model" if scalers[name] is not None else "dataset",
+                        **result,
+                    }
+                    (models_dir / name / BACKTEST_FILENAME).write_text(json.dumps(report, indent=4))
+                    results[name] = result["summary"]
+                progress(done / len(models), f"Backtested {done}/{len(models)} models")
+                if should_stop():
+                    for pending in futures:
+                        pending.cancel()
+                    raise TrainingCancelled("Backtest cancelled.")
+    return {"models": results, "series": len(kept), "n_origins": n_origins}
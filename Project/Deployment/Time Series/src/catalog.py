@@ -0,0 +1,97 @@
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.columnar import iter_chunks, read_columnar
+from src.resample import to_datetime
+from src.type_inference import infer_column_types
+
+MAX_GROUP_CARDINALITY = 100_000
+
+
+def _series_key(csv_path: Path, datetime_col: str, candidates: list):
+    # The smallest column that makes (column, datetime) unique identifies the series of a panel.
+    for column in candidates:
+        pair = read_columnar(csv_path, columns=[column, datetime_col])
+        if not pd.DataFrame({"g": pair[column], "t": to_datetime(pair[datetime_col])}).duplicated().any():
+            return column
+    return None
+
+
+def _scan(csv_path: Path) -> tuple:
+    """Row count, dtypes and distinct counts in one pass over the chunks.
+
+    Distinct values are only tracked up to ``MAX_GROUP_CARDINALITY`` per
+    column (enough to find group columns); beyond that the count is None.
+    """
+    rows, dtypes, seen = 0, {}, {}
+    for chunk in iter_chunks(csv_path):
+        if not dtypes:
+            dtypes = chunk.dtypes.astype(str).to_dict()
+            seen = {c: set() for c in chunk.columns}
+        rows += len(chunk)
+        for column, values in seen.items():
+            if values is not None:
+                values.update(chunk[column].dropna().unique().tolist())
+                if len(values) > MAX_GROUP_CARDINALITY:
+                    seen[column] = None
+    distinct = {c: None if values is None else len(values) for c, values in seen.items()}
+    return rows, dtypes, distinct
+
+
+def _sample(csv_path: Path, rows: int, size: int) -> Optional[pd.DataFrame]:
+    # Evenly spaced rows, gathered chunk by chunk.
+    positions = np.unique(np.linspace(0, rows - 1, min(rows, size), dtype=np.int64))
+    parts, offset = [], 0
+    for chunk in iter_chunks(csv_path):
+        picked = positions[(positions >= offset) & (positions < offset + len(chunk))] - offset
+        if len(picked):
+            parts.append(chunk.iloc[picked])
+        offset += len(chunk)
+    return pd.concat(parts, ignore_index=True) if parts else None
+
+
+def _date_range(csv_path: Path, datetime_col: str) -> tuple:
+    low = high = None
+    for chunk in iter_chunks(csv_path, columns=[datetime_col]):
+        dt = to_datetime(chunk[datetime_col])
+        if dt.notna().any():
+            low = dt.min() if low is None else min(low, dt.min())
+            high = dt.max() if high is None else max(high, dt.max())
+    return low, high
+
+
+def describe_dataset(csv_path: Path, sample_size: int = 10000) -> dict:
+    """Row count, column schema, date range and series count of a stored dataset, for the catalog.
+
+    Profiled from the stored chunks (record batches of the columnar copy), so
+    memory follows the chunk size rather than the file; only the series-key
+    check reads two whole columns.
+    """
+    rows, dtypes, distinct = _scan(csv_path)
+    sample = _sample(csv_path, rows, sample_size) if rows else None
+    if sample is None:
+        sample = read_columnar(csv_path).head(0)
+    inferred = infer_column_types(sample, sample_size=sample_size)
+    columns = [{"name": c, "dtype": dtypes.get(c, str(sample[c].dtype)), "type": inferred[c]["type"], "distinct": distinct.get(c)}
+               for c in sample.columns]
+    entry = {"rows": rows, "columns": columns, "datetime_col": None, "date_min": None, "date_max": None,
+             "group_col": None, "group_count": None}
+
+    datetime_cols = [c for c in sample.columns if inferred[c]["type"] == "datetime"]
+    if not datetime_cols:
+        return entry
+    datetime_col = datetime_cols[0]
+    low, high = _date_range(csv_path, datetime_col)
+    entry.update(datetime_col=datetime_col, date_min=str(low) if low is not None else str(pd.NaT),
+                 date_max=str(high) if high is not None else str(pd.NaT))
+
+    candidates = sorted((c for c in sample.columns
+                         if c != datetime_col and distinct.get(c) is not None and 1 < distinct[c] <= min(rows // 2, MAX_GROUP_CARDINALITY)),
+                        key=distinct.get)
+    group_col = _series_key(csv_path, datetime_col, candidates)
+    if group_col is not None:
+        entry.update(group_col=group_col, group_count=distinct[group_col])
+    return entry
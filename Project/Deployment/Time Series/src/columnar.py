@@ -0,0 +1,178 @@
+from pathlib import Path
+import hashlib
+import logging
+import re
+from typing import Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.feather as feather
+except ImportError:  # columnar copies are an optimisation; CSV stays the source of truth
+    pa = None
+    pacsv = None
+    feather = None
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_SUFFIX = ".feather"
+SNIFF_BYTES = 64 * 1024
+CSV_BLOCK_BYTES = 1024 * 1024
+POTENTIAL_SEPS = [',', '\t', ';', '|']
+
+
+def columnar_path(csv_path: Path) -> Path:
+    return csv_path.with_name(csv_path.name + COLUMNAR_SUFFIX)
+
+
+def sniff_separator(sample: str) -> str:
+    counts = {sep: sample.count(sep) for sep in POTENTIAL_SEPS}
+    return max(counts, key=counts.get)
+
+
+def file_hash(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def has_columnar(csv_path: Path) -> bool:
+    if feather is None:
+        return False
+    path = columnar_path(csv_path)
+    return path.exists() and path.stat().st_mtime >= csv_path.stat().st_mtime
+
+
+def _pandas_like(dtype):
+    # pandas keeps dates as text and reads an empty column as float; match it so either copy reads the same.
+    if pa.types.is_null(dtype):
+        return pa.float64()
+    if pa.types.is_temporal(dtype):
+        return pa.string()
+    return dtype
+
+
+def _widen(dtype):
+    # A later block that does not fit the type inferred from the first one: int -> float -> text.
+    if pa.types.is_integer(dtype):
+        return pa.float64()
+    return pa.string()
+
+
+def _csv_reader(csv_path: Path, sep: str, column_types: Optional[dict] = None):
+    return pacsv.open_csv(str(csv_path),
+                          read_options=pacsv.ReadOptions(block_size=CSV_BLOCK_BYTES),
+                          parse_options=pacsv.ParseOptions(delimiter=sep, newlines_in_values=True),
+                          convert_options=pacsv.ConvertOptions(column_types=column_types, strings_can_be_null=True))
+
+
+def _stream_csv(csv_path: Path, target: Path, sep: str, column_types: dict, metadata: dict):
+    with _csv_reader(csv_path, sep, column_types) as reader:
+        schema = reader.schema.with_metadata(metadata)
+        with pa.OSFile(str(target), "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+
+
+def write_columnar(csv_path: Path, content_hash: Optional[str] = None) -> Optional[Path]:
+    """Write the Arrow IPC (Feather) copy of a CSV one parsed block at a time.
+
+    Column types are inferred from the first block; when a later block does
+    not fit, the column is widened and the copy restarted, so memory stays at
+    about one block whatever the file size.
+    """
+    if feather is None:
+        return None
+    with open(csv_path, "rb") as f:
+        sep = sniff_separator(f.read(SNIFF_BYTES).decode(errors='ignore'))
+    path = columnar_path(csv_path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    metadata = {b"content_hash": (content_hash or file_hash(csv_path)).encode(), b"sep": sep.encode()}
+    try:
+        with _csv_reader(csv_path, sep) as reader:
+            column_types = {field.name: _pandas_like(field.type) for field in reader.schema}
+        names = list(column_types)
+        while True:
+            try:
+                _stream_csv(csv_path, tmp_path, sep, column_types, metadata)
+                break
+            except pa.ArrowInvalid as e:
+                match = re.search(r"CSV column #(\d+)", str(e))
+                if match is None or pa.types.is_string(column_types[names[int(match.group(1))]]):
+                    raise
+                name = names[int(match.group(1))]
+                column_types[name] = _widen(column_types[name])
+        tmp_path.replace(path)
+    except Exception as e:
+        # e.g. rows with a different number of fields; readers fall back to the CSV.
+        logger.warning(f"Skipping columnar copy of '{csv_path.name}': {e}")
+        tmp_path.unlink(missing_ok=True)
+        return None
+    return path
+
+
+def columnar_metadata(csv_path: Path) -> dict:
+    if not has_columnar(csv_path):
+        with open(csv_path, "rb") as f:
+            sep = sniff_separator(f.read(SNIFF_BYTES).decode(errors='ignore'))
+        return {"content_hash": file_hash(csv_path), "sep": sep}
+    with pa.memory_map(str(columnar_path(csv_path))) as source:
+        schema = pa.ipc.open_file(source).schema
+    metadata = schema.metadata or {}
+    return {
+        "content_hash": metadata.get(b"content_hash", b"").decode() or file_hash(csv_path),
+        "sep": metadata.get(b"sep", b",").decode(),
+    }
+
+
+def read_columnar(csv_path: Path, columns: Optional[list] = None) -> pd.DataFrame:
+    if has_columnar(csv_path):
+        table = feather.read_table(columnar_path(csv_path), columns=columns, memory_map=True)
+        return table.to_pandas()
+    with open(csv_path, "rb") as f:
+        sep = sniff_separator(f.read(SNIFF_BYTES).decode(errors='ignore'))
+    return pd.read_csv(csv_path, sep=sep, usecols=columns)
+
+
+def iter_chunks(csv_path: Path, columns: Optional[list] = None, chunksize: int = 100000):
+    if has_columnar(csv_path):
+        with pa.memory_map(str(columnar_path(csv_path))) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                if columns is not None:
+                    batch = batch.select(columns)
+                yield batch.to_pandas()
+        return
+    with open(csv_path, "rb") as f:
+        sep = sniff_separator(f.read(SNIFF_BYTES).decode(errors='ignore'))
+    yield from pd.read_csv(csv_path, sep=sep, usecols=columns, chunksize=chunksize)
+
+
+def read_slice(csv_path: Path, columns: Optional[list] = None, offset: int = 0, limit: Optional[int] = None) -> tuple:
+    """Rows ``[offset, offset + limit)`` of the selected columns and the dataset's total row count.
+
+    With a columnar copy only the requested buffers are touched; the CSV
+    fallback parses up to the end of the slice and leaves the total as None.
+    """
+    if has_columnar(csv_path):
+        table = feather.read_table(columnar_path(csv_path), columns=columns, memory_map=True)
+        return table.slice(offset, limit).to_pandas(), table.num_rows
+    with open(csv_path, "rb") as f:
+        sep = sniff_separator(f.read(SNIFF_BYTES).decode(errors='ignore'))
+    df = pd.read_csv(csv_path, sep=sep, usecols=columns, skiprows=range(1, offset + 1), nrows=limit)
+    return df, None
+
+
+def to_arrow_ipc(df: pd.DataFrame) -> bytes:
+    if pa is None:
+        raise RuntimeError("pyarrow is required for Arrow output.")
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
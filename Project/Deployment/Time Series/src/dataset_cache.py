@@ -0,0 +1,73 @@
+from collections import OrderedDict
+import hashlib
+import os
+import threading
+from typing import Optional
+
+import pandas as pd
+
+
+def dataset_id_for(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class DatasetCache:
+    """LRU cache of parsed DataFrames keyed by dataset ID, evicting by memory budget."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, dataset_id: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(dataset_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(dataset_id)
+            self.hits += 1
+            return entry
+
+    def put(self, dataset_id: str, df: pd.DataFrame, filename: Optional[str] = None, sep: Optional[str] = None) -> dict:
+        size = int(df.memory_usage(deep=True).sum())
+        entry = {"df": df, "filename": filename, "sep": sep, "nbytes": size, "cached": size <= self.max_bytes}
+        with self._lock:
+            old = self._entries.pop(dataset_id, None)
+            if old is not None:
+                self.current_bytes -= old["nbytes"]
+            if size > self.max_bytes:
+                # Too large to keep around; the caller still gets the parsed frame.
+                return entry
+            self._entries[dataset_id] = entry
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted["nbytes"]
+                self.evictions += 1
+        return entry
+
+    def discard(self, dataset_id: str):
+        with self._lock:
+            entry = self._entries.pop(dataset_id, None)
+            if entry is not None:
+                self.current_bytes -= entry["nbytes"]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+dataset_cache = DatasetCache(max_bytes=int(os.getenv("EDA_CACHE_MB", "512")) * 1024 * 1024)
+decomposition_cache = DatasetCache(max_bytes=int(os.getenv("STL_CACHE_MB", "128")) * 1024 * 1024)
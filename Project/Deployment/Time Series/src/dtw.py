@@ -0,0 +1,148 @@
+from typing import Optional
+
+import numpy as np
+from scipy.ndimage import maximum_filter1d, minimum_filter1d
+
+COSTS = ("abs", "squared")
+
+
+def _check_cost(cost: str):
+    if cost not in COSTS:
+        raise ValueError(f"Unknown cost '{cost}'. Choose from {', '.join(COSTS)}.")
+
+
+def _finish(total, cost: str):
+    # Squared cost reports the Euclidean-style sqrt, as most DTW libraries do.
+    return np.sqrt(total) if cost == "squared" else total
+
+
+def dtw_batch(x: np.ndarray, y: np.ndarray, window: Optional[int] = None, cost: str = "abs",
+              max_dist: Optional[float] = None) -> np.ndarray:
+    """DTW distance for every pair ``(x[k], y[k])`` in one pass.
+
+    ``x`` is ``(batch, n)`` and ``y`` is ``(batch, m)``. ``window`` is the
+    Sakoe-Chiba band half-width (``None`` for unconstrained); it is widened to
+    ``|n - m|`` so the end cell stays reachable. Only two band rows are kept,
+    and each row is filled with array operations across the band and the
+    batch: the left-neighbour dependency ``D[i, j-1]`` is resolved with a
+    cumulative-sum / running-minimum identity instead of a Python loop.
+    With ``max_dist``, pairs whose row minimum already exceeds it are
+    abandoned and reported as ``inf``.
+    """
+    _check_cost(cost)
+    x = np.atleast_2d(np.asarray(x, dtype=np.float64))
+    y = np.atleast_2d(np.asarray(y, dtype=np.float64))
+    if len(x) != len(y):
+        raise ValueError(f"Batch sizes differ: {len(x)} vs {len(y)}.")
+    batch, n = x.shape
+    m = y.shape[1]
+    if n == 0 or m == 0:
+        raise ValueError("DTW needs non-empty series.")
+    w = max(n, m) if window is None else max(int(window), abs(n - m))
+    limit = None if max_dist is None else (max_dist ** 2 if cost == "squared" else max_dist)
+
+    # prev[:, j + 1] holds D[i - 1, j]; index 0 is the D[-1, -1] = 0 corner for the first row.
+    prev = np.full((batch, m + 1), np.inf)
+    prev[:, 0] = 0.0
+    cur = np.full((batch, m + 1), np.inf)
+    alive = np.ones(batch, dtype=bool)
+    for i in range(n):
+        lo, hi = max(0, i - w), min(m - 1, i + w)
+        diff = x[:, i, None] - y[:, lo:hi + 1]
+        step = np.abs(diff) if cost == "abs" else diff * diff
+        best = step + np.minimum(prev[:, lo:hi + 1], prev[:, lo + 1:hi + 2])
+        # D[i, j] = min(best_j, step_j + D[i, j-1])  ==  S_j + min_{k<=j}(best_k - S_k)
+        running = np.cumsum(step, axis=1)
+        cur[:, lo + 1:hi + 2] = running + np.minimum.accumulate(best - running, axis=1)
+        # Cells just outside this row's band must read as unreachable from the next row.
+        cur[:, lo] = np.inf
+        if hi + 2 <= m:
+            cur[:, hi + 2] = np.inf
+        if limit is not None:
+            alive &= cur[:, lo + 1:hi + 2].min(axis=1) <= limit
+            if not alive.any():
+                return np.full(batch, np.inf)
+        prev, cur = cur, prev
+    result = _finish(prev[:, m].copy(), cost)
+    result[~alive] = np.inf
+    return result
+
+
+def dtw_distance(x: np.ndarray, y: np.ndarray, window: Optional[int] = None, cost: str = "abs",
+                 max_dist: Optional[float] = None) -> float:
+    return float(dtw_batch(np.ravel(x)[None], np.ravel(y)[None], window, cost, max_dist)[0])
+
+
+def dtw_reference(x: np.ndarray, y: np.ndarray, cost: str = "abs") -> float:
+    """Textbook full-matrix DTW; quadratic memory, kept for checking the banded version."""
+    _check_cost(cost)
+    x, y = np.ravel(x).astype(np.float64), np.ravel(y).astype(np.float64)
+    d = np.full((len(x) + 1, len(y) + 1), np.inf)
+    d[0, 0] = 0.0
+    for i in range(1, len(x) + 1):
+        for j in range(1, len(y) + 1):
+            step = abs(x[i - 1] - y[j - 1]) if cost == "abs" else (x[i - 1] - y[j - 1]) ** 2
+            d[i, j] = step + min(d[i - 1, j - 1], d[i - 1, j], d[i, j - 1])
+    return float(_finish(d[-1, -1], cost))
+
+
+def lb_kim(x: np.ndarray, y: np.ndarray, cost: str = "abs") -> np.ndarray:
+    """O(1) lower bound from the first and last points, which every warping path must match."""
+    _check_cost(cost)
+    x, y = np.atleast_2d(x).astype(np.float64), np.atleast_2d(y).astype(np.float64)
+    first, last = x[:, 0] - y[:, 0], x[:, -1] - y[:, -1]
+    if cost == "abs":
+        total = np.abs(first) + np.abs(last)
+    else:
+        total = first ** 2 + last ** 2
+    if x.shape[1] == 1 and y.shape[1] == 1:
+        total = total / 2
+    return _finish(total, cost)
+
+
+def envelope(y: np.ndarray, window: int) -> tuple:
+    """Upper and lower Sakoe-Chiba envelopes of ``y`` (last axis), each O(n)."""
+    size = 2 * int(window) + 1
+    return maximum_filter1d(y, size, axis=-1, mode="nearest"), minimum_filter1d(y, size, axis=-1, mode="nearest")
+
+
+def lb_keogh(x: np.ndarray, y: np.ndarray, window: int, cost: str = "abs", env: Optional[tuple] = None) -> np.ndarray:
+    """LB_Keogh of each query row in ``x`` against the envelope of the matching row in ``y`` (equal lengths)."""
+    _check_cost(cost)
+    x, y = np.atleast_2d(x).astype(np.float64), np.atleast_2d(y).astype(np.float64)
+    if x.shape[1] != y.shape[1]:
+        raise ValueError("LB_Keogh needs series of equal length.")
+    upper, lower = env if env is not None else envelope(y, window)
+    gap = np.where(x > upper, x - upper, np.where(x < lower, lower - x, 0.0))
+    return _finish((gap if cost == "abs" else gap * gap).sum(axis=1), cost)
+
+
+def dtw_nearest(query: np.ndarray, candidates: np.ndarray, window: int, k: int = 1, cost: str = "abs") -> dict:
+    """k nearest candidates (rows, equal length to ``query``) under banded DTW.
+
+    Candidates are visited in LB_Keogh order; a candidate is skipped once its
+    LB_Kim or LB_Keogh bound exceeds the current k-th best, and the remaining
+    DTW calls abandon early against that threshold.
+    """
+    query = np.ravel(query).astype(np.float64)
+    candidates = np.atleast_2d(candidates).astype(np.float64)
+    queries = np.broadcast_to(query, candidates.shape)
+    kim = lb_kim(queries, candidates, cost)
+    keogh = lb_keogh(queries, candidates, window, cost)
+    bound = np.maximum(kim, keogh)
+    best = []
+    computed = 0
+    for idx in np.argsort(bound, kind="stable"):
+        threshold = best[-1][0] if len(best) == k else None
+        if threshold is not None and bound[idx] >= threshold:
+            break
+        dist = dtw_distance(query, candidates[idx], window, cost, max_dist=threshold)
+        computed += 1
+        if threshold is None or dist < threshold:
+            best = sorted(best + [(dist, int(idx))])[:k]
+    return {
+        "indices": [i for _, i in best],
+        "distances": [float(d) for d, _ in best],
+        "dtw_computed": computed,
+        "pruned": len(candidates) - computed,
+    }
@@ -1,31 +1,48 @@
 import pandas as pd
 import numpy as np
 import io
-import re
 import matplotlib.pyplot as plt
 from statsmodels.tsa.seasonal import STL
 import base64
+import time
 from typing import Optional
+from pathlib import Path
+from src.columnar import read_columnar, columnar_metadata, read_slice, to_arrow_ipc
+from src.type_inference import infer_column_types
+from src.resample import to_datetime, preview_cutoff, stream_resample
+from src.regularity import analyze_regularity, group_codes
+from src.export import iter_csv, frame_chunks
+from src.ingest import read_upload
 
 class TimeSeriesEDA:
     def __init__(self, file_content: bytes, filename: str):
+        # Accepts CSV (plain, gzip or zstd), Parquet and Arrow IPC; see src.ingest.
         self.file_content = file_content
         self.filename = filename
-        self.sep = self._detect_separator()
-        self.df = self._read_file()
+        self.df, self.sep = read_upload(file_content, filename)
 
-    def _detect_separator(self) -> str:
-        text = self.file_content.decode(errors='ignore')
-        potential_seps = [',', '\t', ';', '|']
-        counts = {sep: text.count(sep) for sep in potential_seps}
-        return max(counts, key=counts.get)
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, filename: str, sep: str = ',', copy: bool = True) -> "TimeSeriesEDA":
+        # Some methods mutate self.df, so by default work on a copy of the shared frame;
+        # copy=False shares it and is only for read-only calls.
+        eda = cls.__new__(cls)
+        eda.file_content = None
+        eda.filename = filename
+        eda.sep = sep
+        eda.df = df.copy() if copy else df
+        return eda
 
-    def _read_file(self) -> pd.DataFrame:
-        try:
-            df = pd.read_csv(io.StringIO(self.file_content.decode()), sep=self.sep)
-            return df
-        except Exception as e:
-            raise ValueError(f"Could not read file: {e}")
+    @classmethod
+    def from_saved(cls, csv_path: Path, columns: Optional[list] = None) -> "TimeSeriesEDA":
+        # Memory-maps the columnar copy written at ingest, falling back to the CSV.
+        df = read_columnar(csv_path, columns=columns)
+        meta = columnar_metadata(csv_path)
+        eda = cls.__new__(cls)
+        eda.file_content = None
+        eda.filename = csv_path.name
+        eda.sep = meta["sep"]
+        eda.df = df
+        return eda
 
     def basic_info(self) -> dict:
         return {
@@ -38,20 +55,124 @@ class TimeSeriesEDA:
     def column_value_counts(self, column: str, top_n: int = 10) -> dict:
         return self.df[column].value_counts().head(top_n).to_dict()
 
+    def schema_overview(self) -> dict:
+        return self.basic_info()
+
+    def column_nulls(self, column: str, group_cols: Optional[list] = None) -> dict:
+        if group_cols:
+            grouped = self.df.groupby(list(group_cols), dropna=False)[column]
+            stats = pd.DataFrame({"total_rows": grouped.size()})
+            stats["nulls"] = stats["total_rows"] - grouped.count()
+            stats["null_ratio"] = stats["nulls"] / stats["total_rows"]
+            return {"column": column, **long_format(stats.reset_index())}
+        nulls = int(self.df[column].isnull().sum())
+        return {"column": column, "nulls": nulls, "total_rows": len(self.df), "null_ratio": nulls / len(self.df) if len(self.df) else 0.0}
+
+    def group_stats(self, group_cols: list, columns: Optional[list] = None, datetime_col: Optional[str] = None) -> dict:
+        """Rows, nulls and min/max of every column for every group, one long-format row per (group, column)."""
+        keys = list(group_cols)
+        df = self.df
+        if datetime_col is not None:
+            df = df.assign(**{datetime_col: to_datetime(df[datetime_col])})
+        values = [c for c in (columns or df.columns) if c not in keys]
+        grouped = df.groupby(keys, dropna=False)
+        rows = grouped.size()
+        nulls = grouped[values].count().rsub(rows, axis=0)
+        ranged = [c for c in values if pd.api.types.is_numeric_dtype(df[c]) or pd.api.types.is_datetime64_any_dtype(df[c])]
+        stats = pd.concat({
+            "nulls": nulls.stack(),
+            "min": grouped[ranged].min().astype(object).stack(),
+            "max": grouped[ranged].max().astype(object).stack(),
+        }, axis=1)
+        stats.index.names = keys + ["column"]
+        stats = stats.reset_index().merge(rows.rename("rows").reset_index(), on=keys, how="left")
+        stats["null_ratio"] = stats["nulls"] / stats["rows"]
+        stats = stats[keys + ["column", "rows", "nulls", "null_ratio", "min", "max"]]
+        return {"groups": int(len(rows)), **long_format(stats)}
+
+    def profile(self, top_n: int = 5, sample_size: int = 10000) -> dict:
+        """Shape, dtypes, nulls, top values, inferred types, datetime ranges and memory in one call.
+
+        Each section is a separate scan, timed under ``timings``: nulls, memory,
+        type inference on a sample, value counts per column (which also yield
+        the distinct count), and one parse of each datetime column with the
+        format found by type inference.
+        """
+        timings = {}
+
+        def timed(section, fn):
+            start = time.perf_counter()
+            result = fn()
+            timings[section] = round((time.perf_counter() - start) * 1000, 3)
+            return result
+
+        df = self.df
+        null_counts = timed("nulls", lambda: df.isnull().sum())
+        memory = timed("memory", lambda: df.memory_usage(deep=True, index=False))
+        inferred = timed("inference", lambda: infer_column_types(df, sample_size=sample_size))
+
+        def top_values():
+            summary = {}
+            for column in df.columns:
+                counts = df[column].value_counts(dropna=True)
+                summary[column] = {
+                    "unique": int(len(counts)),
+                    "top": [{"value": str(value), "count": int(count)} for value, count in counts.head(top_n).items()],
+                }
+            return summary
+
+        values = timed("top_values", top_values)
+
+        def datetime_ranges():
+            ranges = {}
+            for column, info in inferred.items():
+                if info["type"] != "datetime":
+                    continue
+                series = df[column]
+                if not pd.api.types.is_datetime64_any_dtype(series):
+                    series = pd.to_datetime(series, format=info["format"], errors='coerce')
+                distinct = pd.DatetimeIndex(series.dropna().unique()).sort_values()
+                ranges[column] = {
+                    "min": str(distinct[0]) if len(distinct) else None,
+                    "max": str(distinct[-1]) if len(distinct) else None,
+                    "distinct": int(len(distinct)),
+                    "inferred_freq": pd.infer_freq(distinct) if len(distinct) >= 3 else None,
+                }
+            return ranges
+
+        datetimes = timed("datetime", datetime_ranges)
+
+        columns = {}
+        for column in df.columns:
+            columns[column] = {
+                "dtype": str(df[column].dtype),
+                "nulls": int(null_counts[column]),
+                "memory_bytes": int(memory[column]),
+                "inferred": inferred[column],
+                **values[column],
+            }
+        return {
+            "shape": df.shape,
+            "memory_bytes": int(memory.sum()),
+            "columns": columns,
+            "datetime": datetimes,
+            "timings_ms": timings,
+        }
+
     def suggest_cast_type(self, column: str) -> str:
-        series = self.df[column]
-        try:
-            pd.to_numeric(series.dropna(), errors='raise')
+        # Collapses the inference engine's classes onto the dtypes try_cast_column accepts.
+        inferred = infer_column_types(self.df[[column]], full_scan=True, min_ratio=1.0)[column]
+        if inferred["convertible_ratio"] < 1.0:
+            return "string"
+        if inferred["type"] in ("numeric", "integer"):
             return "numeric"
-        except:
-            pass
-        try:
-            pd.to_datetime(series.dropna(), errors='raise')
+        if inferred["type"] == "datetime":
             return "datetime"
-        except:
-            pass
         return "string"
 
+    def suggest_types_for_all(self, sample_size: int = 10000, full_scan: bool = False) -> dict:
+        return infer_column_types(self.df, sample_size=sample_size, full_scan=full_scan)
+
     def try_cast_column(self, column: str, dtype: str) -> dict:
         try:
             if dtype == 'numeric':
@@ -90,6 +211,16 @@ class TimeSeriesEDA:
         after = len(self.df)
         return {"dropped_rows": before - after, "remaining_rows": after}
 
+    def drop_column(self, column: str) -> dict:
+        self.df = self.df.drop(columns=[column])
+        return {"dropped_column": column, "remaining_columns": list(self.df.columns)}
+
+    def drop_rows_with_null(self, column: str) -> dict:
+        before = len(self.df)
+        self.df = self.df.dropna(subset=[column])
+        after = len(self.df)
+        return {"dropped_rows": before - after, "remaining_rows": after}
+
     def check_datetime_column(self, datetime_col: str) -> dict:
         try:
             dt_series = pd.to_datetime(self.df[datetime_col], errors='coerce')
@@ -100,25 +231,47 @@ class TimeSeriesEDA:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def check_frequency_applicability(self, datetime_col: str, freq: str) -> dict:
-        dt_series = pd.to_datetime(self.df[datetime_col], errors='coerce').dropna().sort_values()
-        inferred_freq = pd.infer_freq(dt_series)
-        if inferred_freq is None:
-            return {"applicable": False, "reason": "Irregular datetime intervals, frequency inference failed."}
-        is_applicable = pd.date_range(start=dt_series.iloc[0], end=dt_series.iloc[-1], freq=freq).shape[0] > 0
+    def regularity(self, datetime_col: str, group_cols: Optional[list] = None, freq: Optional[str] = None) -> dict:
+        # Panel data repeats every date once per group, so deltas are taken within each group.
+        codes, labels = group_codes(self.df, group_cols)
+        return analyze_regularity(to_datetime(self.df[datetime_col]), codes, labels, freq=freq)
+
+    def check_frequency_applicability(self, datetime_col: str, freq: str, group_cols: Optional[list] = None) -> dict:
+        report = self.regularity(datetime_col, group_cols, freq)
         return {
-            "applicable": is_applicable,
-            "inferred_freq": inferred_freq,
-            "reason": None if is_applicable else "Requested frequency does not align with data."
+            "applicable": report["applicable"],
+            "inferred_freq": report["dominant_freq"],
+            "reason": report["reason"],
+            "regularity": report,
         }
 
-    def preview_resample(self, datetime_col: str, freq: str, agg: str = 'mean', rows: int = 5) -> dict:
-        self.df[datetime_col] = pd.to_datetime(self.df[datetime_col])
-        self.df.set_index(datetime_col, inplace=True)
-        resampled = self.df.resample(freq).agg(agg)
+    def preview_resample(self, datetime_col: str, freq: str, agg: str = 'mean', rows: int = 5, group_cols: Optional[list] = None) -> dict:
+        # Only rows that can land in the first `rows` bins are aggregated; self.df is left untouched.
+        dt = to_datetime(self.df[datetime_col])
+        if group_cols:
+            return self._preview_resample_groups(dt, datetime_col, freq, agg, rows, list(group_cols))
+        cutoff = preview_cutoff(dt, freq, rows)
+        mask = dt <= cutoff
+        subset = self.df.loc[mask].drop(columns=[datetime_col])
+        subset.index = pd.DatetimeIndex(dt[mask], name=datetime_col)
+        resampled = subset.resample(freq).agg(agg)
         return resampled.reset_index().head(rows).to_dict(orient='records')
     
-    def seasonal_decomposition(self, datetime_col: str, target_col: str, freq: Optional[int] = None) -> str:
+    def _preview_resample_groups(self, dt: pd.Series, datetime_col: str, freq: str, agg: str, rows: int, keys: list) -> dict:
+        # Each group's preview starts at its own first bin; panels share a handful of start dates,
+        # so the cutoff is worked out once per distinct start rather than once per group.
+        starts = dt.groupby([self.df[k] for k in keys], dropna=False).transform("min")
+        cutoffs = {start: preview_cutoff(pd.Series([start]), freq, rows) for start in starts.dropna().unique()}
+        mask = dt <= starts.map(cutoffs)
+        subset = self.df.loc[mask].assign(**{datetime_col: dt[mask]})
+        resampled = subset.groupby(keys + [pd.Grouper(key=datetime_col, freq=freq)], dropna=False).agg(agg)
+        resampled = resampled.groupby(level=keys, dropna=False).head(rows)
+        return long_format(resampled.reset_index())
+
+    def seasonal_components(self, datetime_col: str, target_col: str, freq: Optional[int] = None, robust: bool = True,
+                            group_cols: Optional[list] = None) -> pd.DataFrame:
+        if group_cols:
+            return group_seasonal_components(self.df, datetime_col, target_col, list(group_cols), freq, robust)
         self.df[datetime_col] = pd.to_datetime(self.df[datetime_col])
         self.df.set_index(datetime_col, inplace=True)
         series = self.df[target_col].dropna()
@@ -127,22 +280,19 @@ class TimeSeriesEDA:
             freq = pd.infer_freq(series.index)
             if freq is None:
                 raise ValueError("Could not infer frequency for STL decomposition.")
-        
-        stl = STL(series, period=freq if isinstance(freq, int) else None, robust=True)
-        result = stl.fit()
 
-        fig, ax = plt.subplots(4, 1, figsize=(10, 8), sharex=True)
-        ax[0].plot(series, label='Observed')
-        ax[0].legend()
-        ax[1].plot(result.trend, label='Trend')
-        ax[1].legend()
-        ax[2].plot(result.seasonal, label='Seasonal')
-        ax[2].legend()
-        ax[3].plot(result.resid, label='Residual')
-        ax[3].legend()
-        plt.tight_layout()
+        stl = STL(series, period=freq if isinstance(freq, int) else None, robust=robust)
+        result = stl.fit()
+        return pd.DataFrame({
+            "observed": series,
+            "trend": result.trend,
+            "seasonal": result.seasonal,
+            "resid": result.resid,
+        })
 
-        return self._fig_to_base64(fig)
+    def seasonal_decomposition(self, datetime_col: str, target_col: str, freq: Optional[int] = None) -> str:
+        components = self.seasonal_components(datetime_col, target_col, freq)
+        return render_components(components)
 
     def _fig_to_base64(self, fig) -> str:
         buf = io.BytesIO()
@@ -160,6 +310,136 @@ class TimeSeriesEDA:
         return base64.b64encode(buf.getvalue()).decode('utf-8')
 
     def save_cleaned_csv(self) -> bytes:
-        output = io.StringIO()
-        self.df.to_csv(output, index=False, sep=self.sep)
-        return output.getvalue().encode()
+        return b"".join(iter_csv(frame_chunks(self.df), self.sep))
+
+
+def long_format(frame: pd.DataFrame) -> dict:
+    # Column names once plus one row list per record; much smaller than per-row dicts for many groups.
+    values = frame.astype(object).where(frame.notna(), None)
+    return {"columns": [str(c) for c in frame.columns], "data": values.to_numpy().tolist()}
+
+
+def split_groups(df: pd.DataFrame, group_cols: list, parts: int) -> list:
+    """Split ``df`` into at most ``parts`` frames, each holding whole groups."""
+    codes = df.groupby(list(group_cols), sort=False, dropna=False).ngroup().to_numpy()
+    parts = max(1, min(parts, int(codes.max()) + 1 if len(codes) else 1))
+    return [df[codes % parts == i] for i in range(parts)]
+
+
+def group_seasonal_components(df: pd.DataFrame, datetime_col: str, target_col: str, group_cols: list,
+                              period: Optional[int] = None, robust: bool = True) -> pd.DataFrame:
+    """STL per group, stacked in long format: group keys, datetime, observed, trend, seasonal, resid.
+
+    Groups too short for the period are skipped and listed in ``attrs["skipped"]``.
+    """
+    if period is None:
+        raise ValueError("A seasonal period is required for per-group decomposition.")
+    frame = df[group_cols + [datetime_col, target_col]].assign(**{datetime_col: to_datetime(df[datetime_col])})
+    frame = frame.dropna(subset=[datetime_col, target_col])
+    parts, skipped = [], []
+    for key, group in frame.groupby(group_cols, sort=False, dropna=False):
+        series = group.set_index(datetime_col)[target_col].sort_index()
+        if len(series) < 2 * period + 1:
+            skipped.append(list(key) if len(group_cols) > 1 else key[0])
+            continue
+        result = STL(series.to_numpy(dtype=float), period=period, robust=robust).fit()
+        part = pd.DataFrame(dict(zip(group_cols, key)), index=range(len(series)))
+        part[datetime_col] = series.index
+        part["observed"] = series.to_numpy(dtype=float)
+        part["trend"], part["seasonal"], part["resid"] = result.trend, result.seasonal, result.resid
+        parts.append(part)
+    columns = group_cols + [datetime_col, "observed", "trend", "seasonal", "resid"]
+    components = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=columns)
+    components.attrs["skipped"] = skipped
+    return components
+
+
+def render_components(components: pd.DataFrame) -> str:
+    fig, ax = plt.subplots(4, 1, figsize=(10, 8), sharex=True)
+    for axis, column, label in zip(ax, ["observed", "trend", "seasonal", "resid"], ["Observed", "Trend", "Seasonal", "Residual"]):
+        axis.plot(components[column], label=label)
+        axis.legend()
+    plt.tight_layout()
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches='tight')
+    plt.close(fig)
+    return base64.b64encode(buf.getvalue()).decode('utf-8')
+
+
+def downsample_components(components: pd.DataFrame, max_points: int) -> pd.DataFrame:
+    # Min/max decimation on the observed series: each bucket keeps the rows
+    # holding its extremes, so spikes survive while the point count is bounded.
+    n = len(components)
+    if max_points <= 0 or n <= max_points:
+        return components
+    bucket = int(np.ceil(n / (max_points // 2 or 1)))
+    values = components["observed"].to_numpy(dtype=float)
+    padded = np.full(int(np.ceil(n / bucket)) * bucket, np.nan)
+    padded[:n] = values
+    padded[n:] = values[-1]
+    blocks = padded.reshape(-1, bucket)
+    offsets = np.arange(0, blocks.shape[0] * bucket, bucket)
+    positions = np.concatenate([offsets + np.nanargmin(blocks, axis=1), offsets + np.nanargmax(blocks, axis=1)])
+    positions = np.unique(np.clip(positions, 0, n - 1))
+    return components.iloc[positions]
+
+
+def parse_content(file_content: bytes, filename: str) -> tuple:
+    eda = TimeSeriesEDA(file_content, filename)
+    return eda.df, eda.sep
+
+
+def load_saved(csv_path: Path, columns: Optional[list] = None) -> tuple:
+    eda = TimeSeriesEDA.from_saved(csv_path, columns=columns)
+    return eda.df, eda.sep
+
+
+def export_saved_csv(csv_path: Path, columns: Optional[list] = None) -> bytes:
+    return TimeSeriesEDA.from_saved(csv_path, columns=columns).save_cleaned_csv()
+
+
+def export_slice(csv_path: Path, columns: Optional[list] = None, offset: int = 0, limit: Optional[int] = None,
+                 fmt: str = "csv") -> tuple:
+    df, total = read_slice(csv_path, columns=columns, offset=offset, limit=limit)
+    if fmt == "json":
+        body = long_format(df)
+    elif fmt == "arrow":
+        body = to_arrow_ipc(df)
+    else:
+        body = df.to_csv(index=False).encode()
+    return body, len(df), total
+
+
+def dataset_summary(csv_path: Path, columns: Optional[list] = None) -> dict:
+    """describe()-style statistics per column, computed where the data lives."""
+    df = read_columnar(csv_path, columns=columns)
+    nulls = df.isnull().sum()
+    summary = {}
+    for column in df.columns:
+        series = df[column]
+        stats = {"dtype": str(series.dtype), "count": int(series.notna().sum()), "nulls": int(nulls[column])}
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            described = series.describe()
+            stats.update({k: None if pd.isna(v) else float(v) for k, v in described.drop("count").items()})
+        else:
+            counts = series.value_counts()
+            stats.update(unique=int(len(counts)), top=None if counts.empty else str(counts.index[0]),
+                         freq=None if counts.empty else int(counts.iloc[0]))
+        summary[column] = stats
+    return {"rows": len(df), "columns": summary}
+
+
+def export_resampled_csv(csv_path: Path, datetime_col: str, freq: str, agg: str = 'mean',
+                         columns: Optional[list] = None, chunksize: int = 100000, group_cols: Optional[list] = None) -> bytes:
+    resampled = stream_resample(csv_path, datetime_col, freq, agg=agg, columns=columns, chunksize=chunksize, group_cols=group_cols)
+    return resampled.to_csv(index=False).encode()
+
+
+def run_eda_method(df: pd.DataFrame, filename: str, sep: str, method: str, *args, **kwargs):
+    # Entry point for pool workers: the frame arrives pickled, so it is already a private copy.
+    eda = TimeSeriesEDA.__new__(TimeSeriesEDA)
+    eda.file_content = None
+    eda.filename = filename
+    eda.sep = sep
+    eda.df = df
+    return getattr(eda, method)(*args, **kwargs)
@@ -0,0 +1,124 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+
+
+class PoolSaturatedError(RuntimeError):
+    pass
+
+
+class ClientDisconnectedError(RuntimeError):
+    pass
+
+
+def timed_call(fn: Callable, *args, **kwargs):
+    # Runs in the worker, so the caller can tell compute time from queueing and transfer.
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+class BoundedProcessPool:
+    """Process pool that refuses work once ``max_workers + max_queue`` tasks are in flight."""
+
+    def __init__(self, max_workers: int, max_queue: int, start_method: str = "spawn"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.start_method = start_method
+        self.in_flight = 0
+        self.rejected = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+            )
+        return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor):
+        # A worker died (e.g. out of memory) and took the pool with it; the next call starts a fresh one.
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _task_done(self, _future):
+        with self._lock:
+            self.in_flight -= 1
+
+    def submit(self, fn: Callable, *args, **kwargs):
+        with self._lock:
+            if self.in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise PoolSaturatedError("Server is busy, retry shortly.")
+            self.in_flight += 1
+        try:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(fn, *args, **kwargs)
+            except BrokenProcessPool:
+                self._discard_executor(executor)
+                future = self._get_executor().submit(fn, *args, **kwargs)
+        except Exception:
+            self._task_done(None)
+            raise
+        future.add_done_callback(self._task_done)
+        return future
+
+    async def run(self, fn: Callable, *args,
+                  is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+                  poll_interval: float = 0.5, **kwargs):
+        for attempt in range(2):
+            future = self.submit(fn, *args, **kwargs)
+            executor = self._executor
+            wrapped = asyncio.wrap_future(future)
+            while True:
+                done, _ = await asyncio.wait({wrapped}, timeout=poll_interval)
+                if done:
+                    break
+                if is_disconnected is not None and await is_disconnected():
+                    # Queued work is dropped; a task already running finishes and is discarded.
+                    future.cancel()
+                    raise ClientDisconnectedError("Client disconnected before the result was ready.")
+            try:
+                return wrapped.result()
+            except BrokenProcessPool:
+                # The pool broke while this task was queued or running; retry it once on a fresh pool.
+                self._discard_executor(executor)
+                if attempt:
+                    raise
+
+    def queue_depth(self) -> int:
+        with self._lock:
+            return max(0, self.in_flight - self.max_workers)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "queued": max(0, self.in_flight - self.max_workers),
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+eda_pool = BoundedProcessPool(
+    max_workers=int(os.getenv("EDA_WORKERS", str(max(1, (os.cpu_count() or 2) - 1)))),
+    max_queue=int(os.getenv("EDA_MAX_QUEUE", "8")),
+)
@@ -0,0 +1,149 @@
+from pathlib import Path
+import io
+import zlib
+from typing import Iterable, Iterator, Optional
+
+import pandas as pd
+
+from src.columnar import pa, feather
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+EXPORT_CHUNK_ROWS = 65536
+GZIP_LEVEL = 6
+EXPORT_FORMATS = {"csv": ("text/csv", ".csv"), "parquet": ("application/vnd.apache.parquet", ".parquet")}
+COMPRESSIONS = {"gzip": ("application/gzip", ".gz"), "zstd": ("application/zstd", ".zst")}
+
+
+class _Drain(io.RawIOBase):
+    """Write target that hands out whatever has been written since the last ``take``."""
+
+    def __init__(self):
+        self.parts = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def frame_chunks(df: pd.DataFrame, rows: int = EXPORT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    # An empty frame is still one chunk, so the export carries its header or schema.
+    for start in range(0, max(len(df), 1), rows):
+        yield df.iloc[start:start + rows]
+
+
+def arrow_file_batches(path: Path, rows: int = EXPORT_CHUNK_ROWS):
+    # Memory-mapped, so only the batch being serialized is ever resident.
+    with pa.memory_map(str(path)) as source:
+        reader = pa.ipc.open_file(source)
+        if reader.num_record_batches == 0:
+            yield pa.RecordBatch.from_pylist([], schema=reader.schema)
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            for start in range(0, batch.num_rows, rows):
+                yield batch.slice(start, rows)
+
+
+def frame_schema(df: pd.DataFrame):
+    """Arrow schema of a whole frame, so every chunk of it is converted alike.
+
+    Inferred chunk by chunk, a column that is all null in the first chunk (or
+    an object column holding different types further down) would not match
+    the schema the Parquet writer was opened with.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is required for Parquet output.")
+    try:
+        return pa.Schema.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        raise ValueError(f"Cannot write this data as Parquet: {e}")
+
+
+def iter_csv(chunks: Iterable, sep: str = ",") -> Iterator[bytes]:
+    """CSV bytes chunk by chunk; ``chunks`` are DataFrames or Arrow record batches."""
+    header = True
+    for chunk in chunks:
+        frame = chunk if isinstance(chunk, pd.DataFrame) else chunk.to_pandas()
+        yield frame.to_csv(index=False, sep=sep, header=header).encode()
+        header = False
+
+
+def iter_parquet(chunks: Iterable, schema=None) -> Iterator[bytes]:
+    """Parquet bytes with one row group per chunk; the footer comes out when the chunks run out.
+
+    DataFrame chunks need the ``schema`` of the whole frame (see ``frame_schema``).
+    """
+    if pq is None:
+        raise RuntimeError("pyarrow is required for Parquet output.")
+    drain, writer = _Drain(), None
+    try:
+        for chunk in chunks:
+            table = (pa.Table.from_pandas(chunk, schema=schema, preserve_index=False) if isinstance(chunk, pd.DataFrame)
+                     else pa.Table.from_batches([chunk]))
+            if writer is None:
+                writer = pq.ParquetWriter(pa.PythonFile(drain, mode="w"), table.schema)
+            writer.write_table(table.cast(writer.schema))
+            yield drain.take()
+    finally:
+        if writer is not None:
+            writer.close()
+    yield drain.take()
+
+
+def compress(chunks: Iterable[bytes], codec: Optional[str]) -> Iterator[bytes]:
+    """Compress a byte stream on the fly, flushing after every chunk so output keeps flowing."""
+    if codec is None:
+        yield from chunks
+        return
+    if codec == "gzip":
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+        return
+    if codec == "zstd":
+        if pa is None:
+            raise RuntimeError("pyarrow is required for zstd output.")
+        drain = _Drain()
+        stream = pa.CompressedOutputStream(pa.PythonFile(drain, mode="w"), "zstd")
+        for chunk in chunks:
+            stream.write(chunk)
+            stream.flush()
+            yield drain.take()
+        stream.close()
+        yield drain.take()
+        return
+    raise ValueError(f"Unknown compression '{codec}'. Use one of: {', '.join(COMPRESSIONS)}.")
+
+
+def export_stream(chunks: Iterable, fmt: str = "csv", compression: Optional[str] = None, sep: str = ",",
+                  schema=None) -> Iterator[bytes]:
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}.")
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}'. Use one of: {', '.join(COMPRESSIONS)}.")
+    body = iter_csv(chunks, sep) if fmt == "csv" else iter_parquet(chunks, schema)
+    return compress(body, compression)
+
+
+def export_media(filename: str, fmt: str = "csv", compression: Optional[str] = None) -> tuple:
+    """``(media type, download name)`` of an export, e.g. ``sales.parquet`` or ``sales.csv.gz``."""
+    media_type, suffix = EXPORT_FORMATS[fmt]
+    if fmt == "csv" and Path(filename).suffix:
+        suffix = Path(filename).suffix  # keeps .tsv for tab-separated uploads
+    name = f"{Path(filename).stem}{suffix}"
+    if compression is not None:
+        media_type, extra = COMPRESSIONS[compression]
+        name += extra
+    return media_type, name
@@ -1,69 +1,405 @@
+from contextlib import contextmanager
 from pathlib import Path
-import os
+import hashlib
+import logging
+import sqlite3
+import time
+import uuid
+from typing import Callable, Optional
+import pandas as pd
+from src.catalog import describe_dataset
+from src.columnar import write_columnar, columnar_path, file_hash
+from src.ingest import normalize_to_csv, Utf8Validator
+
+logger = logging.getLogger(__name__)
 
 DATA_DIR = Path("data")
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+CHUNK_SIZE = 1024 * 1024
+
+CATALOG_COLUMNS = {
+    "rows": "INTEGER", "n_columns": "INTEGER", "datetime_col": "TEXT", "date_min": "TEXT", "date_max": "TEXT",
+    "group_col": "TEXT", "group_count": "INTEGER",
+}
+CATALOG_SORTS = ("name", "created_at", "size", "rows", "date_min", "date_max", "group_count")
+
+
+class FileTooLargeError(ValueError):
+    pass
+
+
+def stream_to_file(uploaded_file, file_path: Path, max_mb: Optional[int] = None,
+                   on_chunk: Optional[Callable[[bytes], None]] = None) -> str:
+    """Copy an upload to disk chunk by chunk, hashing as it goes.
+
+    Writes to a temporary name first so a rejected or failed upload never
+    replaces an existing dataset. ``on_chunk`` sees every chunk as it is written.
+    """
+    limit = max_mb * 1024 * 1024 if max_mb is not None else None
+    tmp_path = file_path.with_name(f".{file_path.name}.{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+    uploaded_file.seek(0)
+    try:
+        with open(tmp_path, "wb") as f:
+            for chunk in iter(lambda: uploaded_file.read(CHUNK_SIZE), b""):
+                size += len(chunk)
+                if limit is not None and size > limit:
+                    raise FileTooLargeError(f"File size exceeds {max_mb} MB limit.")
+                digest.update(chunk)
+                if on_chunk is not None:
+                    on_chunk(chunk)
+                f.write(chunk)
+        tmp_path.replace(file_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return digest.hexdigest()
+
+
+class DatasetStore:
+    """Content-addressed dataset files behind a name index.
+
+    Each distinct upload is stored once as ``blobs/<h[:2]>/<sha256>.csv`` (with
+    its columnar copy alongside). The names users see live in a small SQLite
+    index pointing at a hash, so rename and delete only touch the index and an
+    upload whose content is already stored writes nothing new. Blobs no name
+    refers to any more are removed by ``collect_garbage``.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.blob_dir = self.root / "blobs"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.root / "index.sqlite"
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS blobs (
+                    hash TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL
+                );
+                -- One row per column of each blob, so "has column X" filters use an index.
+                CREATE TABLE IF NOT EXISTS blob_columns (
+                    hash TEXT NOT NULL REFERENCES blobs(hash),
+                    position INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    dtype TEXT,
+                    type TEXT,
+                    distinct_count INTEGER,
+                    PRIMARY KEY (hash, position)
+                );
+                CREATE INDEX IF NOT EXISTS blob_columns_name ON blob_columns(name);
+                CREATE TABLE IF NOT EXISTS names (
+                    name TEXT PRIMARY KEY,
+                    hash TEXT NOT NULL REFERENCES blobs(hash),
+                    created_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS names_hash ON names(hash);
+                -- Next free "(n)" suffix per base name, so increments never probe name by name.
+                CREATE TABLE IF NOT EXISTS name_counters (
+                    base TEXT PRIMARY KEY,
+                    next INTEGER NOT NULL
+                );""")
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(blobs)")}
+            for column, kind in CATALOG_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE blobs ADD COLUMN {column} {kind}")
+            for column in ("rows", "size", "date_min", "date_max", "group_count"):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS blobs_{column} ON blobs({column})")
+            conn.execute("CREATE INDEX IF NOT EXISTS names_created_at ON names(created_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        # Write lock for read-then-write sequences (name checks followed by inserts).
+        conn = self._connect()
+        conn.isolation_level = None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def blob_path(self, content_hash: str) -> Path:
+        return self.blob_dir / content_hash[:2] / f"{content_hash}.csv"
+
+    def resolve(self, name: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT hash FROM names WHERE name = ?", (name,)).fetchone()
+        return None if row is None else row["hash"]
+
+    def exists(self, name: str) -> bool:
+        return self.resolve(name) is not None
+
+    def dataset_path(self, name: str) -> Path:
+        content_hash = self.resolve(name)
+        if content_hash is None:
+            raise FileNotFoundError(f"File '{name}' not found.")
+        return self.blob_path(content_hash)
+
+    def names(self) -> list:
+        with self._connect() as conn:
+            return [row["name"] for row in conn.execute("SELECT name FROM names ORDER BY name")]
 
-def save_dataset(uploaded_file, filename, mode="error"):
-    file_path = DATA_DIR / filename
+    def ingest(self, uploaded_file, max_mb: Optional[int] = None) -> tuple:
+        """Store an upload's content, returning ``(hash, stored)``; ``stored`` is False for a duplicate.
 
-    if file_path.exists():
-        if mode == "overwrite":
-            uploaded_file.seek(0)
-            with open(file_path, "wb") as f:
-                f.write(uploaded_file.read())
-            return str(file_path)
+        Compressed, binary and non-UTF-8 uploads are stored as the UTF-8 CSV
+        they decode to, so the hash (and deduplication) follows the data rather
+        than how it was packed. ``max_mb`` limits the upload as sent.
+        """
+        staging = self.blob_dir / f".{uuid.uuid4().hex}.upload"
+        decoded = staging.with_suffix(".csv")
+        try:
+            validator = Utf8Validator()
+            content_hash = stream_to_file(uploaded_file, staging, max_mb=max_mb, on_chunk=validator.update)
+            normalized_hash = normalize_to_csv(staging, decoded, utf8=validator.finish())
+            if normalized_hash is not None:
+                return normalized_hash, self._place(decoded, normalized_hash)
+            return content_hash, self._place(staging, content_hash)
+        finally:
+            staging.unlink(missing_ok=True)
+            decoded.unlink(missing_ok=True)
 
-        elif mode == "increment":
-            file_path = increment_filename(file_path)
-            uploaded_file.seek(0)
-            with open(file_path, "wb") as f:
-                f.write(uploaded_file.read())
-            return str(file_path)
+    def _place(self, source: Path, content_hash: str, sidecar: Optional[Path] = None) -> bool:
+        """Move ``source`` (and its columnar ``sidecar``, if one exists) into the store.
 
-        elif mode == "rename":
-            raise ValueError("For 'rename' mode, call save_dataset() with the new filename explicitly.")
+        Returns False when the content is already stored. The ``blobs`` row, not
+        the file, is what marks content as stored, so a file left behind by an
+        interrupted placement is replaced rather than taken for a duplicate. If
+        the columnar copy, the row or the catalog entry cannot be written, the
+        files are moved back and the row removed before the error propagates.
+        """
+        blob = self.blob_path(content_hash)
+        with self._connect() as conn:
+            known = conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (content_hash,)).fetchone() is not None
+        if known and blob.exists():
+            return False
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        size = source.stat().st_size
+        source.replace(blob)
+        inserted = False
+        try:
+            if sidecar is not None:
+                sidecar.replace(columnar_path(blob))
+            else:
+                write_columnar(blob, content_hash=content_hash)
+            with self._connect() as conn:
+                inserted = conn.execute("INSERT OR IGNORE INTO blobs (hash, size, created_at) VALUES (?, ?, ?)",
+                                        (content_hash, size, time.time())).rowcount == 1
+            self._catalog(content_hash)
+        except BaseException:
+            if sidecar is not None and columnar_path(blob).exists():
+                columnar_path(blob).replace(sidecar)
+            else:
+                columnar_path(blob).unlink(missing_ok=True)
+            blob.replace(source)
+            if inserted:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM blob_columns WHERE hash = ?", (content_hash,))
+                    conn.execute("DELETE FROM blobs WHERE hash = ?", (content_hash,))
+            raise
+        return True
 
-        else:
-            raise FileExistsError(f"File '{filename}' already exists.")
+    def _catalog(self, content_hash: str):
+        # Profiled once per distinct content; every name pointing at it shares the entry.
+        try:
+            entry = describe_dataset(self.blob_path(content_hash))
+        except Exception as e:
+            logger.warning(f"Could not catalog blob {content_hash}: {e}")
+            return
+        with self._connect() as conn:
+            conn.execute("UPDATE blobs SET rows = ?, n_columns = ?, datetime_col = ?, date_min = ?, date_max = ?, "
+                         "group_col = ?, group_count = ? WHERE hash = ?",
+                         (entry["rows"], len(entry["columns"]), entry["datetime_col"], entry["date_min"], entry["date_max"],
+                          entry["group_col"], entry["group_count"], content_hash))
+            conn.execute("DELETE FROM blob_columns WHERE hash = ?", (content_hash,))
+            conn.executemany("INSERT INTO blob_columns (hash, position, name, dtype, type, distinct_count) VALUES (?, ?, ?, ?, ?, ?)",
+                             [(content_hash, i, c["name"], c["dtype"], c["type"], c["distinct"]) for i, c in enumerate(entry["columns"])])
 
-    else:
-        uploaded_file.seek(0)
-        with open(file_path, "wb") as f:
-            f.write(uploaded_file.read())
-        return str(file_path)
+    def backfill_catalog(self) -> int:
+        """Profile blobs stored before the catalog existed."""
+        with self._connect() as conn:
+            pending = [row["hash"] for row in conn.execute("SELECT hash FROM blobs WHERE rows IS NULL")]
+        for content_hash in pending:
+            self._catalog(content_hash)
+        return len(pending)
 
+    def catalog(self, name: Optional[str] = None, search: Optional[str] = None, column: Optional[str] = None,
+                min_rows: Optional[int] = None, max_rows: Optional[int] = None,
+                date_from: Optional[str] = None, date_to: Optional[str] = None, grouped: Optional[bool] = None,
+                sort: str = "name", order: str = "asc", limit: int = 100, offset: int = 0) -> dict:
+        """Filtered, sorted page of catalog entries; one indexed query plus one for the page's schemas."""
+        if sort not in CATALOG_SORTS:
+            raise ValueError(f"Unknown sort '{sort}'. Choose from {', '.join(CATALOG_SORTS)}.")
+        if order not in ("asc", "desc"):
+            raise ValueError("'order' must be 'asc' or 'desc'.")
+        where, args = [], []
+        if name is not None:
+            where.append("n.name = ?"); args.append(name)
+        if search:
+            where.append("n.name LIKE ? ESCAPE '\\'")
+            args.append("%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        if column:
+            where.append("EXISTS (SELECT 1 FROM blob_columns c WHERE c.hash = b.hash AND c.name = ?)"); args.append(column)
+        if min_rows is not None:
+            where.append("b.rows >= ?"); args.append(min_rows)
+        if max_rows is not None:
+            where.append("b.rows <= ?"); args.append(max_rows)
+        # Date filters select datasets whose range overlaps [date_from, date_to].
+        if date_from:
+            where.append("b.date_max >= ?"); args.append(str(pd.Timestamp(date_from)))
+        if date_to:
+            where.append("b.date_min <= ?"); args.append(str(pd.Timestamp(date_to)))
+        if grouped is not None:
+            where.append("b.group_col IS NOT NULL" if grouped else "b.group_col IS NULL")
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+        sort_column = "n.name" if sort == "name" else "n.created_at" if sort == "created_at" else f"b.{sort}"
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM names n JOIN blobs b ON b.hash = n.hash{clause}", args).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT n.name, n.created_at, b.hash, b.size, b.rows, b.n_columns, b.datetime_col, b.date_min, b.date_max, "
+                f"b.group_col, b.group_count FROM names n JOIN blobs b ON b.hash = n.hash{clause} "
+                f"ORDER BY {sort_column} {order.upper()}, n.name LIMIT ? OFFSET ?", args + [limit, offset]).fetchall()
+            hashes = sorted({row["hash"] for row in rows})
+            schemas = {}
+            if hashes:
+                marks = ",".join("?" * len(hashes))
+                for c in conn.execute(f"SELECT * FROM blob_columns WHERE hash IN ({marks}) ORDER BY hash, position", hashes):
+                    schemas.setdefault(c["hash"], []).append(
+                        {"name": c["name"], "dtype": c["dtype"], "type": c["type"], "distinct": c["distinct_count"]})
+        items = [dict(row, columns=schemas.get(row["hash"], [])) for row in rows]
+        return {"total": total, "limit": limit, "offset": offset, "items": items}
 
-def increment_filename(path: Path):
-    counter = 1
-    new_path = path
-    while new_path.exists():
-        new_stem = f"{path.stem} ({counter})"
-        new_path = path.with_name(new_stem + path.suffix)
-        counter += 1
-    return new_path
+    def _next_name(self, conn: sqlite3.Connection, name: str, reserve: bool) -> str:
+        path = Path(name)
+        row = conn.execute("SELECT next FROM name_counters WHERE base = ?", (name,)).fetchone()
+        stored = counter = row["next"] if row else 1
+        candidate = f"{path.stem} ({counter}){path.suffix}"
+        # Only names saved explicitly (e.g. a suggestion used with mode="error") can collide;
+        # the counter is moved past them so they are probed once.
+        while conn.execute("SELECT 1 FROM names WHERE name = ?", (candidate,)).fetchone():
+            counter += 1
+            candidate = f"{path.stem} ({counter}){path.suffix}"
+        if reserve or counter != stored:
+            conn.execute("INSERT OR REPLACE INTO name_counters (base, next) VALUES (?, ?)", (name, counter + reserve))
+        return candidate
+
+    def suggest_name(self, name: str) -> str:
+        with self._connect() as conn:
+            if not conn.execute("SELECT 1 FROM names WHERE name = ?", (name,)).fetchone():
+                return name
+            return self._next_name(conn, name, reserve=False)
+
+    def bind(self, name: str, content_hash: str, mode: str = "error") -> str:
+        """Point ``name`` at stored content; returns the name actually used."""
+        with self._transaction() as conn:
+            taken = conn.execute("SELECT 1 FROM names WHERE name = ?", (name,)).fetchone()
+            if taken and mode == "overwrite":
+                conn.execute("UPDATE names SET hash = ?, created_at = ? WHERE name = ?", (content_hash, time.time(), name))
+                return name
+            if taken and mode == "increment":
+                name = self._next_name(conn, name, reserve=True)
+            elif taken and mode == "rename":
+                raise ValueError("For 'rename' mode, call save_dataset() with the new filename explicitly.")
+            elif taken:
+                raise FileExistsError(f"File '{name}' already exists.")
+            conn.execute("INSERT INTO names (name, hash, created_at) VALUES (?, ?, ?)", (name, content_hash, time.time()))
+            return name
+
+    def rename(self, old_name: str, new_name: str):
+        with self._transaction() as conn:
+            if not conn.execute("SELECT 1 FROM names WHERE name = ?", (old_name,)).fetchone():
+                raise FileNotFoundError(f"File '{old_name}' not found.")
+            if conn.execute("SELECT 1 FROM names WHERE name = ?", (new_name,)).fetchone():
+                raise FileExistsError(f"File '{new_name}' already exists.")
+            conn.execute("UPDATE names SET name = ? WHERE name = ?", (new_name, old_name))
+
+    def delete(self, name: str):
+        with self._connect() as conn:
+            if conn.execute("DELETE FROM names WHERE name = ?", (name,)).rowcount == 0:
+                raise FileNotFoundError(f"File '{name}' not found.")
+
+    def collect_garbage(self) -> int:
+        """Remove blobs no name points at. Run while no upload is in progress (at startup)."""
+        with self._transaction() as conn:
+            orphans = [row["hash"] for row in conn.execute(
+                "SELECT hash FROM blobs WHERE NOT EXISTS (SELECT 1 FROM names WHERE names.hash = blobs.hash)")]
+            conn.executemany("DELETE FROM blob_columns WHERE hash = ?", [(h,) for h in orphans])
+            conn.executemany("DELETE FROM blobs WHERE hash = ?", [(h,) for h in orphans])
+        for content_hash in orphans:
+            blob = self.blob_path(content_hash)
+            blob.unlink(missing_ok=True)
+            columnar_path(blob).unlink(missing_ok=True)
+            if not any(blob.parent.iterdir()):
+                blob.parent.rmdir()
+        return len(orphans)
+
+    def import_legacy(self) -> int:
+        """Move CSVs saved directly under the data directory into the store, keeping their names."""
+        imported = 0
+        for csv_path in sorted(self.root.glob("*.csv")):
+            if self.exists(csv_path.name):
+                continue
+            content_hash = file_hash(csv_path)
+            sidecar = columnar_path(csv_path)
+            self._place(csv_path, content_hash, sidecar=sidecar if sidecar.exists() else None)
+            csv_path.unlink(missing_ok=True)
+            sidecar.unlink(missing_ok=True)
+            self.bind(csv_path.name, content_hash)
+            imported += 1
+        return imported
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            row = conn.execute("SELECT (SELECT COUNT(*) FROM names) AS names, COUNT(*) AS blobs, "
+                               "COALESCE(SUM(size), 0) AS bytes FROM blobs").fetchone()
+            referenced = conn.execute("SELECT COALESCE(SUM(b.size), 0) FROM names n JOIN blobs b ON b.hash = n.hash").fetchone()[0]
+        return {"names": row["names"], "blobs": row["blobs"], "stored_bytes": row["bytes"], "logical_bytes": referenced}
+
+
+dataset_store = DatasetStore(DATA_DIR)
+
+
+def dataset_path(filename: str) -> Path:
+    return dataset_store.dataset_path(filename)
+
+
+def save_dataset(uploaded_file, filename, mode="error", max_mb: Optional[int] = None):
+    if mode not in ("overwrite", "increment") and dataset_store.exists(filename):
+        # Fail before reading the upload; bind() re-checks under the index lock.
+        dataset_store.bind(filename, "", mode=mode)
+    content_hash, _ = dataset_store.ingest(uploaded_file, max_mb=max_mb)
+    return dataset_store.bind(filename, content_hash, mode=mode)
+
+
+def increment_filename(filename: str) -> str:
+    return dataset_store.suggest_name(filename)
 
 def delete_dataset(filename: str):
-    file_path = DATA_DIR / filename
-    if file_path.exists():
-        file_path.unlink()
-    else:
-        raise FileNotFoundError(f"File '{filename}' not found.")
+    dataset_store.delete(filename)
 
 def rename_dataset(old_filename: str, new_filename: str):
-    old_path = DATA_DIR / old_filename
-    new_path = DATA_DIR / new_filename
-    if not old_path.exists():
-        raise FileNotFoundError(f"File '{old_filename}' not found.")
-    if new_path.exists():
-        raise FileExistsError(f"File '{new_filename}' already exists.")
-    old_path.rename(new_path)
+    dataset_store.rename(old_filename, new_filename)
 
 def file_size_limit(upload_file, max_mb: int = 10):
-    size = len(upload_file.file.read())
+    limit = max_mb * 1024 * 1024
+    size = 0
+    upload_file.file.seek(0)
+    for chunk in iter(lambda: upload_file.file.read(CHUNK_SIZE), b""):
+        size += len(chunk)
+        if size > limit:
+            break
     upload_file.file.seek(0)  # Reset cursor after reading
-    if size > max_mb * 1024 * 1024:
-        raise ValueError(f"File size exceeds {max_mb} MB limit.")
-
-
+    if size > limit:
+        raise FileTooLargeError(f"File size exceeds {max_mb} MB limit.")
@@ -0,0 +1,167 @@
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.dtw import dtw_batch
+
+
+class MinMaxScaling:
+    """Per-column min-max scaling fitted at training time and saved beside the model as ``scaler.json``.
+
+    ``transform`` and ``inverse_transform`` act on the last axis, which holds
+    ``columns`` (or the named subset of them) in that order.
+    """
+
+    def __init__(self, columns: Sequence[str], low, high, targets: Optional[Sequence[str]] = None):
+        self.columns = list(columns)
+        self.targets = list(targets) if targets is not None else list(columns)
+        self.low = np.asarray(low, dtype=np.float32)
+        self.high = np.asarray(high, dtype=np.float32)
+        # Constant columns map to 0 instead of dividing by zero.
+        self.span = np.where(self.high > self.low, self.high - self.low, 1).astype(np.float32)
+
+    @classmethod
+    def fit(cls, values: np.ndarray, columns: Sequence[str], targets: Optional[Sequence[str]] = None) -> "MinMaxScaling":
+        return cls(columns, np.nanmin(values, axis=0), np.nanmax(values, axis=0), targets)
+
+    def index(self, columns: Optional[Sequence[str]] = None) -> list:
+        if columns is None:
+            return list(range(len(self.columns)))
+        unknown = [c for c in columns if c not in self.columns]
+        if unknown:
+            raise ValueError(f"Columns not seen in training: {', '.join(unknown)}")
+        return [self.columns.index(c) for c in columns]
+
+    def transform(self, values: np.ndarray, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+        idx = self.index(columns)
+        return ((np.asarray(values, dtype=np.float32) - self.low[idx]) / self.span[idx]).astype(np.float32)
+
+    def inverse_transform(self, values: np.ndarray, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+        idx = self.index(columns)
+        return np.asarray(values, dtype=np.float32) * self.span[idx] + self.low[idx]
+
+    def to_dict(self) -> dict:
+        return {"columns": self.columns, "targets": self.targets, "low": self.low.tolist(), "high": self.high.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MinMaxScaling":
+        return cls(data["columns"], data["low"], data["high"], data.get("targets"))
+
+
+def recursive_forecast(predict_fn: Callable[[np.ndarray], np.ndarray], history: np.ndarray, horizon: int,
+                       target_idx: Optional[Sequence[int]] = None, exog_future: Optional[np.ndarray] = None,
+                       flatten_window: bool = False) -> np.ndarray:
+    """Roll a one-step model forward ``horizon`` steps for every series at once.
+
+    ``history`` is ``(n_series, window, n_features)``. Each step makes one
+    batched ``predict_fn`` call over all series, reading its input as a view
+    into a preallocated ``(n_series, window + horizon, n_features)`` buffer and
+    writing the prediction into the next slot. Features outside ``target_idx``
+    take their values from ``exog_future`` when given, otherwise the last known
+    value is carried forward. Returns ``(n_series, horizon, n_targets)``.
+    """
+    n_series, window, n_features = history.shape
+    targets = np.arange(n_features) if target_idx is None else np.asarray(target_idx)
+    others = np.setdiff1d(np.arange(n_features), targets)
+
+    buffer = np.empty((n_series, window + horizon, n_features), dtype=np.float32)
+    buffer[:, :window] = history
+    if len(others):
+        if exog_future is not None:
+            buffer[:, window:, others] = exog_future[:, :horizon, others]
+        else:
+            buffer[:, window:, others] = history[:, -1:, others]
+
+    for step in range(horizon):
+        inputs = buffer[:, step:step + window]
+        if flatten_window:
+            inputs = inputs.reshape(n_series, -1)
+        outputs = np.asarray(predict_fn(inputs)).reshape(n_series, -1)
+        buffer[:, window + step, targets] = outputs[:, :len(targets)]
+    return buffer[:, window:, targets]
+
+
+def last_windows(df: pd.DataFrame, group_col: Optional[str], datetime_col: Optional[str],
+                 feature_cols: Sequence[str], window: int) -> tuple:
+    """Stack the most recent ``window`` rows of every group into ``(n_groups, window, n_features)``.
+
+    Groups with fewer than ``window`` rows are skipped and reported separately.
+    """
+    sort_cols = [c for c in (group_col, datetime_col) if c is not None]
+    ordered = df.sort_values(sort_cols, kind="stable") if sort_cols else df
+    if group_col is None:
+        tail = ordered.tail(window)
+        if len(tail) < window:
+            return np.empty((0, window, len(feature_cols)), dtype=np.float32), [], [None]
+        return tail[list(feature_cols)].to_numpy(dtype=np.float32)[None], [None], []
+
+    tail = ordered.groupby(group_col, sort=True).tail(window)
+    sizes = tail.groupby(group_col, sort=True).size()
+    complete = sizes.index[sizes == window]
+    skipped = sizes.index[sizes < window].tolist()
+    tail = tail[tail[group_col].isin(complete)].sort_values(sort_cols, kind="stable")
+    values = tail[list(feature_cols)].to_numpy(dtype=np.float32)
+    return values.reshape(len(complete), window, len(feature_cols)), complete.tolist(), skipped
+
+
+def series_pairs(values: np.ndarray) -> np.ndarray:
+    # 1-D is one series; (series, horizon[, targets]) becomes one row per series and target.
+    if values.ndim == 1:
+        return values[None]
+    if values.ndim == 2:
+        return values
+    return np.moveaxis(values, 1, -1).reshape(-1, values.shape[1])
+
+
+def forecast_metrics(actual: np.ndarray, predicted: np.ndarray, dtw_window: Optional[int] = None) -> dict:
+    actual = np.asarray(actual, dtype=float)
+    predicted = np.asarray(predicted, dtype=float).reshape(actual.shape)
+    # DTW per series and target over the horizon, averaged; a single series gives the plain distance.
+    dtw = float(np.mean(dtw_batch(series_pairs(actual), series_pairs(predicted), window=dtw_window)))
+    actual, predicted = actual.ravel(), predicted.ravel()
+    errors = predicted - actual
+    eps = np.finfo(float).eps
+    return {
+        # outputs/*/metrics.json store mean_squared_error under "rmse" (as in the notebooks), kept for comparability.
+        "rmse": float(np.mean(errors ** 2)),
+        "mae": float(np.mean(np.abs(errors))),
+        "mape": float(np.mean(np.abs(errors) / np.maximum(np.abs(actual), eps))),
+        "dtw": dtw,
+    }
+
+
+class MetricAccumulator:
+    """Running sums for the metrics.json metrics, so origins never need to be kept around."""
+
+    def __init__(self, dtw_window: Optional[int] = None):
+        self.dtw_window = dtw_window
+        self.count = 0
+        self.sq_sum = 0.0
+        self.abs_sum = 0.0
+        self.ape_sum = 0.0
+        self.dtw_sum = 0.0
+        self.dtw_pairs = 0
+
+    def update(self, actual: np.ndarray, predicted: np.ndarray):
+        actual, predicted = np.asarray(actual, dtype=float), np.asarray(predicted, dtype=float)
+        errors = predicted - actual
+        self.count += errors.size
+        self.sq_sum += float(np.sum(errors ** 2))
+        self.abs_sum += float(np.sum(np.abs(errors)))
+        self.ape_sum += float(np.sum(np.abs(errors) / np.maximum(np.abs(actual), np.finfo(float).eps)))
+        dtw = dtw_batch(series_pairs(actual), series_pairs(predicted), window=self.dtw_window)
+        self.dtw_sum += float(dtw.sum())
+        self.dtw_pairs += len(dtw)
+
+    def result(self) -> dict:
+        if not self.count:
+            return {"rmse": None, "mae": None, "mape": None, "dtw": None, "count": 0}
+        return {
+            # Same convention as outputs/*/metrics.json: "rmse" holds the mean squared error.
+            "rmse": self.sq_sum / self.count,
+            "mae": self.abs_sum / self.count,
+            "mape": self.ape_sum / self.count,
+            "dtw": self.dtw_sum / self.dtw_pairs,
+            "count": self.count,
+        }
@@ -0,0 +1,218 @@
+from pathlib import Path
+import codecs
+import gzip
+import hashlib
+import io
+from typing import Optional
+
+import pandas as pd
+
+from src.columnar import pa, SNIFF_BYTES, sniff_separator
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+COPY_CHUNK = 1024 * 1024
+# Leading bytes of each binary format; an IPC stream opens with the 0xFFFFFFFF continuation marker.
+MAGIC = [
+    (b"\x1f\x8b", "gzip"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+    (b"PAR1", "parquet"),
+    (b"ARROW1", "arrow"),
+    (b"\xff\xff\xff\xff", "arrow"),
+]
+EXTENSIONS = {".gz": "gzip", ".zst": "zstd", ".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow"}
+
+
+def detect_format(head: bytes, filename: Optional[str] = None) -> str:
+    """``csv``, ``gzip``, ``zstd``, ``parquet`` or ``arrow``, from the magic bytes and then the extension."""
+    for magic, fmt in MAGIC:
+        if head.startswith(magic):
+            return fmt
+    if filename:
+        return EXTENSIONS.get(Path(filename).suffix.lower(), "csv")
+    return "csv"
+
+
+def sniff_encoding(head: bytes) -> str:
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        # Not final: the sample may end in the middle of a multi-byte character.
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+class Utf8Validator:
+    """Strict incremental UTF-8 check fed chunk by chunk, e.g. while an upload is copied to disk."""
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self.valid = True
+
+    def update(self, chunk: bytes):
+        if self.valid:
+            try:
+                self._decoder.decode(chunk)
+            except UnicodeDecodeError:
+                self.valid = False
+
+    def finish(self) -> bool:
+        if self.valid:
+            try:
+                self._decoder.decode(b"", final=True)
+            except UnicodeDecodeError:
+                self.valid = False
+        return self.valid
+
+
+def sniff_text(head: bytes) -> tuple:
+    """``(encoding, separator)`` of delimited text, judged from its first bytes only."""
+    encoding = sniff_encoding(head)
+    return encoding, sniff_separator(head.decode(encoding, errors="ignore"))
+
+
+def _is_bytes(source) -> bool:
+    return isinstance(source, (bytes, bytearray, memoryview))
+
+
+def _open(source, fmt: str):
+    # ``source`` is raw bytes or a path; either way the result is a binary stream of the decompressed text.
+    if fmt == "zstd":
+        if pa is None:
+            raise ValueError("pyarrow is required to read zstd files.")
+        return pa.input_stream(pa.BufferReader(source) if _is_bytes(source) else str(source), compression="zstd")
+    if _is_bytes(source):
+        return gzip.GzipFile(fileobj=io.BytesIO(source)) if fmt == "gzip" else io.BytesIO(source)
+    return gzip.open(source, "rb") if fmt == "gzip" else open(source, "rb")
+
+
+def _read_table(source, fmt: str):
+    if pa is None:
+        raise ValueError(f"pyarrow is required to read {fmt} files.")
+    with (pa.BufferReader(source) if _is_bytes(source) else pa.memory_map(str(source))) as buffer:
+        if fmt == "parquet":
+            return pq.read_table(buffer)
+        try:
+            return pa.ipc.open_file(buffer).read_all()
+        except pa.ArrowInvalid:
+            buffer.seek(0)
+            return pa.ipc.open_stream(buffer).read_all()
+
+
+def _head(source, fmt: str) -> bytes:
+    with _open(source, fmt) as stream:
+        return stream.read(SNIFF_BYTES)
+
+
+def read_upload(source, filename: Optional[str] = None) -> tuple:
+    """Parse an upload (bytes or a path) into ``(df, sep)``.
+
+    Compressed CSV is decompressed while pandas reads it and plain CSV is
+    parsed straight from the bytes; only the first 64 KB are decoded up front
+    to pick the encoding and delimiter. Binary formats report ``,`` as their
+    separator, which is what exports of them use.
+    """
+    if _is_bytes(source):
+        head = bytes(source[:8])
+    else:
+        with open(source, "rb") as f:
+            head = f.read(8)
+    fmt = detect_format(head, filename)
+    try:
+        if fmt in ("parquet", "arrow"):
+            return _read_table(source, fmt).to_pandas(), ","
+        encoding, sep = sniff_text(_head(source, fmt))
+        try:
+            with _open(source, fmt) as stream:
+                return pd.read_csv(stream, sep=sep, encoding=encoding), sep
+        except UnicodeDecodeError:
+            if encoding != "utf-8":
+                raise
+        # The sniffed head was valid UTF-8 but a later byte is not; latin-1 reads any byte.
+        with _open(source, fmt) as stream:
+            return pd.read_csv(stream, sep=sep, encoding="latin-1"), sep
+    except Exception as e:
+        raise ValueError(f"Could not read file: {e}")
+
+
+def _write_csv_batches(batches, out, digest):
+    header = True
+    for batch in batches:
+        data = batch.to_pandas().to_csv(index=False, header=header).encode()
+        digest.update(data)
+        out.write(data)
+        header = False
+
+
+def normalize_to_csv(source: Path, target: Path, utf8: Optional[bool] = None) -> Optional[str]:
+    """Rewrite a stored upload as plain UTF-8 CSV at ``target`` and return its hash.
+
+    Returns None (and writes nothing) when the upload already is UTF-8 CSV.
+    ``utf8`` is whether the whole file decoded as UTF-8 (see ``Utf8Validator``);
+    when not given the file is read once to find out. Compressed and
+    re-encoded text is streamed through in fixed-size chunks; Parquet and
+    Arrow are written out record batch by record batch.
+    """
+    with open(source, "rb") as f:
+        fmt = detect_format(f.read(8))
+    try:
+        return _normalize(source, target, fmt, utf8)
+    except Exception as e:
+        raise ValueError(f"Could not decode upload as {fmt}: {e}")
+
+
+def _is_utf8(source: Path) -> bool:
+    validator = Utf8Validator()
+    with open(source, "rb") as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK), b""):
+            validator.update(chunk)
+    return validator.finish()
+
+
+def _normalize(source: Path, target: Path, fmt: str, utf8: Optional[bool] = None) -> Optional[str]:
+    digest = hashlib.sha256()
+    if fmt in ("parquet", "arrow"):
+        if pa is None:
+            raise ValueError(f"pyarrow is required to read {fmt} files.")
+        with open(target, "wb") as out:
+            if fmt == "parquet":
+                _write_csv_batches(pq.ParquetFile(str(source)).iter_batches(), out, digest)
+            else:
+                _write_csv_batches(_read_table(source, fmt).to_batches(), out, digest)
+        return digest.hexdigest()
+
+    encoding = sniff_encoding(_head(source, fmt))
+    if fmt == "csv" and encoding == "utf-8":
+        # The head alone decides nothing: non-UTF-8 bytes often first appear deep in a file.
+        if utf8 is None:
+            utf8 = _is_utf8(source)
+        if utf8:
+            return None
+        encoding = "latin-1"
+    if encoding == "utf-8":
+        try:
+            return _transcode(source, target, fmt, encoding, errors="strict")
+        except UnicodeDecodeError:
+            encoding = "latin-1"
+    return _transcode(source, target, fmt, encoding)
+
+
+def _transcode(source: Path, target: Path, fmt: str, encoding: str, errors: str = "replace") -> str:
+    digest = hashlib.sha256()
+    decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+    with _open(source, fmt) as stream, open(target, "wb") as out:
+        for chunk in iter(lambda: stream.read(COPY_CHUNK), b""):
+            data = decoder.decode(chunk).encode("utf-8")
+            digest.update(data)
+            out.write(data)
+        data = decoder.decode(b"", final=True).encode("utf-8")
+        digest.update(data)
+        out.write(data)
+    return digest.hexdigest()
@@ -0,0 +1,242 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from typing import Optional
+
+from src.file_ops import DATA_DIR
+
+JOBS_DB = Path(os.getenv("JOBS_DB", DATA_DIR / "jobs.sqlite"))
+FINAL_STATUSES = ("completed", "failed", "cancelled")
+
+
+class JobStore:
+    """SQLite-backed job table; the queue itself, so pending jobs outlive the API process."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    message TEXT,
+                    result TEXT,
+                    error TEXT,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )""")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call; API threads and worker processes share the file.
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _row(self, row: Optional[sqlite3.Row]) -> Optional[dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    def create(self, kind: str, params: dict) -> dict:
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute("INSERT INTO jobs (id, kind, params, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                         (job_id, kind, json.dumps(params), time.time()))
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._connect() as conn:
+            return self._row(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def list(self, status: Optional[str] = None, limit: int = 100) -> list:
+        query, args = "SELECT * FROM jobs", ()
+        if status is not None:
+            query, args = query + " WHERE status = ?", (status,)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY created_at DESC LIMIT ?", args + (limit,)).fetchall()
+        return [self._row(r) for r in rows]
+
+    def count(self, status: Optional[str] = None) -> int:
+        query, args = "SELECT COUNT(*) FROM jobs", ()
+        if status is not None:
+            query, args = query + " WHERE status = ?", (status,)
+        with self._connect() as conn:
+            return conn.execute(query, args).fetchone()[0]
+
+    def update(self, job_id: str, **fields):
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"])
+        columns = ", ".join(f"{k} = ?" for k in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", tuple(fields.values()) + (job_id,))
+
+    def claim_next(self) -> Optional[dict]:
+        # Claims the oldest queued job under a write lock so it is handed out once.
+        conn = self._connect()
+        conn.isolation_level = None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1").fetchone()
+            if row is not None:
+                conn.execute("UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (time.time(), row["id"]))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return None if row is None else self.get(row["id"])
+
+    def request_cancel(self, job_id: str):
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+            conn.execute("UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                         (time.time(), job_id))
+
+    def cancel_requested(self, job_id: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def requeue_running(self) -> int:
+        # Jobs left 'running' by a previous API process were lost with it; run them again.
+        with self._connect() as conn:
+            return conn.execute("UPDATE jobs SET status = 'queued', progress = 0, started_at = NULL, "
+                                "message = 'Requeued after restart' WHERE status = 'running'").rowcount
+
+
+def run_job(db_path: str, job_id: str) -> dict:
+    """Worker-process entry point; reports progress and honours cancellation through the job table."""
+    from src.training import train_model, TrainingCancelled
+    from src.backtest import run_backtest
+    from src.model_registry import MODELS_DIR
+    from src.file_ops import dataset_path
+
+    store = JobStore(db_path)
+    job = store.get(job_id)
+    params = job["params"]
+
+    def progress(fraction: float, message: str):
+        store.update(job_id, progress=round(fraction, 4), message=message)
+
+    try:
+        runners = {"train": train_model, "backtest": run_backtest}
+        if job["kind"] not in runners:
+            raise ValueError(f"Unknown job kind '{job['kind']}'.")
+        csv_path = dataset_path(params["dataset_name"])
+        result = runners[job["kind"]](params, MODELS_DIR, csv_path, progress=progress,
+                             should_stop=lambda: store.cancel_requested(job_id))
+    except TrainingCancelled as e:
+        store.update(job_id, status="cancelled", message=str(e), finished_at=time.time())
+        return {"status": "cancelled"}
+    except Exception as e:
+        store.update(job_id, status="failed", error=f"{type(e).__name__}: {e}",
+                     message=traceback.format_exc(limit=3), finished_at=time.time())
+        return {"status": "failed"}
+    store.update(job_id, status="completed", progress=1.0, result=result, finished_at=time.time())
+    return {"status": "completed", "result": result}
+
+
+class JobScheduler:
+    """Feeds queued jobs from the store into a process pool, at most ``max_workers`` at a time."""
+
+    def __init__(self, store: JobStore, max_workers: int = 1, start_method: str = "spawn", on_complete=None):
+        self.store = store
+        self.max_workers = max_workers
+        self.start_method = start_method
+        self.on_complete = on_complete
+        self._running = {}
+        self._executor = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        self._closed = False
+        self.store.requeue_running()
+        self._dispatch()
+
+    def submit(self, kind: str, params: dict) -> dict:
+        job = self.store.create(kind, params)
+        self._dispatch()
+        return self.store.get(job["id"])
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        job = self.store.get(job_id)
+        if job is None or job["status"] in FINAL_STATUSES:
+            return job
+        self.store.request_cancel(job_id)
+        return self.store.get(job_id)
+
+    def _dispatch(self):
+        submitted = []
+        with self._lock:
+            if self._closed:
+                return
+            while len(self._running) < self.max_workers:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                         mp_context=multiprocessing.get_context(self.start_method))
+                job = self.store.claim_next()
+                if job is None:
+                    break
+                try:
+                    future = self._executor.submit(run_job, str(self.store.path), job["id"])
+                except BrokenProcessPool:
+                    # A worker died and took the pool with it; hand the job back and start a fresh pool.
+                    self.store.update(job["id"], status="queued", started_at=None)
+                    self._executor.shutdown(wait=False)
+                    self._executor = None
+                    continue
+                self._running[job["id"]] = future
+                submitted.append((job["id"], future))
+        # Registered outside the lock: a future that is already done runs its callback inline,
+        # and _finished takes the lock itself.
+        for job_id, future in submitted:
+            future.add_done_callback(lambda f, job_id=job_id: self._finished(job_id, f))
+
+    def _finished(self, job_id: str, future):
+        with self._lock:
+            self._running.pop(job_id, None)
+            shutting_down = self._closed
+        if shutting_down:
+            # Left as 'running' so the next start() requeues it.
+            return
+        if future.cancelled():
+            self.store.update(job_id, status="cancelled", finished_at=time.time())
+        elif future.exception() is not None:
+            # The worker itself died (e.g. out of memory); its own handler never ran.
+            self.store.update(job_id, status="failed", error=f"{type(future.exception()).__name__}: {future.exception()}",
+                              finished_at=time.time())
+        if self.on_complete is not None:
+            self.on_complete(self.store.get(job_id))
+        self._dispatch()
+
+    def stats(self) -> dict:
+        with self._lock:
+            running = list(self._running)
+        return {"max_workers": self.max_workers, "running": running, "queued": self.store.count(status="queued")}
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._closed = True
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+job_store = JobStore(JOBS_DB)
+job_scheduler = JobScheduler(job_store, max_workers=int(os.getenv("TRAIN_WORKERS", "1")))
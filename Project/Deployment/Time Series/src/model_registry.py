@@ -0,0 +1,218 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import asyncio
+import json
+import os
+import threading
+from typing import Optional
+
+import numpy as np
+
+from src.forecasting import MinMaxScaling
+
+
+MODELS_DIR = Path(os.getenv("MODELS_DIR", Path(__file__).resolve().parents[3] / "outputs"))
+MODEL_FILENAME = "model.keras"
+SCALER_FILENAME = "scaler.json"
+HDF5_MAGIC = b"\x89HDF"
+
+
+def load_keras_model(path: Path):
+    import keras
+
+    # The training notebooks saved HDF5 under a .keras name; Keras 3 only
+    # reads that through its legacy loader.
+    with open(path, "rb") as f:
+        is_hdf5 = f.read(4) == HDF5_MAGIC
+    if is_hdf5 and int(keras.__version__.split(".")[0]) >= 3:
+        from keras.src.legacy.saving import legacy_h5_format
+        return legacy_h5_format.load_model_from_hdf5(str(path), compile=False)
+    return keras.models.load_model(path, compile=False)
+
+
+class ModelRegistry:
+    """Discovers ``outputs/<MODEL>/<strategy>/model.keras`` artifacts and keeps an LRU of loaded models."""
+
+    def __init__(self, root: Path, max_loaded: int = 4, loader=load_keras_model):
+        self.root = root
+        self.max_loaded = max_loaded
+        self.loader = loader
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._loaded = OrderedDict()
+        self._scalers = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def discover(self) -> dict:
+        models = {}
+        if not self.root.exists():
+            return models
+        for path in sorted(self.root.glob(f"**/{MODEL_FILENAME}")):
+            name = path.parent.relative_to(self.root).as_posix()
+            metrics_path = path.parent / "metrics.json"
+            models[name] = {
+                "name": name,
+                "architecture": name.split("/")[0],
+                "strategy": "/".join(name.split("/")[1:]),
+                "path": str(path),
+                "metrics": json.loads(metrics_path.read_text()) if metrics_path.exists() else None,
+                "scaled": (path.parent / SCALER_FILENAME).exists(),
+            }
+        return models
+
+    def path_for(self, name: str) -> Path:
+        path = (self.root / name / MODEL_FILENAME).resolve()
+        if self.root.resolve() not in path.parents or not path.exists():
+            raise KeyError(f"Model '{name}' not found.")
+        return path
+
+    def get(self, name: str):
+        with self._lock:
+            if name in self._loaded:
+                self._loaded.move_to_end(name)
+                self.hits += 1
+                return self._loaded[name]
+            self.misses += 1
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+        # Per-model lock so concurrent first requests load the artifact once.
+        with load_lock:
+            with self._lock:
+                if name in self._loaded:
+                    return self._loaded[name]
+            model = self.loader(self.path_for(name))
+            with self._lock:
+                self._loaded[name] = model
+                while len(self._loaded) > self.max_loaded:
+                    self._loaded.popitem(last=False)
+                    self.evictions += 1
+            return model
+
+    def scaler(self, name: str) -> Optional[MinMaxScaling]:
+        """The scaling a model was trained with; None for models saved without one (the notebook artifacts)."""
+        with self._lock:
+            if name in self._scalers:
+                return self._scalers[name]
+        path = self.path_for(name).parent / SCALER_FILENAME
+        scaler = MinMaxScaling.from_dict(json.loads(path.read_text())) if path.exists() else None
+        with self._lock:
+            self._scalers[name] = scaler
+        return scaler
+
+    def invalidate(self, name: str):
+        # Drops a loaded model (and its scaling) so the next get() picks up a retrained artifact.
+        with self._lock:
+            self._loaded.pop(name, None)
+            self._scalers.pop(name, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": list(self._loaded),
+                "max_loaded": self.max_loaded,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class MicroBatcher:
+    """Coalesces concurrent predict calls per model into one batched ``model.predict``.
+
+    A batch is flushed when it reaches ``max_batch`` samples or when the oldest
+    waiting request has waited ``max_wait_ms``, whichever comes first.
+    """
+
+    def __init__(self, registry: ModelRegistry, max_batch: int = 256, max_wait_ms: float = 5.0):
+        self.registry = registry
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.samples = 0
+        self._queues = {}
+        self._workers = {}
+        # TensorFlow calls are serialised on one thread; batching provides the parallelism.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="predict")
+
+    async def load(self, name: str):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.registry.get, name)
+
+    async def call(self, fn, *args):
+        # Runs fn on the predict thread, for callers that drive the model themselves.
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def predict(self, name: str, inputs: np.ndarray) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        queue = self._queues.get(name)
+        if queue is None:
+            queue = self._queues[name] = asyncio.Queue()
+            self._workers[name] = asyncio.create_task(self._run(name, queue))
+        future = loop.create_future()
+        await queue.put((inputs, future))
+        return await future
+
+    async def _run(self, name: str, queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await queue.get()]
+            size = len(pending[0][0])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                size += len(item[0])
+            await self._flush(name, pending)
+
+    async def _flush(self, name: str, pending: list):
+        loop = asyncio.get_running_loop()
+        try:
+            # Inside the try: mismatched input shapes must fail these requests, not the model's worker task.
+            batch = np.concatenate([inputs for inputs, _ in pending], axis=0)
+            model = await self.load(name)
+            outputs = await loop.run_in_executor(self._executor, lambda: model.predict(batch, verbose=0))
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.samples += len(batch)
+        offset = 0
+        for inputs, future in pending:
+            if not future.done():
+                future.set_result(outputs[offset:offset + len(inputs)])
+            offset += len(inputs)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "samples": self.samples,
+            "avg_batch_size": self.samples / self.batches if self.batches else 0.0,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+
+def model_input_shape(model) -> tuple:
+    shape = model.input_shape
+    if isinstance(shape, list):
+        shape = shape[0]
+    return tuple(shape[1:])
+
+
+model_registry = ModelRegistry(MODELS_DIR, max_loaded=int(os.getenv("MODEL_CACHE_SIZE", "4")))
+predict_batcher = MicroBatcher(
+    model_registry,
+    max_batch=int(os.getenv("PREDICT_MAX_BATCH", "256")),
+    max_wait_ms=float(os.getenv("PREDICT_MAX_WAIT_MS", "5")),
+)
@@ -0,0 +1,178 @@
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+HISTOGRAM_BINS = 10
+MAX_GROUPS_REPORTED = 1000
+
+
+def _delta_label(ns) -> Optional[str]:
+    return None if ns is None else str(pd.Timedelta(int(ns)))
+
+
+def _freq_alias(dominant_ns: int, stamps: np.ndarray) -> Optional[str]:
+    """Offset alias for the dominant step, anchored like pandas does for weeks and months."""
+    if dominant_ns is None:
+        return None
+    day = 86_400 * 10**9
+    index = pd.DatetimeIndex(stamps[:100_000])
+    if dominant_ns == 7 * day and index.dayofweek.nunique() == 1:
+        return f"W-{index[0].strftime('%a').upper()}"
+    if 28 * day <= dominant_ns <= 31 * day:
+        if (index.day == 1).all():
+            return "MS"
+        if index.is_month_end.all():
+            return "ME"
+    if 365 * day <= dominant_ns <= 366 * day and (index.dayofyear == 1).all():
+        return "YS"
+    if dominant_ns % day == 0:
+        return "D" if dominant_ns == day else f"{dominant_ns // day}D"
+    return pd.tseries.frequencies.to_offset(pd.Timedelta(dominant_ns)).freqstr
+
+
+def _offset_ns(freq: str) -> int:
+    # Calendar offsets have no fixed length; take the longest of a year's worth of steps.
+    offset = pd.tseries.frequencies.to_offset(freq)
+    if isinstance(offset, pd.offsets.Tick):
+        return int(offset.nanos)
+    anchor = pd.Timestamp("2001-01-01")
+    stamps = pd.DatetimeIndex([anchor + offset * k for k in range(1, 14)])
+    return int(np.diff(stamps.as_unit("ns").asi8).max())
+
+
+def group_codes(df: pd.DataFrame, group_cols: Optional[Sequence[str]]) -> tuple:
+    """Integer group code per row (hash-based, first-seen order) and the label of each group."""
+    if not group_cols:
+        return np.zeros(len(df), dtype=np.int64), [None]
+    codes = df.groupby(list(group_cols), sort=False, dropna=False).ngroup().to_numpy(dtype=np.int64)
+    # Codes follow first appearance, so each group starts where the running maximum steps up.
+    first = np.flatnonzero(np.diff(np.maximum.accumulate(codes), prepend=-1) > 0)
+    first_rows = df[list(group_cols)].iloc[first].astype(object)
+    first_rows = first_rows.where(first_rows.notna(), None)
+    labels = [row[0] if len(group_cols) == 1 else list(row)
+              for row in first_rows.itertuples(index=False, name=None)]
+    return codes, labels
+
+
+def analyze_regularity(dt: pd.Series, codes: Optional[np.ndarray] = None, labels: Optional[list] = None,
+                       freq: Optional[str] = None) -> dict:
+    """Dominant step, gaps, duplicates and out-of-order runs, overall and per group.
+
+    Rows are first placed group by group with a counting sort that keeps their
+    stored order inside each group; steps backwards in that order are the
+    out-of-order rows. Gaps, duplicates and the dominant step come from the
+    rows sorted by (group, time), which is skipped when nothing steps back.
+    Everything is array arithmetic, bincounts and one hashed value_counts of
+    the deltas; no calendar is materialised.
+    """
+    n = len(dt)
+    values = dt.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    valid = ~pd.isna(dt).to_numpy()
+    codes = np.zeros(n, dtype=np.int64) if codes is None else np.asarray(codes, dtype=np.int64)
+    labels = labels if labels is not None else [None]
+    values, codes = values[valid], codes[valid]
+    n_groups = len(labels)
+    m = len(values)
+
+    # Counting sort by group: position = group offset + running count within the group.
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    if m and (np.diff(codes) >= 0).all():
+        stored, stored_codes = values, codes
+    else:
+        rank = pd.Series(codes).groupby(codes).cumcount().to_numpy()
+        order = np.empty(m, dtype=np.int64)
+        order[starts[codes] + rank] = np.arange(m)
+        stored, stored_codes = values[order], codes[order]
+
+    stored_same = stored_codes[1:] == stored_codes[:-1]
+    stored_deltas, stored_delta_codes = np.diff(stored)[stored_same], stored_codes[1:][stored_same]
+    backwards = stored_deltas < 0
+    # A run starts where the sequence steps back after a forward (or first) step.
+    run_starts = backwards & ~np.concatenate([[False], backwards[:-1] & (stored_delta_codes[1:] == stored_delta_codes[:-1])])
+
+    if backwards.any():
+        order = np.lexsort((values, codes))
+        ordered, ordered_codes = values[order], codes[order]
+    else:
+        ordered, ordered_codes = stored, stored_codes
+    same_group = ordered_codes[1:] == ordered_codes[:-1]
+    deltas, delta_codes = np.diff(ordered)[same_group], ordered_codes[1:][same_group]
+    # Sorted within each group, so repeated timestamps are adjacent.
+    duplicate_mask = deltas == 0
+    duplicate_codes = delta_codes[duplicate_mask]
+
+    forward = deltas[deltas > 0]
+    histogram = pd.Series(forward).value_counts()
+    dominant = int(histogram.index[0]) if len(histogram) else None
+    if dominant is not None:
+        gap_mask = deltas > dominant
+        missing = np.where(gap_mask, np.maximum(deltas // dominant - 1, 0), 0)
+        largest_at = int(np.argmax(deltas)) if gap_mask.any() else None
+    else:
+        gap_mask, missing, largest_at = np.zeros(len(deltas), bool), np.zeros(len(deltas), np.int64), None
+
+    result = {
+        "rows": n,
+        "valid_rows": m,
+        "invalid_rows": n - m,
+        "groups": n_groups,
+        "start": str(pd.Timestamp(values.min())) if m else None,
+        "end": str(pd.Timestamp(values.max())) if m else None,
+        "dominant_delta": _delta_label(dominant),
+        "dominant_freq": _freq_alias(dominant, ordered[: min(m, 100_000)]) if dominant is not None else None,
+        "regular_ratio": float((deltas == dominant).mean()) if len(deltas) and dominant is not None else None,
+        "duplicates": int(duplicate_mask.sum()),
+        "gaps": int(gap_mask.sum()),
+        "missing_periods": int(missing.sum()),
+        "largest_gap": None if largest_at is None else {
+            "delta": _delta_label(deltas[largest_at]),
+            "after": str(pd.Timestamp(ordered[1:][same_group][largest_at] - deltas[largest_at])),
+        },
+        "out_of_order": int(backwards.sum()),
+        "out_of_order_runs": int(run_starts.sum()),
+        "delta_histogram": [{"delta": _delta_label(d), "count": int(c)} for d, c in histogram.head(HISTOGRAM_BINS).items()],
+    }
+
+    if n_groups > 1 or labels[0] is not None:
+        per = pd.DataFrame({
+            "rows": counts,
+            "duplicates": np.bincount(duplicate_codes, minlength=n_groups),
+            "gaps": np.bincount(delta_codes[gap_mask], minlength=n_groups),
+            "missing_periods": np.bincount(delta_codes, weights=missing, minlength=n_groups).astype(np.int64),
+            "out_of_order": np.bincount(stored_delta_codes[backwards], minlength=n_groups),
+        })
+        nonempty = counts > 0
+        per["start"], per["end"] = pd.NaT, pd.NaT
+        per.loc[nonempty, "start"] = pd.to_datetime(np.minimum.reduceat(ordered, starts[nonempty]))
+        per.loc[nonempty, "end"] = pd.to_datetime(np.maximum.reduceat(ordered, starts[nonempty]))
+        if len(forward):
+            forward_codes = delta_codes[deltas > 0]
+            on_step = np.bincount(forward_codes[forward == dominant], minlength=n_groups)
+            steps = np.bincount(forward_codes, minlength=n_groups)
+            per["dominant_delta"] = np.where(steps > 0, _delta_label(dominant), None)
+            # The overall step is each group's own mode when it covers most of its deltas;
+            # only the remaining groups need a per-group histogram.
+            unsure = np.flatnonzero((steps > 0) & (2 * on_step <= steps))
+            if len(unsure):
+                keep = np.isin(forward_codes, unsure)
+                pairs = pd.DataFrame({"g": forward_codes[keep], "d": forward[keep]}).value_counts()
+                modes = pairs.groupby(level="g").idxmax()
+                per.loc[modes.index, "dominant_delta"] = [_delta_label(d) for _, d in modes]
+        per.insert(0, "group", pd.Series(labels, dtype=object))
+        per["start"] = per["start"].astype(str)
+        per["end"] = per["end"].astype(str)
+        result["irregular_groups"] = int(((per["gaps"] + per["duplicates"] + per["out_of_order"]) > 0).sum())
+        result["per_group"] = per.head(MAX_GROUPS_REPORTED).to_dict(orient="records")
+
+    if freq is not None:
+        step = _offset_ns(freq)
+        result["freq"] = freq
+        if dominant is None:
+            result.update(applicable=False, reason="Not enough distinct timestamps to determine the data frequency.")
+        elif step < dominant:
+            result.update(applicable=False, reason=f"'{freq}' is finer than the data's {_delta_label(dominant)} step; resampling would only add empty bins.")
+        else:
+            result.update(applicable=True, reason=None)
+    return result
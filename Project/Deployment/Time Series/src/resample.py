@@ -0,0 +1,106 @@
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from src.columnar import iter_chunks
+from src.type_inference import detect_datetime_format, stratified_sample
+
+STREAMING_AGGS = ("sum", "count", "mean", "min", "max")
+
+
+def to_datetime(series: pd.Series) -> pd.Series:
+    # Parsing with a detected explicit format avoids per-element format guessing.
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+        fmt = detect_datetime_format(stratified_sample(series.dropna().astype(str), 1000))
+        if fmt is not None:
+            parsed = pd.to_datetime(series, format=fmt, errors='coerce')
+            if parsed.notna().sum() == series.notna().sum():
+                return parsed
+    return pd.to_datetime(series)
+
+
+def preview_cutoff(dt: pd.Series, freq: str, rows: int) -> pd.Timestamp:
+    """Latest timestamp that can still fall into the first ``rows`` resample bins.
+
+    The first bin label is derived with the same resample rules as the full
+    frame, then ``rows + 1`` further bins are stepped so both left- and
+    right-closed frequencies are covered.
+    """
+    first = dt.min()
+    first_label = pd.Series([0], index=[first]).resample(freq).sum().index[0]
+    return pd.date_range(start=first_label, periods=rows + 2, freq=freq)[-1]
+
+
+def _partial(chunk: pd.DataFrame, datetime_col: str, freq: str, agg: str, origin, group_cols: Optional[list] = None) -> pd.DataFrame:
+    # origin only applies to Tick frequencies; day multiples are expressed in hours
+    # so every chunk shares the same anchor, while W, ME, QE anchor themselves.
+    offset = pd.tseries.frequencies.to_offset(freq)
+    if isinstance(offset, pd.offsets.Day):
+        offset = pd.offsets.Hour(24 * offset.n)
+    if isinstance(offset, pd.offsets.Tick):
+        grouper = pd.Grouper(key=datetime_col, freq=offset, origin=origin)
+    else:
+        grouper = pd.Grouper(key=datetime_col, freq=offset)
+    grouped = chunk.groupby((group_cols or []) + [grouper], dropna=False)
+    if agg == "mean":
+        sums = grouped.sum(numeric_only=True)
+        counts = grouped.count()[sums.columns]
+        return pd.concat({"sum": sums, "count": counts}, axis=1)
+    return pd.concat({agg: getattr(grouped, agg)(**({} if agg == "count" else {"numeric_only": True}))}, axis=1)
+
+
+def _combine(acc: Optional[pd.DataFrame], part: pd.DataFrame, agg: str) -> pd.DataFrame:
+    if acc is None:
+        return part
+    both = pd.concat([acc, part])
+    levels = list(range(both.index.nlevels))
+    if agg in ("min", "max"):
+        return getattr(both.groupby(level=levels, dropna=False), agg)()
+    return both.groupby(level=levels, dropna=False).sum()
+
+
+def stream_resample(csv_path: Path, datetime_col: str, freq: str, agg: str = 'mean',
+                    columns: Optional[list] = None, chunksize: int = 100000,
+                    group_cols: Optional[list] = None) -> pd.DataFrame:
+    """Resample a stored dataset chunk by chunk, holding only per-bin partial aggregates.
+
+    With ``group_cols`` every group is resampled on its own and the result is
+    long format (group keys, bin, values); bins a group has no rows in are
+    left out rather than filled.
+    """
+    if agg not in STREAMING_AGGS:
+        raise ValueError(f"Streaming resample supports {', '.join(STREAMING_AGGS)}; got '{agg}'.")
+    group_cols = list(group_cols or [])
+    usecols = None if columns is None else group_cols + [datetime_col] + [c for c in columns if c != datetime_col and c not in group_cols]
+
+    # resample() anchors fixed frequencies at midnight of the first day ('start_day');
+    # one cheap pass over the datetime column gives the same origin for every chunk.
+    first = None
+    for chunk in iter_chunks(csv_path, columns=[datetime_col], chunksize=chunksize):
+        chunk_min = to_datetime(chunk[datetime_col]).min()
+        first = chunk_min if first is None or chunk_min < first else first
+    if first is None or pd.isnull(first):
+        raise ValueError(f"Column '{datetime_col}' has no valid datetimes.")
+    origin = first.normalize()
+
+    acc = None
+    for chunk in iter_chunks(csv_path, columns=usecols, chunksize=chunksize):
+        chunk[datetime_col] = to_datetime(chunk[datetime_col])
+        chunk = chunk.dropna(subset=[datetime_col])
+        if not len(chunk):
+            continue
+        acc = _combine(acc, _partial(chunk, datetime_col, freq, agg, origin, group_cols), agg)
+
+    if agg == "mean":
+        result = acc["sum"] / acc["count"].where(acc["count"] > 0)
+    else:
+        result = acc[agg]
+    if group_cols:
+        return result.reset_index()
+    full_index = pd.date_range(result.index.min(), result.index.max(), freq=freq, name=datetime_col)
+    fill = 0 if agg in ("sum", "count") else None
+    result = result.reindex(full_index, fill_value=fill)
+    return result.reset_index()
@@ -0,0 +1,217 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import warnings
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.forecasting import forecast_metrics
+from src.resample import to_datetime
+
+STAT_MODELS = ("arima", "sarimax", "holt_winters")
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class FitTimeout(BaseException):
+    # BaseException so broad ``except Exception`` blocks inside statsmodels cannot swallow it.
+    pass
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=int(os.getenv("STAT_WORKERS", str(max(1, (os.cpu_count() or 2) - 1)))),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _raise_timeout(signum, frame):
+    raise FitTimeout()
+
+
+def fit_forecast(model: str, y: np.ndarray, exog: Optional[np.ndarray], horizon: int,
+                 exog_future: Optional[np.ndarray], options: dict) -> np.ndarray:
+    """Fit one statsmodels model to ``y`` and forecast ``horizon`` steps."""
+    from statsmodels.tsa.arima.model import ARIMA
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    with warnings.catch_warnings():
+        # Convergence chatter from hundreds of fits is noise here; failures surface as exceptions.
+        warnings.simplefilter("ignore")
+        if model == "arima":
+            fitted = ARIMA(y, order=tuple(options.get("order", (1, 1, 1)))).fit()
+            return fitted.forecast(horizon)
+        if model == "sarimax":
+            fitted = SARIMAX(y, exog=exog, order=tuple(options.get("order", (1, 1, 1))),
+                             seasonal_order=tuple(options.get("seasonal_order", (0, 0, 0, 0)))).fit(disp=False)
+            return fitted.forecast(horizon, exog=exog_future)
+        if model == "holt_winters":
+            seasonal_periods = options.get("seasonal_periods", 52)
+            seasonal = options.get("seasonal", "mul")
+            # Seasonal terms need two full cycles of history.
+            if seasonal is not None and len(y) < 2 * seasonal_periods:
+                seasonal = None
+            fitted = ExponentialSmoothing(y, trend=options.get("trend", "add"), seasonal=seasonal,
+                                          seasonal_periods=seasonal_periods if seasonal else None).fit()
+            return fitted.forecast(horizon)
+    raise ValueError(f"Unknown model '{model}'. Choose from {', '.join(STAT_MODELS)}.")
+
+
+def _fit_groups(shm_name: str, shape: tuple, tasks: list, model: str, horizon: int,
+                evaluate: bool, timeout: Optional[float], options: dict) -> list:
+    """Worker entry point: fit every (group, start, stop) slice of the shared array."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        values = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        use_alarm = timeout and hasattr(signal, "setitimer")
+        if use_alarm:
+            signal.signal(signal.SIGALRM, _raise_timeout)
+        results = []
+        for group, start, stop in tasks:
+            block = values[start:stop]
+            # Column 0 is the target, the rest are exogenous regressors.
+            y, exog = block[:, 0], (block[:, 1:] if block.shape[1] > 1 else None)
+            train_end = len(y) - horizon if evaluate else len(y)
+            if evaluate:
+                exog_future = exog[train_end:] if exog is not None else None
+            else:
+                # Future regressors are unknown; hold their last observed value.
+                exog_future = np.repeat(exog[-1:], horizon, axis=0) if exog is not None else None
+            started = time.perf_counter()
+            result = {"group": group, "status": "ok", "error": None, "forecast": None, "metrics": None}
+            if train_end < 3:
+                result.update(status="error", error=f"Only {train_end} training rows.")
+            else:
+                try:
+                    if use_alarm:
+                        signal.setitimer(signal.ITIMER_REAL, timeout)
+                    forecast = fit_forecast(model, y[:train_end], None if exog is None else exog[:train_end],
+                                            horizon, exog_future, options)
+                    result["forecast"] = np.asarray(forecast, dtype=float).tolist()
+                    if evaluate:
+                        result["metrics"] = forecast_metrics(y[train_end:], forecast)
+                except FitTimeout:
+                    result.update(status="timeout", error=f"Fit exceeded {timeout}s.")
+                except Exception as e:
+                    result.update(status="error", error=f"{type(e).__name__}: {e}")
+                finally:
+                    if use_alarm:
+                        signal.setitimer(signal.ITIMER_REAL, 0)
+            result["fit_seconds"] = round(time.perf_counter() - started, 4)
+            results.append(result)
+        return results
+    finally:
+        shm.close()
+
+
+def _label(value):
+    # numpy scalars are not JSON serialisable; hand back plain Python values.
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def forecast_groups(df: pd.DataFrame, target_col: str, model: str = "holt_winters", group_col: Optional[str] = None,
+                    datetime_col: Optional[str] = None, exog_cols: Optional[list] = None, horizon: int = 12,
+                    evaluate: bool = True, timeout: Optional[float] = 60, options: Optional[dict] = None,
+                    groups_per_task: int = 4) -> dict:
+    """Fit ``model`` to every group of a panel in parallel and return one forecast and one metrics table.
+
+    The panel is packed once into a shared-memory float64 block (target first,
+    then ``exog_cols``) sorted by group; workers attach to it by name and
+    slice their groups, so no per-group frames are pickled. ``timeout`` bounds
+    each group's fit inside its worker.
+    """
+    if model not in STAT_MODELS:
+        raise ValueError(f"Unknown model '{model}'. Choose from {', '.join(STAT_MODELS)}.")
+    exog_cols = list(exog_cols or [])
+    if exog_cols and model != "sarimax":
+        raise ValueError("Exogenous columns are only used by 'sarimax'.")
+    missing = [c for c in [target_col, group_col, datetime_col, *exog_cols] if c is not None and c not in df.columns]
+    if missing:
+        raise ValueError(f"Columns not found: {', '.join(missing)}")
+
+    df = df.copy()
+    if datetime_col is not None:
+        df[datetime_col] = to_datetime(df[datetime_col])
+    keys = [c for c in (group_col, datetime_col) if c is not None]
+    if keys:
+        df = df.sort_values(keys, kind="stable")
+    df = df.dropna(subset=[target_col, *exog_cols])
+    # factorize codes null keys -1, which would alias the last group; such rows belong to no series.
+    ungrouped = int(df[group_col].isna().sum()) if group_col is not None else 0
+    if ungrouped:
+        df = df[df[group_col].notna()]
+
+    if group_col is None:
+        codes, labels = np.zeros(len(df), dtype=int), np.array([None], dtype=object)
+    else:
+        codes, labels = pd.factorize(df[group_col], sort=True)
+    bounds = np.concatenate([[0], np.flatnonzero(np.diff(codes)) + 1, [len(df)]])
+    packed = df[[target_col, *exog_cols]].to_numpy(dtype=np.float64)
+
+    shm = shared_memory.SharedMemory(create=True, size=max(packed.nbytes, 1))
+    started = time.perf_counter()
+    try:
+        np.ndarray(packed.shape, dtype=np.float64, buffer=shm.buf)[:] = packed
+        slices = [(_label(labels[codes[start]]), int(start), int(stop))
+                  for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+        pool = _get_pool()
+        futures = [pool.submit(_fit_groups, shm.name, packed.shape, slices[i:i + groups_per_task], model,
+                               horizon, evaluate, timeout, options or {})
+                   for i in range(0, len(slices), groups_per_task)]
+        results = [r for future in as_completed(futures) for r in future.result()]
+    finally:
+        shm.close()
+        shm.unlink()
+    order = {group: i for i, (group, _, _) in enumerate(slices)}
+    results.sort(key=lambda r: order[r["group"]])
+
+    dates, freq = None, None
+    if datetime_col is not None and len(df):
+        dates = df[datetime_col].to_numpy()
+        first = pd.DatetimeIndex(dates[slices[0][1]:slices[0][2]])
+        freq = pd.infer_freq(first) if len(first) >= 3 else None
+
+    forecasts, metrics = [], []
+    for (group, start, stop), result in zip(slices, results):
+        if result["forecast"] is not None:
+            steps = [None] * horizon
+            if dates is not None and evaluate:
+                # Evaluation forecasts line up with the held-out tail.
+                steps = pd.DatetimeIndex(dates[stop - horizon:stop]).strftime("%Y-%m-%d %H:%M:%S").tolist()
+            elif dates is not None and freq is not None:
+                steps = pd.date_range(dates[stop - 1], periods=horizon + 1, freq=freq)[1:].strftime("%Y-%m-%d %H:%M:%S").tolist()
+            forecasts.extend({"group": group, "step": step + 1, "date": date, "forecast": value}
+                             for step, (date, value) in enumerate(zip(steps, result["forecast"])))
+        metrics.append(dict({"group": group, "status": result["status"], "error": result["error"],
+                             "fit_seconds": result["fit_seconds"]}, **(result["metrics"] or {})))
+
+    return {
+        "model": model,
+        "horizon": horizon,
+        "evaluate": evaluate,
+        "groups": len(results),
+        "failed": sum(r["status"] != "ok" for r in results),
+        "ungrouped_rows": ungrouped,
+        "forecasts": forecasts,
+        "metrics": metrics,
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
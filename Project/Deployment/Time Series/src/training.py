@@ -0,0 +1,223 @@
+from pathlib import Path
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.columnar import read_columnar
+from src.forecasting import recursive_forecast, forecast_metrics, MetricAccumulator, MinMaxScaling
+from src.windowing import WindowDataset
+from src.resample import to_datetime
+from src.model_registry import SCALER_FILENAME
+
+ARCHITECTURES = ("ANN", "CNN", "CNN-LSTM", "FCN", "GRU", "LSTM", "RNN")
+
+
+class TrainingCancelled(RuntimeError):
+    pass
+
+
+def parse_strategy(strategy: str) -> dict:
+    """Map an outputs/ strategy path to window, horizon and rollout mode.
+
+    ``direct_12`` -> 12-step window predicting 12 steps at once,
+    ``window_12/recursive/data`` -> 12-step window predicting the next step,
+    ``no_window/direct/data`` -> single row in, next row out.
+    """
+    parts = strategy.strip("/").split("/")
+    match = re.fullmatch(r"direct_(\d+)", parts[0])
+    if match:
+        n = int(match.group(1))
+        return {"window": n, "horizon": n, "mode": "direct"}
+    match = re.fullmatch(r"window_(\d+)", parts[0])
+    if match or parts[0] == "no_window":
+        mode = parts[1] if len(parts) > 1 else "recursive"
+        if mode not in ("direct", "recursive"):
+            raise ValueError(f"Unknown strategy mode '{mode}'.")
+        return {"window": int(match.group(1)) if match else None, "horizon": 1, "mode": mode}
+    raise ValueError(f"Unknown strategy '{strategy}'. Use direct_<n>, window_<n>/<mode>/data or no_window/<mode>/data.")
+
+
+def build_model(architecture: str, input_shape: tuple, n_outputs: int):
+    import keras
+    from keras import layers
+
+    if architecture not in ARCHITECTURES:
+        raise ValueError(f"Unknown architecture '{architecture}'. Choose from {', '.join(ARCHITECTURES)}.")
+    inputs = keras.Input(shape=input_shape)
+    # no_window models see one row; sequence layers still want a time axis.
+    x = layers.Reshape((1, input_shape[0]))(inputs) if len(input_shape) == 1 and architecture != "ANN" else inputs
+    kernel = min(3, x.shape[1])
+    if architecture == "ANN":
+        x = layers.Flatten()(x)
+        x = layers.Dense(64, activation="relu")(x)
+        x = layers.Dense(32, activation="relu")(x)
+    elif architecture == "CNN":
+        x = layers.Conv1D(64, kernel, activation="relu", padding="same")(x)
+        x = layers.Flatten()(x)
+        x = layers.Dense(50, activation="relu")(x)
+    elif architecture == "CNN-LSTM":
+        x = layers.Conv1D(64, kernel, activation="relu", padding="same")(x)
+        x = layers.LSTM(50)(x)
+    elif architecture == "FCN":
+        for filters, size in ((128, 8), (256, 5), (128, 3)):
+            x = layers.Conv1D(filters, min(size, x.shape[1]), padding="same")(x)
+            x = layers.BatchNormalization()(x)
+            x = layers.Activation("relu")(x)
+        x = layers.GlobalAveragePooling1D()(x)
+    else:
+        x = {"GRU": layers.GRU, "LSTM": layers.LSTM, "RNN": layers.SimpleRNN}[architecture](64)(x)
+    outputs = layers.Dense(n_outputs)(x)
+    model = keras.Model(inputs, outputs, name=architecture)
+    model.compile(optimizer="adam", loss="mse", metrics=["mae"])
+    return model
+
+
+def sorted_panel(df: pd.DataFrame, features: list, group_col: Optional[str], datetime_col: Optional[str]) -> tuple:
+    """Features as one contiguous float32 array sorted by group and time, plus series row bounds."""
+    if datetime_col is not None:
+        df[datetime_col] = to_datetime(df[datetime_col])
+    keys = [c for c in (group_col, datetime_col) if c is not None]
+    df = df.sort_values(keys, kind="stable") if keys else df
+    values = df[features].to_numpy(dtype=np.float32, copy=True)
+    if group_col is None:
+        bounds = np.array([0, len(values)])
+    else:
+        bounds = np.concatenate([[0], np.flatnonzero(np.diff(pd.factorize(df[group_col])[0])) + 1, [len(values)]])
+    return values, bounds
+
+
+def scaled_panel(df: pd.DataFrame, features: list, group_col: Optional[str], datetime_col: Optional[str],
+                 mmap_dir: Optional[Path] = None, test_size: float = 0.0) -> tuple:
+    """``sorted_panel`` min-max scaled in place, plus the scaling.
+
+    The scaling is fitted on the rows before the held-out last ``test_size``
+    of each series only, so evaluation data never shapes it. With
+    ``mmap_dir`` the array is written there as .npy and reopened memory-mapped.
+    """
+    values, bounds = sorted_panel(df, features, group_col, datetime_col)
+    lengths = np.diff(bounds)
+    fit_rows = lengths - (lengths * test_size).astype(np.int64)
+    if not fit_rows.any():
+        fit_rows = lengths
+    low, high = np.full(len(features), np.nan, np.float32), np.full(len(features), np.nan, np.float32)
+    for start, rows in zip(bounds[:-1], fit_rows):
+        if rows:
+            # fmin/fmax skip NaNs, like nanmin/nanmax, without warning on all-NaN columns.
+            low = np.fmin(low, np.fmin.reduce(values[start:start + rows], axis=0))
+            high = np.fmax(high, np.fmax.reduce(values[start:start + rows], axis=0))
+    scaler = MinMaxScaling(features, low, high)
+    values -= scaler.low
+    values /= scaler.span
+    if mmap_dir is not None:
+        path = Path(mmap_dir) / "panel.npy"
+        np.save(path, values)
+        values = np.load(path, mmap_mode="r")
+    return values, bounds, scaler
+
+
+def train_model(params: dict, models_dir: Path, csv_path: Path,
+                progress: Callable[[float, str], None] = lambda fraction, message: None,
+                should_stop: Callable[[], bool] = lambda: False) -> dict:
+    """Fit one model and write ``model.keras``, ``scaler.json`` and ``metrics.json`` under ``outputs/<MODEL>/<strategy>/``.
+
+    The model is fitted on min-max scaled data; the metrics are in the data's own units.
+    """
+    import keras
+
+    architecture, strategy = params["architecture"], params["strategy"]
+    spec = parse_strategy(strategy)
+    epochs, test_size = int(params.get("epochs", 20)), float(params.get("test_size", 0.2))
+    group_col, datetime_col = params.get("group_col"), params.get("datetime_col")
+
+    df = read_columnar(csv_path)
+    features = params.get("columns") or [c for c in df.select_dtypes("number").columns if c != group_col]
+    targets = params.get("target_columns") or features
+    missing = [c for c in set(features) | set(targets) if c not in df.columns]
+    if missing:
+        raise ValueError(f"Columns not found: {', '.join(missing)}")
+    target_idx = [features.index(c) for c in targets]
+
+    mmap_dir = tempfile.mkdtemp(prefix="train-") if params.get("mmap") else None
+    try:
+        progress(0.0, "Preparing windows")
+        values, bounds, scaler = scaled_panel(df, features, group_col, datetime_col, mmap_dir, test_size)
+        scaler.targets = targets
+        del df
+        window = spec["window"] or 1
+        horizon = int(params.get("horizon") or spec["horizon"]) if spec["mode"] == "direct" else 1
+        dataset = WindowDataset(values, bounds, window, horizon, target_idx, flatten=spec["window"] is None)
+        if not len(dataset):
+            raise ValueError(f"No series is long enough for a window of {window} and horizon of {horizon}.")
+        train_set, test_set = dataset.split(test_size)
+        if not len(train_set) or not len(test_set):
+            raise ValueError("Not enough windows for a train/test split.")
+        batch_size = int(params.get("batch_size", 32))
+
+        class JobCallback(keras.callbacks.Callback):
+            def __init__(self):
+                super().__init__()
+                self._checked = 0.0
+
+            def on_epoch_end(self, epoch, logs=None):
+                loss = (logs or {}).get("loss")
+                progress((epoch + 1) / epochs * 0.9, f"Epoch {epoch + 1}/{epochs}, loss {loss:.5f}" if loss is not None else f"Epoch {epoch + 1}/{epochs}")
+
+            def on_train_batch_end(self, batch, logs=None):
+                # Checking the cancel flag at most once a second keeps it off the hot path.
+                if time.monotonic() - self._checked >= 1:
+                    self._checked = time.monotonic()
+                    if should_stop():
+                        self.model.stop_training = True
+
+        sample_x, sample_y = train_set.batch(np.arange(1))
+        model = build_model(architecture, sample_x.shape[1:], sample_y.shape[1])
+        model.fit(train_set.keras_sequence(batch_size, shuffle=True, seed=0), epochs=epochs, verbose=0, callbacks=[JobCallback()])
+        if should_stop():
+            raise TrainingCancelled("Training cancelled.")
+
+        progress(0.9, "Evaluating")
+        if spec["mode"] == "recursive":
+            # Roll every series over its own held-out tail in batched steps.
+            series = np.split(values, bounds[1:-1])
+            tails = [s for s in series if len(s) * (1 - test_size) >= window and int(len(s) * test_size) >= 1]
+            if not tails:
+                raise ValueError("No series is long enough to evaluate a recursive rollout.")
+            horizon = min(int(len(s) * test_size) for s in tails)
+            history = np.stack([s[-horizon - window:-horizon] for s in tails])
+            actual = np.stack([s[-horizon:, target_idx] for s in tails])
+            predict_fn = lambda batch: model.predict(batch, verbose=0)
+            predicted = recursive_forecast(predict_fn, history, horizon, target_idx, np.stack([s[-horizon:] for s in tails]),
+                                           flatten_window=spec["window"] is None)
+            metrics = {"recursive": forecast_metrics(scaler.inverse_transform(actual, targets),
+                                                     scaler.inverse_transform(predicted, targets))}
+        else:
+            # Scored batch by batch so the held-out windows are never materialised together.
+            accumulator = MetricAccumulator()
+            for batch_x, batch_y in test_set.iter_batches(max(batch_size, 1024), shuffle=False):
+                shape = (len(batch_x), horizon, len(targets))
+                accumulator.update(scaler.inverse_transform(batch_y.reshape(shape), targets),
+                                   scaler.inverse_transform(model.predict(batch_x, verbose=0).reshape(shape), targets))
+            metrics = {k: v for k, v in accumulator.result().items() if k != "count"}
+
+        out_dir = models_dir / architecture / strategy
+        out_dir.mkdir(parents=True, exist_ok=True)
+        # Save beside the target and swap in, so a loaded model never sees a half-written file.
+        tmp_model = out_dir / f".{os.getpid()}.model.keras"
+        model.save(tmp_model)
+        tmp_scaler = out_dir / f".{os.getpid()}.{SCALER_FILENAME}"
+        tmp_scaler.write_text(json.dumps(scaler.to_dict(), indent=4))
+        os.replace(tmp_scaler, out_dir / SCALER_FILENAME)
+        os.replace(tmp_model, out_dir / "model.keras")
+        (out_dir / "metrics.json").write_text(json.dumps(metrics, indent=4))
+        progress(1.0, "Done")
+        return {"model_name": f"{architecture}/{strategy}", "path": str(out_dir / "model.keras"), "metrics": metrics}
+    finally:
+        if mmap_dir is not None:
+            shutil.rmtree(mmap_dir, ignore_errors=True)
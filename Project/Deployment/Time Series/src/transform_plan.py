@@ -0,0 +1,352 @@
+from contextlib import contextmanager
+from pathlib import Path
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.columnar import pa, feather, columnar_path, has_columnar, iter_chunks, read_columnar
+from src.file_ops import DATA_DIR
+from src.type_inference import detect_datetime_format
+
+PLANS_DB = Path(os.getenv("PLANS_DB", DATA_DIR / "plans.sqlite"))
+PLAN_CACHE_DIR = DATA_DIR / "plan_cache"
+PLAN_SUFFIX = ".feather"
+SAMPLE_ROWS = 5000
+BATCH_ROWS = 65536
+STEP_OPS = ("cast", "drop_column", "drop_nulls", "filter")
+FILTER_OPERATORS = ("==", "!=", "<", "<=", ">", ">=", "in", "not_in", "between")
+
+
+def normalize_step(step: dict) -> dict:
+    """Validated copy of a step with only the keys its operation uses, so equal steps hash equally."""
+    op = step.get("op")
+    if op not in STEP_OPS:
+        raise ValueError(f"Unknown step '{op}'. Use one of: {', '.join(STEP_OPS)}.")
+    column = step.get("column")
+    if op != "drop_nulls" and not column:
+        raise ValueError(f"Step '{op}' needs a column.")
+    if op == "cast":
+        if not step.get("dtype"):
+            raise ValueError("Step 'cast' needs a dtype.")
+        normalized = {"op": op, "column": column, "dtype": step["dtype"], "drop_invalid": bool(step.get("drop_invalid", False))}
+        if step.get("format"):
+            normalized["format"] = step["format"]
+        return normalized
+    if op == "filter":
+        operator, value = step.get("operator"), step.get("value")
+        if operator not in FILTER_OPERATORS:
+            raise ValueError(f"Unknown filter operator '{operator}'. Use one of: {', '.join(FILTER_OPERATORS)}.")
+        if operator in ("in", "not_in") and not isinstance(value, list):
+            raise ValueError(f"Filter '{operator}' needs a list of values.")
+        if operator == "between" and (not isinstance(value, list) or len(value) != 2):
+            raise ValueError("Filter 'between' needs [low, high].")
+        if value is None:
+            raise ValueError(f"Filter '{operator}' needs a value.")
+        return {"op": op, "column": column, "operator": operator, "value": value}
+    return {"op": op, "column": column}
+
+
+def plan_hash(steps: list, columns: Optional[list] = None) -> str:
+    payload = json.dumps({"columns": columns, "steps": steps}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def split_dataset_id(dataset_id: str) -> tuple:
+    """``(content_hash, columns)`` of an EDA dataset ID; /eda/open appends a column projection as ``hash:a,b``."""
+    content_hash, _, selected = dataset_id.partition(":")
+    return content_hash, (selected.split(",") if selected else None)
+
+
+def cache_path(dataset_id: str, steps: list, cache_dir: Path = PLAN_CACHE_DIR) -> Path:
+    content_hash, columns = split_dataset_id(dataset_id)
+    return Path(cache_dir) / content_hash / f"{plan_hash(steps, columns)}{PLAN_SUFFIX}"
+
+
+def _cast(series: pd.Series, step: dict) -> pd.Series:
+    dtype = step["dtype"]
+    if dtype == "numeric":
+        return pd.to_numeric(series, errors="coerce")
+    if dtype == "datetime":
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series
+        return pd.to_datetime(series, format=step.get("format"), errors="coerce")
+    return series.astype(dtype)
+
+
+def _filter_value(series: pd.Series, value):
+    if isinstance(value, list):
+        return [_filter_value(series, v) for v in value]
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return pd.Timestamp(value)
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return float(value)
+    return value
+
+
+def _filter_mask(series: pd.Series, operator: str, value) -> pd.Series:
+    value = _filter_value(series, value)
+    if operator == "in":
+        return series.isin(value)
+    if operator == "not_in":
+        return ~series.isin(value)
+    if operator == "between":
+        return series.between(value[0], value[1])
+    return {"==": series.eq, "!=": series.ne, "<": series.lt, "<=": series.le, ">": series.gt, ">=": series.ge}[operator](value)
+
+
+def apply_step(df: pd.DataFrame, step: dict, stats: Optional[dict] = None) -> pd.DataFrame:
+    op, column = step["op"], step.get("column")
+    if column is not None and column not in df.columns:
+        raise ValueError(f"Column '{column}' not found.")
+    rows_in, invalid = len(df), 0
+    if op == "cast":
+        casted = _cast(df[column], step)
+        invalid = int((casted.isna() & df[column].notna()).sum())
+        if step["drop_invalid"]:
+            keep = casted.notna()
+            df = df.loc[keep]
+            casted = casted.loc[keep]
+        df = df.assign(**{column: casted})
+    elif op == "drop_column":
+        df = df.drop(columns=[column])
+    elif op == "drop_nulls":
+        df = df.dropna(subset=[column] if column else None)
+    else:
+        df = df.loc[_filter_mask(df[column], step["operator"], step["value"]).to_numpy(dtype=bool)]
+    if stats is not None:
+        stats["rows_in"] += rows_in
+        stats["rows_out"] += len(df)
+        stats["invalid"] += invalid
+    return df
+
+
+def _new_stats(steps: list) -> list:
+    return [{"step": i, "op": step["op"], "rows_in": 0, "rows_out": 0, "invalid": 0} for i, step in enumerate(steps)]
+
+
+def apply_plan(df: pd.DataFrame, steps: list, stats: Optional[list] = None) -> pd.DataFrame:
+    """Run every step over one frame (or chunk) before the next chunk is read; ``stats`` accumulates per step."""
+    for i, step in enumerate(steps):
+        df = apply_step(df, step, None if stats is None else stats[i])
+    return df
+
+
+def sample_rows(df: pd.DataFrame, rows: int = SAMPLE_ROWS) -> pd.DataFrame:
+    # Evenly spaced rows, so problems that only appear late in a file still show up in the preview.
+    if len(df) <= rows:
+        return df
+    return df.iloc[np.linspace(0, len(df) - 1, rows).astype(np.int64)]
+
+
+def sample_file(csv_path: Path, columns: Optional[list] = None, rows: int = SAMPLE_ROWS) -> pd.DataFrame:
+    if has_columnar(csv_path):
+        table = feather.read_table(columnar_path(csv_path), columns=columns, memory_map=True)
+        if table.num_rows > rows:
+            table = table.take(np.linspace(0, table.num_rows - 1, rows).astype(np.int64))
+        return table.to_pandas()
+    return sample_rows(read_columnar(csv_path, columns), rows)
+
+
+def prepare_step(sample: pd.DataFrame, steps: list, step: dict) -> dict:
+    """Normalize a new step against the plan's output on the sample.
+
+    Datetime casts pin the format detected on the sample, so every chunk of the
+    full pass parses with the same format instead of guessing per chunk.
+    """
+    step = normalize_step(step)
+    out = apply_plan(sample, steps)
+    if step.get("column") is not None and step["column"] not in out.columns:
+        raise ValueError(f"Column '{step['column']}' not found.")
+    if step["op"] == "cast" and step["dtype"] == "datetime" and "format" not in step:
+        values = out[step["column"]]
+        if not pd.api.types.is_datetime64_any_dtype(values):
+            fmt = detect_datetime_format(values.dropna().astype(str))
+            if fmt is not None:
+                step["format"] = fmt
+    return step
+
+
+def preview_plan(sample: pd.DataFrame, steps: list, rows: int = 10) -> dict:
+    stats = _new_stats(steps)
+    out = apply_plan(sample, steps, stats)
+    return {
+        "sampled_rows": len(sample),
+        "steps": stats,
+        "columns": [{"name": c, "dtype": str(out[c].dtype)} for c in out.columns],
+        "rows": len(out),
+        "head": json.loads(out.head(rows).to_json(orient="records", date_format="iso")),
+    }
+
+
+def _arrow_type(source_type, dtype: str):
+    if dtype == "numeric":
+        return pa.int64() if pa.types.is_integer(source_type) else pa.float64()
+    if dtype == "datetime":
+        return pa.timestamp("ns")
+    arrow_type = pa.Schema.from_pandas(pd.DataFrame({"c": pd.Series([], dtype=dtype)}), preserve_index=False).field("c").type
+    # Dictionaries may differ from chunk to chunk, which an IPC file cannot hold; store the values.
+    if pa.types.is_dictionary(arrow_type) or pa.types.is_null(arrow_type):
+        return pa.large_string()
+    return arrow_type
+
+
+def output_schema(source_schema, steps: list):
+    """Schema of the plan's output, derived from the source schema so every chunk is written with the same types."""
+    fields = {field.name: field.type for field in source_schema}
+    for step in steps:
+        if step["op"] == "drop_column":
+            fields.pop(step["column"], None)
+        elif step["op"] == "cast" and step["column"] in fields:
+            fields[step["column"]] = _arrow_type(fields[step["column"]], step["dtype"])
+    return pa.schema(list(fields.items()))
+
+
+def _to_table(df: pd.DataFrame, schema):
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            df = df.assign(**{column: df[column].astype(object)})
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+def plan_stats(steps: list, source: Optional[Path] = None, df: Optional[pd.DataFrame] = None,
+               columns: Optional[list] = None) -> dict:
+    """Per-step row counts of the plan over the full data, chunk by chunk, without writing any output."""
+    stats = _new_stats(steps)
+    rows = 0
+    for chunk in ([df] if df is not None else iter_chunks(source, columns)):
+        rows += len(apply_plan(chunk, steps, stats))
+    return {"rows": rows, "steps": stats}
+
+
+def materialize(steps: list, output: Path, source: Optional[Path] = None, df: Optional[pd.DataFrame] = None,
+                columns: Optional[list] = None) -> dict:
+    """Execute the plan into an Arrow file at ``output`` and return the per-step row counts.
+
+    A stored dataset with a columnar copy is streamed record batch by record
+    batch, each batch going through every step before it is written, so peak
+    memory is one batch however large the file. Without one the frame is
+    transformed in memory in a single pass.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is required to materialize a transform plan.")
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(f"{output.name}.{os.getpid()}.tmp")
+    stats = _new_stats(steps)
+    rows = 0
+    try:
+        if df is None and source is not None and has_columnar(source):
+            with pa.memory_map(str(columnar_path(source))) as mapped:
+                source_schema = pa.ipc.open_file(mapped).schema
+            if columns is not None:
+                source_schema = pa.schema([source_schema.field(c) for c in columns])
+            schema = output_schema(source_schema, steps)
+            with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+                for chunk in iter_chunks(source, columns):
+                    out = apply_plan(chunk, steps, stats)
+                    rows += len(out)
+                    writer.write_table(_to_table(out, schema))
+        else:
+            if df is None:
+                df = read_columnar(source, columns)
+            out = apply_plan(df, steps, stats)
+            rows = len(out)
+            table = _to_table(out.reset_index(drop=True), None)
+            with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table, max_chunksize=BATCH_ROWS)
+        result = {"rows": rows, "steps": stats, "created_at": time.time()}
+        output.with_suffix(".json").write_text(json.dumps(result))
+        tmp.replace(output)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return result
+
+
+def materialized(output: Path) -> Optional[dict]:
+    """Stats of an already executed plan, or None if it has not been run yet."""
+    output = Path(output)
+    if not output.exists():
+        return None
+    return json.loads(output.with_suffix(".json").read_text())
+
+
+class PlanStore:
+    """Steps recorded per dataset ID, kept in SQLite so a plan survives restarts and is shared by workers."""
+
+    def __init__(self, path: Path = PLANS_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS plans (
+                    dataset_id TEXT PRIMARY KEY,
+                    steps TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )""")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        conn.isolation_level = None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _steps(conn: sqlite3.Connection, dataset_id: str) -> list:
+        row = conn.execute("SELECT steps FROM plans WHERE dataset_id = ?", (dataset_id,)).fetchone()
+        return [] if row is None else json.loads(row["steps"])
+
+    @staticmethod
+    def _save(conn: sqlite3.Connection, dataset_id: str, steps: list):
+        if steps:
+            conn.execute("INSERT OR REPLACE INTO plans (dataset_id, steps, updated_at) VALUES (?, ?, ?)",
+                         (dataset_id, json.dumps(steps), time.time()))
+        else:
+            conn.execute("DELETE FROM plans WHERE dataset_id = ?", (dataset_id,))
+
+    def get(self, dataset_id: str) -> list:
+        with self._connect() as conn:
+            return self._steps(conn, dataset_id)
+
+    def append(self, dataset_id: str, step: dict) -> list:
+        with self._transaction() as conn:
+            steps = self._steps(conn, dataset_id) + [step]
+            self._save(conn, dataset_id, steps)
+        return steps
+
+    def undo(self, dataset_id: str) -> list:
+        with self._transaction() as conn:
+            steps = self._steps(conn, dataset_id)[:-1]
+            self._save(conn, dataset_id, steps)
+        return steps
+
+    def clear(self, dataset_id: str):
+        with self._transaction() as conn:
+            self._save(conn, dataset_id, [])
+
+
+def describe_plan(dataset_id: str, steps: list) -> dict:
+    _, columns = split_dataset_id(dataset_id)
+    return {"dataset_id": dataset_id, "steps": steps, "plan_hash": plan_hash(steps, columns)}
+
+
+plan_store = PlanStore()
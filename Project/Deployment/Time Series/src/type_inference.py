@@ -0,0 +1,150 @@
+from collections import Counter
+from typing import Optional
+import warnings
+
+import numpy as np
+import pandas as pd
+
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:  # pandas < 2.2
+    from pandas._libs.tslibs.parsing import guess_datetime_format
+
+BOOL_TOKENS = {"true", "false", "yes", "no", "t", "f", "y", "n"}
+FORMAT_PROBES = 10
+
+
+def stratified_sample(series: pd.Series, sample_size: int) -> pd.Series:
+    # Evenly spaced rows across the whole column, so formats that change
+    # part-way through a file are still seen, plus the head and tail.
+    n = len(series)
+    if n <= sample_size:
+        return series
+    edge = min(50, sample_size // 10)
+    positions = np.unique(np.concatenate([
+        np.arange(edge),
+        np.linspace(0, n - 1, sample_size, dtype=np.int64),
+        np.arange(n - edge, n),
+    ]))
+    return series.iloc[positions]
+
+
+def _is_integral(values: pd.Series) -> bool:
+    values = values.dropna()
+    return bool(len(values)) and bool((np.mod(values.to_numpy(dtype=float), 1) == 0).all())
+
+
+def detect_datetime_format(text: pd.Series) -> Optional[str]:
+    # Probe distinct values spread over the sample: panel files repeat each
+    # date per group, and a single day <= 12 cannot tell %d/%m from %m/%d.
+    distinct = text.drop_duplicates()
+    probes = stratified_sample(distinct, FORMAT_PROBES)
+    guesses = Counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        for value in probes:
+            fmt = guess_datetime_format(value)
+            if fmt is not None:
+                guesses[fmt] += 1
+            if fmt is None or ("%d" in fmt and "%m" in fmt):
+                alt = guess_datetime_format(value, dayfirst=True)
+                if alt is not None and alt != fmt:
+                    guesses[alt] += 1
+    if not guesses:
+        return None
+    best_fmt, best_ratio = None, 0.0
+    for fmt, _ in guesses.most_common(4):
+        ratio = pd.to_datetime(distinct, format=fmt, errors='coerce').notna().mean()
+        if ratio > best_ratio:
+            best_fmt, best_ratio = fmt, ratio
+    return best_fmt
+
+
+def _classify_text(text: pd.Series, min_ratio: float, categorical_ratio: float) -> dict:
+    total = len(text)
+    if total == 0:
+        return {"type": "string", "convertible_ratio": 1.0, "format": None}
+
+    # Parsers run once per distinct value; ratios are weighted by how often each occurs.
+    counts = text.value_counts(sort=False)
+    distinct = pd.Series(counts.index, dtype=object)
+    weights = counts.to_numpy()
+
+    def ratio(mask: pd.Series) -> float:
+        return float(weights[mask.to_numpy()].sum() / total)
+
+    bool_ratio = ratio(distinct.str.lower().isin(BOOL_TOKENS))
+    if bool_ratio >= min_ratio:
+        return {"type": "bool", "convertible_ratio": bool_ratio, "format": None}
+
+    numeric = pd.to_numeric(distinct, errors='coerce')
+    numeric_ratio = ratio(numeric.notna())
+    if numeric_ratio >= min_ratio:
+        kind = "integer" if _is_integral(numeric) else "numeric"
+        return {"type": kind, "convertible_ratio": numeric_ratio, "format": None}
+
+    # Only strings with digits can be dates; skip the parser for plain labels.
+    if ratio(distinct.str.contains(r"\d", regex=True)) >= min_ratio:
+        fmt = detect_datetime_format(distinct)
+        if fmt is not None:
+            dt_ratio = ratio(pd.to_datetime(distinct, format=fmt, errors='coerce').notna())
+            if dt_ratio >= min_ratio:
+                return {"type": "datetime", "convertible_ratio": dt_ratio, "format": fmt}
+
+    if len(distinct) / total <= categorical_ratio:
+        return {"type": "categorical", "convertible_ratio": 1.0, "format": None}
+    return {"type": "string", "convertible_ratio": 1.0, "format": None}
+
+
+def _classify(series: pd.Series, min_ratio: float, categorical_ratio: float) -> dict:
+    if pd.api.types.is_bool_dtype(series):
+        return {"type": "bool", "convertible_ratio": 1.0, "format": None}
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return {"type": "datetime", "convertible_ratio": 1.0, "format": None}
+    if pd.api.types.is_integer_dtype(series):
+        return {"type": "integer", "convertible_ratio": 1.0, "format": None}
+    if pd.api.types.is_numeric_dtype(series):
+        kind = "integer" if _is_integral(series) else "numeric"
+        return {"type": kind, "convertible_ratio": 1.0, "format": None}
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return {"type": "categorical", "convertible_ratio": 1.0, "format": None}
+    text = series.dropna().astype(str).str.strip()
+    return _classify_text(text, min_ratio, categorical_ratio)
+
+
+def _full_scan_ratio(series: pd.Series, result: dict) -> float:
+    values = series.dropna()
+    if not len(values) or result["type"] in ("string", "categorical"):
+        return 1.0
+    if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values):
+        return 1.0
+    text = values.astype(str).str.strip()
+    if result["type"] == "bool":
+        return float(text.str.lower().isin(BOOL_TOKENS).mean())
+    if result["type"] == "datetime":
+        return float(pd.to_datetime(text, format=result["format"], errors='coerce').notna().mean())
+    return float(pd.to_numeric(text, errors='coerce').notna().mean())
+
+
+def infer_column_types(df: pd.DataFrame, sample_size: int = 10000, full_scan: bool = False,
+                       min_ratio: float = 0.95, categorical_ratio: float = 0.05) -> dict:
+    """Classify every column as numeric, integer, bool, datetime, categorical or string.
+
+    Classification runs on a stratified sample of each column; with
+    ``full_scan`` the chosen type is re-checked against every row so the
+    reported ``convertible_ratio`` is exact.
+    """
+    results = {}
+    for column in df.columns:
+        series = df[column]
+        sample = stratified_sample(series, sample_size)
+        result = _classify(sample, min_ratio, categorical_ratio)
+        result["sampled_rows"] = int(len(sample))
+        result["confirmed"] = False
+        if full_scan and len(sample) < len(series):
+            result["convertible_ratio"] = _full_scan_ratio(series, result)
+            result["confirmed"] = True
+        elif full_scan:
+            result["confirmed"] = True
+        results[column] = result
+    return results
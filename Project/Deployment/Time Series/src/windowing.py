@@ -0,0 +1,92 @@
+from pathlib import Path
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+
+
+class WindowDataset:
+    """Sliding windows over one contiguous ``(rows, features)`` array, without materialising them.
+
+    ``bounds`` are the row offsets of each series (``[0, ..., rows]``); a window
+    never spans two series. Samples are only start offsets; a batch gathers
+    its windows from a strided view, so memory stays at one copy of the data
+    plus one batch. ``values`` can be a ``np.memmap`` for data larger than RAM.
+    """
+
+    def __init__(self, values: np.ndarray, bounds: Sequence[int], window: int, horizon: int = 1,
+                 target_idx: Optional[Sequence[int]] = None, flatten: bool = False,
+                 starts: Optional[np.ndarray] = None):
+        if values.ndim != 2:
+            raise ValueError(f"Expected a (rows, features) array, got shape {values.shape}.")
+        self.values = values
+        self.bounds = np.asarray(bounds, dtype=np.int64)
+        self.window = int(window)
+        self.horizon = int(horizon)
+        self.target_idx = np.arange(values.shape[1]) if target_idx is None else np.asarray(target_idx)
+        self.flatten = flatten
+        span = self.window + self.horizon
+        # (rows - span + 1, features, span) view; nothing is copied here.
+        self._view = np.lib.stride_tricks.sliding_window_view(values, span, axis=0) if len(values) >= span else None
+        if starts is None:
+            starts = np.concatenate([np.arange(lo, hi - span + 1, dtype=np.int64)
+                                     for lo, hi in zip(self.bounds[:-1], self.bounds[1:])] or [np.empty(0, np.int64)])
+        self.starts = starts
+
+    @classmethod
+    def from_npy(cls, path: Path, bounds: Sequence[int], window: int, **kwargs) -> "WindowDataset":
+        return cls(np.load(path, mmap_mode="r"), bounds, window, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def _subset(self, starts: np.ndarray) -> "WindowDataset":
+        subset = WindowDataset.__new__(WindowDataset)
+        subset.__dict__.update(self.__dict__)
+        subset.starts = starts
+        return subset
+
+    def split(self, test_size: float = 0.2) -> tuple:
+        """Chronological split inside each series: the last ``test_size`` of its windows go to the second set."""
+        group = np.searchsorted(self.bounds, self.starts, side="right") - 1
+        counts = np.bincount(group, minlength=len(self.bounds) - 1)
+        rank = np.arange(len(self.starts)) - np.repeat(np.cumsum(counts) - counts, counts)
+        is_test = rank >= np.repeat(np.floor(counts * (1 - test_size)).astype(np.int64), counts)
+        return self._subset(self.starts[~is_test]), self._subset(self.starts[is_test])
+
+    def batch(self, indices: np.ndarray) -> tuple:
+        """Inputs ``(b, window, F)`` (or ``(b, window * F)``) and targets ``(b, horizon * targets)``."""
+        windows = self._view[self.starts[indices]]
+        x = windows[:, :, :self.window].transpose(0, 2, 1)
+        y = windows[:, self.target_idx, self.window:].transpose(0, 2, 1)
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        if self.flatten:
+            x = x.reshape(len(x), -1)
+        return x, np.ascontiguousarray(y, dtype=np.float32).reshape(len(y), -1)
+
+    def iter_batches(self, batch_size: int = 32, shuffle: bool = True, seed: Optional[int] = None) -> Iterator[tuple]:
+        order = np.random.default_rng(seed).permutation(len(self)) if shuffle else np.arange(len(self))
+        for i in range(0, len(order), batch_size):
+            yield self.batch(order[i:i + batch_size])
+
+    def keras_sequence(self, batch_size: int = 32, shuffle: bool = True, seed: Optional[int] = None):
+        import keras
+
+        dataset = self
+
+        class WindowSequence(keras.utils.Sequence):
+            def __init__(self):
+                super().__init__()
+                self.rng = np.random.default_rng(seed)
+                self.order = self.rng.permutation(len(dataset)) if shuffle else np.arange(len(dataset))
+
+            def __len__(self):
+                return -(-len(dataset) // batch_size)
+
+            def __getitem__(self, i):
+                return dataset.batch(self.order[i * batch_size:(i + 1) * batch_size])
+
+            def on_epoch_end(self):
+                if shuffle:
+                    self.order = self.rng.permutation(len(dataset))
+
+        return WindowSequence()
@@ -0,0 +1,37 @@
+"""Run from the "Time Series" directory: ``python -m pytest tests``."""
+import asyncio
+import os
+import signal
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from src.executor import BoundedProcessPool
+
+
+def test_pool_recovers_after_worker_is_killed():
+    pool = BoundedProcessPool(max_workers=1, max_queue=2)
+    try:
+        assert asyncio.run(pool.run(pow, 2, 3)) == 8
+        broken = pool._executor
+        for pid in list(broken._processes):
+            os.kill(pid, signal.SIGKILL)
+        deadline = time.monotonic() + 10
+        while not broken._broken and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert asyncio.run(pool.run(pow, 2, 4)) == 16
+        assert pool._executor is not broken
+        assert pool.stats()["in_flight"] == 0
+    finally:
+        pool.shutdown()
+
+
+def test_task_that_kills_its_worker_fails_without_breaking_later_calls():
+    pool = BoundedProcessPool(max_workers=1, max_queue=2)
+    try:
+        with pytest.raises(BrokenProcessPool):
+            asyncio.run(pool.run(os._exit, 1, poll_interval=0.05))
+        assert asyncio.run(pool.run(pow, 3, 2)) == 9
+    finally:
+        pool.shutdown()